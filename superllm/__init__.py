@@ -2,9 +2,35 @@
 SuperLLM: Enhanced LLM capabilities through test-time compute and search algorithms.
 """
 
-from superllm.core import ThoughtTree, ExpertFeedback
-from superllm.search import AdaptiveBeamSearch
-from superllm.evaluation import MetricsTracker
+from typing import TYPE_CHECKING
+import importlib
 
 __version__ = "0.1.0"
-__all__ = ["ThoughtTree", "ExpertFeedback", "AdaptiveBeamSearch", "MetricsTracker"] 
\ No newline at end of file
+__all__ = ["ThoughtTree", "ExpertFeedback", "AdaptiveBeamSearch", "MetricsTracker"]
+
+# Public names are imported on first access (PEP 562), so that ``import superllm``
+# does not pull in transformers, torch or numpy for components that are not used
+_LAZY_IMPORTS = {
+    "ThoughtTree": "superllm.core.thought_tree",
+    "ExpertFeedback": "superllm.core.expert_feedback",
+    "AdaptiveBeamSearch": "superllm.search.beam_search",
+    "MetricsTracker": "superllm.evaluation.metrics",
+}
+
+if TYPE_CHECKING:
+    from superllm.core import ThoughtTree, ExpertFeedback
+    from superllm.search import AdaptiveBeamSearch
+    from superllm.evaluation import MetricsTracker
+
+
+def __getattr__(name):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
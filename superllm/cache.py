@@ -0,0 +1,163 @@
+"""
+Bounded memoization caches and stable content hashing shared across SuperLLM.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import dataclasses
+import hashlib
+import pickle
+import struct
+import time
+
+_MISSING = object()
+
+
+def stable_hash(obj: Any) -> bytes:
+    """
+    Compute a content hash of ``obj`` that is stable across processes.
+
+    Unlike ``hash(str(obj))`` this does not depend on ``PYTHONHASHSEED`` or on
+    ``__repr__`` truncation (e.g. of large NumPy arrays), and it is 128 bits wide.
+    Containers are hashed structurally; dictionaries and sets are hashed
+    independently of their iteration order.
+
+    Args:
+        obj: The object to hash
+
+    Returns:
+        A 16-byte digest
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    _feed(digest, obj)
+    return digest.digest()
+
+
+def _feed(digest: Any, obj: Any) -> None:
+    if obj is None:
+        digest.update(b"N")
+    elif isinstance(obj, bool):
+        digest.update(b"T" if obj else b"F")
+    elif isinstance(obj, int):
+        digest.update(b"i" + str(obj).encode() + b";")
+    elif isinstance(obj, float):
+        digest.update(b"f" + struct.pack("<d", obj))
+    elif isinstance(obj, str):
+        data = obj.encode("utf-8", "surrogatepass")
+        digest.update(b"s" + struct.pack("<Q", len(data)) + data)
+    elif isinstance(obj, bytes):
+        digest.update(b"b" + struct.pack("<Q", len(obj)) + obj)
+    elif isinstance(obj, (tuple, list)):
+        digest.update((b"t" if isinstance(obj, tuple) else b"l") + struct.pack("<Q", len(obj)))
+        for item in obj:
+            _feed(digest, item)
+    elif isinstance(obj, dict):
+        digest.update(b"d" + struct.pack("<Q", len(obj)))
+        for key_hash, value in sorted((stable_hash(k), v) for k, v in obj.items()):
+            digest.update(key_hash)
+            _feed(digest, value)
+    elif isinstance(obj, (set, frozenset)):
+        digest.update(b"S" + struct.pack("<Q", len(obj)))
+        for item_hash in sorted(stable_hash(item) for item in obj):
+            digest.update(item_hash)
+    elif hasattr(obj, "__array__") and hasattr(obj, "dtype"):
+        import numpy as np
+
+        array = np.ascontiguousarray(obj)
+        digest.update(b"a" + array.dtype.str.encode() + repr(array.shape).encode())
+        digest.update(array.tobytes())
+    elif dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        digest.update(b"D" + type(obj).__qualname__.encode())
+        for field in dataclasses.fields(obj):
+            _feed(digest, field.name)
+            _feed(digest, getattr(obj, field.name))
+    else:
+        try:
+            data = pickle.dumps(obj, protocol=4)
+        except Exception:
+            data = repr(obj).encode()
+        digest.update(b"p" + struct.pack("<Q", len(data)) + data)
+
+
+class LRUCache:
+    """
+    Least-recently-used cache with an optional time-to-live and hit counters.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10000,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries
+            ttl: Seconds after which an entry expires; entries never expire if None
+            clock: Time source, injectable for tests
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None, count: bool = True) -> Any:
+        """
+        Look up ``key``, marking it as recently used.
+
+        Args:
+            key: Cache key
+            default: Value returned on a miss
+            count: Whether the lookup is counted in the hit/miss statistics
+
+        Returns:
+            The cached value, or ``default``
+        """
+        entry = self._entries.get(key)
+        if entry is not None and self.ttl is not None and self.clock() - entry[0] > self.ttl:
+            del self._entries[key]
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            if count:
+                self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        if count:
+            self.hits += 1
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store ``value`` under ``key``, evicting the least recently used entries."""
+        self._entries[key] = (self.clock(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
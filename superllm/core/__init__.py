@@ -2,7 +2,41 @@
 Core components of SuperLLM.
 """
 
-from .thought_tree import ThoughtTree
-from .expert_feedback import ExpertFeedback
+from typing import TYPE_CHECKING
+import importlib
 
-__all__ = ["ThoughtTree", "ExpertFeedback"] 
\ No newline at end of file
+__all__ = [
+    "ThoughtTree", "ExpertFeedback", "SelfConsistency", "GenerationScheduler",
+    "NGramDrafter", "ModelDrafter", "solve_many"
+]
+
+_LAZY_IMPORTS = {
+    "ThoughtTree": ".thought_tree",
+    "ExpertFeedback": ".expert_feedback",
+    "SelfConsistency": ".self_consistency",
+    "GenerationScheduler": ".scheduler",
+    "NGramDrafter": ".speculative",
+    "ModelDrafter": ".speculative",
+    "solve_many": ".batch_solve",
+}
+
+if TYPE_CHECKING:
+    from .thought_tree import ThoughtTree
+    from .expert_feedback import ExpertFeedback
+    from .self_consistency import SelfConsistency
+    from .scheduler import GenerationScheduler
+    from .speculative import NGramDrafter, ModelDrafter
+    from .batch_solve import solve_many
+
+
+def __getattr__(name):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
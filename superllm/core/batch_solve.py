@@ -0,0 +1,101 @@
+"""
+Solving many prompts in parallel worker processes.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from ..search.executors import bounded_imap
+from .thought_tree import ThoughtTree
+
+# Per-process state set up once by ``_init_worker``
+_worker: Dict[str, Any] = {}
+
+
+def solve_many(
+    prompts: Iterable[str],
+    model_loader: Callable[[], Tuple[Any, Any]],
+    workers: int = 1,
+    tree_kwargs: Optional[Dict[str, Any]] = None,
+    solve_kwargs: Optional[Dict[str, Any]] = None,
+    expert_factory: Optional[Callable[[], Any]] = None,
+    search_factory: Optional[Callable[[], Any]] = None,
+    max_in_flight: Optional[int] = None,
+    mp_context: Any = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Solve every prompt with its own ``ThoughtTree``, sharded over worker processes.
+
+    Each worker calls ``model_loader`` once when it starts and reuses the model
+    for all of its prompts. Every prompt gets a fresh tree (and fresh expert
+    system and search algorithm, if factories are given), so solves never
+    share state. Results are yielded in the order of ``prompts`` while at most
+    ``max_in_flight`` prompts are pending, so arbitrarily long prompt streams
+    are processed in bounded memory.
+
+    Args:
+        prompts: Prompts to solve; consumed lazily
+        model_loader: Picklable function returning ``(model, tokenizer)``
+        workers: Number of worker processes; 1 or less solves in this process
+        tree_kwargs: Keyword arguments for every ``ThoughtTree``
+        solve_kwargs: Keyword arguments for every ``ThoughtTree.solve`` call
+        expert_factory: Optional picklable function creating an expert system
+            for each solve
+        search_factory: Optional picklable function creating a search
+            algorithm for each solve
+        max_in_flight: Maximum number of pending prompts; defaults to twice
+            the number of workers
+        mp_context: Optional ``multiprocessing`` context for the worker pool
+
+    Yields:
+        The result of ``ThoughtTree.solve`` for each prompt, in order
+    """
+    settings = {
+        "tree_kwargs": dict(tree_kwargs or {}),
+        "solve_kwargs": dict(solve_kwargs or {}),
+        "expert_factory": expert_factory,
+        "search_factory": search_factory
+    }
+    if workers <= 1:
+        state = _load_state(model_loader, settings)
+        for prompt in prompts:
+            yield _solve_prompt(prompt, state)
+        return
+
+    if max_in_flight is None:
+        max_in_flight = 2 * workers
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=mp_context,
+        initializer=_init_worker,
+        initargs=(model_loader, settings)
+    ) as executor:
+        yield from bounded_imap(_solve_prompt, prompts, executor, max_in_flight)
+
+
+def _load_state(
+    model_loader: Callable[[], Tuple[Any, Any]],
+    settings: Dict[str, Any]
+) -> Dict[str, Any]:
+    model, tokenizer = model_loader()
+    return dict(settings, model=model, tokenizer=tokenizer)
+
+
+def _init_worker(model_loader: Callable[[], Tuple[Any, Any]], settings: Dict[str, Any]) -> None:
+    """Load the model once per worker process."""
+    _worker.update(_load_state(model_loader, settings))
+
+
+def _solve_prompt(prompt: str, state: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Solve one prompt on a fresh tree with the worker's model."""
+    if state is None:
+        state = _worker
+    tree = ThoughtTree(state["model"], state["tokenizer"], **state["tree_kwargs"])
+    expert_factory = state["expert_factory"]
+    search_factory = state["search_factory"]
+    return tree.solve(
+        prompt,
+        search_algorithm=search_factory() if search_factory is not None else None,
+        expert_system=expert_factory() if expert_factory is not None else None,
+        **state["solve_kwargs"]
+    )
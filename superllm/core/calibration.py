@@ -0,0 +1,137 @@
+"""
+Online calibration of automated scores against human feedback.
+"""
+
+from typing import Any, Dict
+import math
+
+import numpy as np
+
+# Parameters of sigmoid(a * s + b) that map 0.25 -> 0.25 and 0.75 -> 0.75,
+# i.e. approximately the identity on [0, 1]
+_IDENTITY_PRIOR = np.array([4.0 * math.log(3.0), -2.0 * math.log(3.0)])
+
+
+class OnlineCalibrator:
+    """
+    Learn how automated scores map to human scores from the feedback stream.
+
+    Fits Platt scaling, ``human ~ sigmoid(a * auto + b)``, by regularized
+    logistic regression with soft targets on the last ``window`` pairs. The
+    fit is refreshed with a few Newton steps every ``refit_every`` updates
+    and is shrunk towards the identity map, so that it is usable from the
+    first observations. Predictions come with an uncertainty that combines
+    the parameter uncertainty (Laplace approximation) with the residual
+    spread of human scores around the fit, measured on the window.
+    """
+
+    def __init__(
+        self,
+        window: int = 1000,
+        refit_every: int = 10,
+        min_samples: int = 20,
+        prior_strength: float = 0.1,
+        newton_steps: int = 5
+    ):
+        """
+        Initialize the calibrator.
+
+        Args:
+            window: Number of most recent (automated, human) pairs fitted
+            refit_every: Number of updates between refits
+            min_samples: Number of pairs before the calibrator reports itself
+                as fitted
+            prior_strength: L2 weight pulling the parameters to the identity map
+            newton_steps: Newton iterations per refit
+        """
+        self.window = window
+        self.refit_every = max(1, refit_every)
+        self.min_samples = min_samples
+        self.prior_strength = prior_strength
+        self.newton_steps = newton_steps
+        self.params = _IDENTITY_PRIOR.copy()
+        self.covariance = np.eye(2) / prior_strength
+        self.residual_variance = 0.0
+        self.num_updates = 0
+        self._auto = np.zeros(window)
+        self._human = np.zeros(window)
+        self._size = 0
+        self._position = 0
+
+    @property
+    def is_fitted(self) -> bool:
+        return self._size >= self.min_samples
+
+    def update(self, auto_score: float, human_score: float) -> None:
+        """Add an observed pair of automated and human scores."""
+        human_score = min(max(float(human_score), 0.0), 1.0)
+        self._auto[self._position] = auto_score
+        self._human[self._position] = human_score
+        self._position = (self._position + 1) % self.window
+        self._size = min(self._size + 1, self.window)
+        self.num_updates += 1
+        if self.num_updates % self.refit_every == 0:
+            self.fit()
+
+    def update_many(self, auto_scores: Any, human_scores: Any) -> None:
+        """Add many pairs at once and refit."""
+        auto_scores = np.asarray(auto_scores, dtype=np.float64)[-self.window:]
+        human_scores = np.clip(np.asarray(human_scores, dtype=np.float64)[-self.window:], 0.0, 1.0)
+        for auto_score, human_score in zip(auto_scores, human_scores):
+            self._auto[self._position] = auto_score
+            self._human[self._position] = human_score
+            self._position = (self._position + 1) % self.window
+            self._size = min(self._size + 1, self.window)
+        self.num_updates += len(auto_scores)
+        self.fit()
+
+    def fit(self) -> None:
+        """Refit the parameters on the current window."""
+        if self._size == 0:
+            return
+        x = np.stack([self._auto[:self._size], np.ones(self._size)], axis=1)
+        y = self._human[:self._size]
+        params = self.params
+        penalty = self.prior_strength * np.eye(2)
+        for _ in range(self.newton_steps):
+            p = _sigmoid(x @ params)
+            gradient = x.T @ (p - y) + penalty @ (params - _IDENTITY_PRIOR)
+            hessian = (x * (p * (1.0 - p))[:, None]).T @ x + penalty
+            params = params - np.linalg.solve(hessian, gradient)
+        p = _sigmoid(x @ params)
+        hessian = (x * (p * (1.0 - p))[:, None]).T @ x + penalty
+        self.params = params
+        self.covariance = np.linalg.inv(hessian)
+        self.residual_variance = float(np.mean((y - p) ** 2))
+
+    def predict(self, auto_score: float) -> float:
+        """Expected human score for an automated score."""
+        return float(_sigmoid(self.params[0] * auto_score + self.params[1]))
+
+    def uncertainty(self, auto_score: float) -> float:
+        """
+        Standard deviation of the human score expected for ``auto_score``.
+
+        Combines the uncertainty of the fitted mapping with the residual
+        spread of human scores around it.
+        """
+        features = np.array([auto_score, 1.0])
+        p = self.predict(auto_score)
+        logit_variance = float(features @ self.covariance @ features)
+        mapping_variance = (p * (1.0 - p)) ** 2 * logit_variance
+        return math.sqrt(mapping_variance + self.residual_variance)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get the fitted parameters and the residual statistics."""
+        return {
+            "slope": float(self.params[0]),
+            "intercept": float(self.params[1]),
+            "num_samples": self._size,
+            "num_updates": self.num_updates,
+            "is_fitted": self.is_fitted,
+            "residual_std": math.sqrt(self.residual_variance)
+        }
+
+
+def _sigmoid(z: Any) -> Any:
+    return 1.0 / (1.0 + np.exp(-z))
@@ -2,10 +2,21 @@
 Implementation of the ExpertFeedback system for human-AI co-construction.
 """
 
-from typing import Dict, Any, Optional, List, Callable
+from typing import Dict, Any, Optional, List, Callable, Union
+from concurrent.futures import Future
 from dataclasses import dataclass
+import asyncio
+import concurrent.futures
+import threading
 import numpy as np
 
+from ..cache import LRUCache
+from ..stats import RunningStats
+from .calibration import OnlineCalibrator
+from .feedback_history import FeedbackHistory
+from .feedback_log import FeedbackLog
+from .review_queue import ReviewQueue, review_key
+
 @dataclass
 class Feedback:
     """Represents feedback from an expert."""
@@ -24,7 +35,17 @@ class ExpertFeedback:
         self,
         feedback_strategy: str = "active",
         feedback_threshold: float = 0.7,
-        custom_evaluator: Optional[Callable] = None
+        custom_evaluator: Optional[Callable] = None,
+        review_queue: Optional[ReviewQueue] = None,
+        batch_evaluator: Optional[Callable] = None,
+        cache_size: int = 10000,
+        history_size: int = 10000,
+        history_spill_path: Optional[str] = None,
+        feedback_log: Optional[Union[str, FeedbackLog]] = None,
+        calibrator: Optional[OnlineCalibrator] = None,
+        uncertainty_threshold: float = 0.15,
+        human_noise: float = 0.1,
+        metrics: Any = None
     ):
         """
         Initialize the ExpertFeedback system.
@@ -33,12 +54,60 @@ class ExpertFeedback:
             feedback_strategy: Strategy for collecting feedback ('active', 'passive', or 'hybrid')
             feedback_threshold: Threshold score for requesting human feedback
             custom_evaluator: Optional custom evaluation function
+            review_queue: If set, human feedback is requested asynchronously:
+                ``evaluate`` returns the automated score immediately and the
+                ``Feedback`` is updated in place once a reviewer resolves the
+                thought through this queue
+            batch_evaluator: Optional function scoring a list of thoughts at
+                once and returning one score per thought; preferred over
+                ``custom_evaluator`` by ``evaluate_batch``
+            cache_size: Number of automated scores memoized by thought content
+            history_size: Number of most recent feedback scores kept in memory
+            history_spill_path: Optional file to which feedback scores are
+                appended once they leave the in-memory window; call ``close``
+                (or use the instance as a context manager) to write the last
+                buffered ones
+            feedback_log: Optional ``FeedbackLog`` (or its path) to which all
+                feedback is appended; the statistics are warm-started from
+                the feedback already in it; a log opened from a path is
+                closed by ``close``
+            calibrator: Model learning how automated scores map to human
+                scores; a default ``OnlineCalibrator`` is used if None
+            uncertainty_threshold: Once the calibrator is fitted, 'hybrid'
+                only asks a human about thoughts whose calibrated score is
+                below ``feedback_threshold`` and whose expected human score
+                is more uncertain (standard deviation) than this
+            human_noise: Assumed standard deviation of a human score, used to
+                weigh it against the calibrated automated score
+            metrics: Optional ``MetricsTracker`` receiving evaluation counts
+                and latency, score cache hits and human escalations
         """
         self.feedback_strategy = feedback_strategy
         self.feedback_threshold = feedback_threshold
         self.custom_evaluator = custom_evaluator
-        self.feedback_history: List[Feedback] = []
-        self.learning_rate = 0.1
+        self.feedback_history = FeedbackHistory(history_size, spill_path=history_spill_path)
+        self.review_queue = review_queue
+        self._review_listeners: List[Callable[[Any, Feedback], None]] = []
+        self._outstanding_reviews: set = set()
+        self._review_lock = threading.Lock()
+        # Feedback is recorded from evaluating threads and from the threads
+        # that resolve reviews
+        self._record_lock = threading.Lock()
+        self.batch_evaluator = batch_evaluator
+        self.score_cache = LRUCache(cache_size)
+        self.batch_size_stats = RunningStats()
+        self.evaluator_calls = 0
+        self.calibrator = calibrator if calibrator is not None else OnlineCalibrator()
+        self.uncertainty_threshold = uncertainty_threshold
+        self.human_noise = human_noise
+        self.metrics = metrics
+        # A log opened from a path is owned, and closed, by this instance
+        self._owns_feedback_log = isinstance(feedback_log, str)
+        self.feedback_log: Optional[FeedbackLog] = (
+            FeedbackLog(feedback_log) if isinstance(feedback_log, str) else feedback_log
+        )
+        if self.feedback_log is not None:
+            self._warm_start(self.feedback_log)
         
     def evaluate(self, thought: Any) -> Feedback:
         """
@@ -50,35 +119,243 @@ class ExpertFeedback:
         Returns:
             Feedback object containing the evaluation
         """
+        if self.metrics is None:
+            return self._evaluate([thought])[0]
+        with self.metrics.timer("evaluate_seconds"):
+            return self._evaluate([thought])[0]
+    
+    def evaluate_batch(self, thoughts: List[Any]) -> List[Feedback]:
+        """
+        Evaluate several thoughts, scoring all uncached ones with one evaluator call.
+        
+        Thoughts with identical content are scored once and share the
+        memoized score.
+        
+        Args:
+            thoughts: The thoughts to evaluate
+            
+        Returns:
+            One Feedback object per thought, in order
+        """
+        if self.metrics is None:
+            return self._evaluate(thoughts)
+        with self.metrics.timer("evaluate_seconds"):
+            return self._evaluate(thoughts)
+    
+    def _evaluate(self, thoughts: List[Any]) -> List[Feedback]:
+        """Evaluate thoughts without timing the call."""
+        if self.metrics is not None:
+            self.metrics.increment("evaluations", len(thoughts))
         # First, apply automated evaluation
-        auto_score = self._automated_evaluation(thought)
+        auto_scores = self._automated_scores(thoughts)
+        return [
+            self._feedback_for(thought, auto_score)
+            for thought, auto_score in zip(thoughts, auto_scores)
+        ]
+    
+    def _feedback_for(self, thought: Any, auto_score: float) -> Feedback:
+        """Turn an automated score into feedback, requesting human review if needed."""
+        calibrated = self.calibrator.is_fitted
+        score = self.calibrator.predict(auto_score) if calibrated else auto_score
         
         # Determine if human feedback is needed
-        needs_human_feedback = (
-            self.feedback_strategy == "active" or
-            (self.feedback_strategy == "hybrid" and auto_score < self.feedback_threshold)
-        )
+        if self.feedback_strategy == "active":
+            needs_human_feedback = True
+        elif self.feedback_strategy == "hybrid" and calibrated:
+            needs_human_feedback = (
+                score < self.feedback_threshold and
+                self.calibrator.uncertainty(auto_score) > self.uncertainty_threshold
+            )
+        else:
+            needs_human_feedback = (
+                self.feedback_strategy == "hybrid" and auto_score < self.feedback_threshold
+            )
         
-        if needs_human_feedback:
+        if needs_human_feedback and self.metrics is not None:
+            self.metrics.increment(
+                "human_escalations", labels={"mode": "sync" if self.review_queue is None else "async"}
+            )
+        if needs_human_feedback and self.review_queue is not None:
+            # Recorded once the review is merged
+            return self._request_review(thought, auto_score, score)
+        elif needs_human_feedback:
             human_feedback = self._get_human_feedback(thought)
             # Combine automated and human feedback
             final_score = self._combine_feedback(auto_score, human_feedback.score)
             feedback = human_feedback
+            feedback.metadata.update(auto_score=auto_score, human_score=human_feedback.score)
             feedback.score = final_score
         else:
             feedback = Feedback(
-                score=auto_score,
+                score=score,
                 comments="Automated evaluation",
                 suggestions=[],
-                metadata={"source": "automated"}
+                metadata={"source": "automated", "auto_score": auto_score}
             )
         
-        # Store feedback for learning
-        self.feedback_history.append(feedback)
-        self._update_evaluation_model(feedback)
+        self._record(feedback)
+        return feedback
+    
+    def _record(self, feedback: Feedback) -> None:
+        """Store final feedback for learning."""
+        with self._record_lock:
+            self.feedback_history.append(feedback)
+            if self.feedback_log is not None:
+                self.feedback_log.append(feedback)
+            self._update_evaluation_model(feedback)
+    
+    def _warm_start(self, feedback_log: FeedbackLog) -> None:
+        """Load the statistics of the feedback recorded in a log."""
+        records = feedback_log.records()
+        if not len(records):
+            return
+        self.feedback_history.extend(
+            records["score"],
+            np.char.decode(records["source"], "utf-8"),
+            records["timestamp"]
+        )
+        pairs = np.isfinite(records["auto_score"]) & np.isfinite(records["human_score"])
+        if pairs.any():
+            self.calibrator.update_many(records["auto_score"][pairs], records["human_score"][pairs])
+    
+    def add_review_listener(self, listener: Callable[[Any, Feedback], None]) -> None:
+        """
+        Register a function called with ``(thought, feedback)`` whenever a human
+        review is merged into a previously returned ``Feedback``.
+        
+        Use it to push the updated score into other components, e.g.
+        ``AdaptiveBeamSearch.update_score``. Listeners run on the thread that
+        resolved the review.
+        """
+        self._review_listeners.append(listener)
+    
+    def remove_review_listener(self, listener: Callable[[Any, Feedback], None]) -> None:
+        """Unregister a listener added with ``add_review_listener``."""
+        self._review_listeners.remove(listener)
+    
+    def wait_for_reviews(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until all outstanding reviews are merged.
         
+        Returns:
+            True if no review is outstanding any more
+        """
+        with self._review_lock:
+            futures = list(self._outstanding_reviews)
+        _, not_done = concurrent.futures.wait(futures, timeout=timeout)
+        return not not_done
+    
+    async def await_reviews(self, timeout: Optional[float] = None) -> bool:
+        """
+        Asynchronous variant of ``wait_for_reviews``.
+        
+        Returns:
+            True if no review is outstanding any more
+        """
+        with self._review_lock:
+            futures = [asyncio.wrap_future(f) for f in self._outstanding_reviews]
+        if not futures:
+            return True
+        _, pending = await asyncio.wait(futures, timeout=timeout)
+        return not pending
+    
+    def _request_review(self, thought: Any, auto_score: float, score: float) -> Feedback:
+        """Queue a thought for human review and return its provisional feedback."""
+        feedback = Feedback(
+            score=score,
+            comments="Automated evaluation, human review pending",
+            suggestions=[],
+            metadata={"source": "automated", "review": "pending", "auto_score": auto_score}
+        )
+        future = self.review_queue.submit(thought, auto_score)
+        if future is None:
+            feedback.metadata["review"] = "dropped"
+            self._record(feedback)
+            return feedback
+        
+        with self._review_lock:
+            self._outstanding_reviews.add(future)
+        future.add_done_callback(
+            lambda done: self._merge_review(thought, feedback, auto_score, done)
+        )
         return feedback
     
+    def _merge_review(
+        self,
+        thought: Any,
+        feedback: Feedback,
+        auto_score: float,
+        future: Future
+    ) -> None:
+        """Fold a finished human review into the provisional feedback."""
+        with self._review_lock:
+            self._outstanding_reviews.discard(future)
+        if future.cancelled() or future.exception() is not None:
+            feedback.metadata["review"] = "failed"
+            self._record(feedback)
+            return
+        
+        human_feedback = future.result()
+        feedback.score = self._combine_feedback(auto_score, human_feedback.score)
+        feedback.comments = human_feedback.comments
+        feedback.suggestions = list(human_feedback.suggestions)
+        feedback.metadata.update(human_feedback.metadata)
+        feedback.metadata.update(
+            source="human", review="done", auto_score=auto_score, human_score=human_feedback.score
+        )
+        self._record(feedback)
+        
+        for listener in list(self._review_listeners):
+            listener(thought, feedback)
+    
+    def _automated_scores(self, thoughts: List[Any]) -> List[float]:
+        """
+        Automated scores of ``thoughts``, only evaluating content not in the cache.
+        
+        Missing thoughts go to ``batch_evaluator`` in a single call if it is
+        set, otherwise to ``_automated_evaluation`` one at a time.
+        """
+        keys = [review_key(thought) for thought in thoughts]
+        scores = [self.score_cache.get(key) for key in keys]
+        
+        # Content key -> thought to score, then -> its computed score
+        missing: Dict[bytes, Any] = {}
+        for key, thought, score in zip(keys, thoughts, scores):
+            if score is None and key not in missing:
+                missing[key] = thought
+        if self.metrics is not None:
+            self.metrics.increment("cache_hits", len(thoughts) - len(missing), {"cache": "feedback_score"})
+            self.metrics.increment("cache_misses", len(missing), {"cache": "feedback_score"})
+        if missing:
+            batch = list(missing.values())
+            if self.batch_evaluator is not None:
+                computed = np.asarray(self.batch_evaluator(batch), dtype=np.float64).reshape(-1)
+                if computed.shape[0] != len(batch):
+                    raise ValueError(
+                        f"batch_evaluator returned {computed.shape[0]} scores for {len(batch)} thoughts"
+                    )
+                self.evaluator_calls += 1
+            else:
+                computed = [self._automated_evaluation(thought) for thought in batch]
+                self.evaluator_calls += len(batch)
+            self.batch_size_stats.update(len(batch))
+            for key, score in zip(list(missing), computed):
+                missing[key] = float(score)
+                self.score_cache.put(key, float(score))
+        
+        return [
+            score if score is not None else missing[key]
+            for key, score in zip(keys, scores)
+        ]
+    
+    def get_cache_statistics(self) -> Dict[str, Any]:
+        """Get hit/miss counters of the score cache and evaluator batch sizes."""
+        stats = self.score_cache.get_statistics()
+        stats["evaluator_calls"] = self.evaluator_calls
+        stats["num_batches"] = self.batch_size_stats.count
+        stats["batch_size"] = self.batch_size_stats.to_dict()
+        return stats
+    
     def _automated_evaluation(self, thought: Any) -> float:
         """Perform automated evaluation of a thought."""
         if self.custom_evaluator:
@@ -106,27 +383,49 @@ class ExpertFeedback:
         )
     
     def _combine_feedback(self, auto_score: float, human_score: float) -> float:
-        """Combine automated and human feedback scores."""
-        # Simple weighted average - could be more sophisticated
-        return 0.3 * auto_score + 0.7 * human_score
+        """
+        Combine automated and human feedback scores.
+        
+        Until the calibrator is fitted this is a fixed weighted average.
+        Afterwards the calibrated automated score and the human score are
+        weighted by their inverse variances, so the automated score only
+        counts where it predicts human scores well.
+        """
+        if not self.calibrator.is_fitted:
+            return 0.3 * auto_score + 0.7 * human_score
+        
+        auto_variance = self.calibrator.uncertainty(auto_score) ** 2
+        human_variance = self.human_noise ** 2
+        auto_weight = human_variance / (human_variance + auto_variance)
+        return auto_weight * self.calibrator.predict(auto_score) + (1.0 - auto_weight) * human_score
     
     def _update_evaluation_model(self, feedback: Feedback) -> None:
-        """Update the evaluation model based on feedback."""
-        if len(self.feedback_history) > 100:
-            # Implement learning from feedback history
-            # This is a placeholder for actual model updating logic
-            self.learning_rate *= 0.95  # Decay learning rate
-            
+        """Update the calibrator with the scores a human review was based on."""
+        auto_score = feedback.metadata.get("auto_score")
+        human_score = feedback.metadata.get("human_score")
+        if auto_score is not None and human_score is not None:
+            self.calibrator.update(auto_score, human_score)
+    
+    def close(self) -> None:
+        """
+        Write the feedback evicted from the history window to its spill file
+        and close the feedback log if it was opened from a path.
+        """
+        with self._record_lock:
+            self.feedback_history.flush()
+            if self._owns_feedback_log and self.feedback_log is not None:
+                self.feedback_log.close()
+    
+    def __enter__(self) -> "ExpertFeedback":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
     def get_feedback_statistics(self) -> Dict[str, Any]:
-        """Get statistics about the feedback history."""
-        if not self.feedback_history:
-            return {}
-            
-        scores = [f.score for f in self.feedback_history]
-        return {
-            "mean_score": np.mean(scores),
-            "std_score": np.std(scores),
-            "num_feedback": len(self.feedback_history),
-            "human_feedback_ratio": sum(1 for f in self.feedback_history 
-                                     if f.metadata.get("source") == "human") / len(self.feedback_history)
-        } 
\ No newline at end of file
+        """Get statistics about the feedback history; O(1) in its length."""
+        with self._record_lock:
+            stats = self.feedback_history.get_statistics()
+            if stats:
+                stats["calibration"] = self.calibrator.get_statistics()
+        return stats 
\ No newline at end of file
@@ -0,0 +1,198 @@
+"""
+Bounded columnar history of feedback scores with running statistics.
+"""
+
+from typing import Any, Dict, List, Optional
+import os
+import time
+
+import numpy as np
+
+from ..stats import RunningStats
+
+SPILL_DTYPE = np.dtype([("timestamp", "<f8"), ("score", "<f8"), ("source", "S16")])
+
+
+class FeedbackHistory:
+    """
+    Ring buffer of the most recent feedback, stored as NumPy columns.
+
+    Only the last ``capacity`` entries are kept in memory. Statistics over the
+    whole stream (count, mean, std, per-source counts) are maintained
+    incrementally, so reading them is O(1) regardless of how much feedback
+    was recorded. Entries that fall out of the window can optionally be
+    appended to a binary spill file with dtype ``SPILL_DTYPE``, which
+    ``load_spilled`` reads back with ``np.fromfile``. Spilled entries carry
+    their source name (UTF-8, truncated to 16 bytes) rather than an in-memory
+    code, so the file stays readable across restarts and can be appended to
+    by several processes.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 10000,
+        spill_path: Optional[str] = None,
+        spill_chunk: int = 1024
+    ):
+        """
+        Initialize the history.
+
+        Args:
+            capacity: Number of most recent entries kept in memory
+            spill_path: Optional file to which evicted entries are appended
+            spill_chunk: Number of evicted entries buffered before a write
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.spill_path = spill_path
+        self.spill_chunk = spill_chunk
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.scores = np.zeros(capacity, dtype=np.float64)
+        self.source_codes = np.zeros(capacity, dtype=np.int16)
+        self.source_names: List[str] = []
+        self.score_stats = RunningStats()
+        self.source_counts: Dict[str, int] = {}
+        self.num_spilled = 0
+        self._codes: Dict[str, int] = {}
+        self._position = 0
+        self._size = 0
+        self._spill_buffer = np.zeros(spill_chunk, dtype=SPILL_DTYPE)
+        self._spill_size = 0
+
+    def __len__(self) -> int:
+        """Number of entries currently in the window."""
+        return self._size
+
+    @property
+    def total(self) -> int:
+        """Number of entries ever recorded."""
+        return self.score_stats.count
+
+    def append(self, feedback: Any, timestamp: Optional[float] = None) -> None:
+        """
+        Record a ``Feedback``.
+
+        Args:
+            feedback: Object with ``score`` and ``metadata["source"]``
+            timestamp: Time of the feedback; defaults to now
+        """
+        source = feedback.metadata.get("source", "unknown")
+        self.record(feedback.score, source, timestamp)
+
+    def record(self, score: float, source: str, timestamp: Optional[float] = None) -> None:
+        """Record a score from ``source``."""
+        self._store(score, source, time.time() if timestamp is None else timestamp)
+        self.score_stats.update(score)
+        self.source_counts[source] = self.source_counts.get(source, 0) + 1
+
+    def _store(self, score: float, source: str, timestamp: float) -> None:
+        """Write an entry into the window, spilling the one it replaces."""
+        code = self._codes.get(source)
+        if code is None:
+            code = self._codes[source] = len(self.source_names)
+            self.source_names.append(source)
+
+        i = self._position
+        if self._size == self.capacity and self.spill_path is not None:
+            self._spill(i)
+        self.timestamps[i] = timestamp
+        self.scores[i] = score
+        self.source_codes[i] = code
+        self._position = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def extend(self, scores: Any, sources: Any, timestamps: Any) -> None:
+        """
+        Record many entries at once, oldest first, e.g. when warm-starting from
+        a feedback log. Only the last ``capacity`` are copied into the window.
+
+        Args:
+            scores: Array of scores
+            sources: Sequence of source names, one per score
+            timestamps: Array of timestamps, one per score
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        if not len(scores):
+            return
+        names, inverse = np.unique(np.asarray(sources), return_inverse=True)
+        names = [str(name) for name in names]
+        for name, count in zip(names, np.bincount(inverse, minlength=len(names))):
+            self.source_counts[name] = self.source_counts.get(name, 0) + int(count)
+        self.score_stats.merge(RunningStats.from_moments(
+            len(scores), scores.mean(), scores.var(), scores.min(), scores.max()
+        ))
+
+        # Entries that would be evicted right away skip the window
+        tail = slice(max(0, len(scores) - self.capacity), None)
+        for score, code, timestamp in zip(
+            scores[tail], inverse[tail], np.asarray(timestamps, dtype=np.float64)[tail]
+        ):
+            self._store(score, names[code], timestamp)
+
+    def window(self) -> Dict[str, np.ndarray]:
+        """
+        Copy of the entries in the window, oldest first.
+
+        Returns:
+            Dict with 'timestamp', 'score' and 'source' (code) arrays; codes
+            index ``source_names``
+        """
+        if self._size < self.capacity:
+            order = np.arange(self._size)
+        else:
+            order = np.roll(np.arange(self.capacity), -self._position)
+        return {
+            "timestamp": self.timestamps[order],
+            "score": self.scores[order],
+            "source": self.source_codes[order]
+        }
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get running statistics over all recorded feedback in O(1)."""
+        if not self.total:
+            return {}
+        human = self.source_counts.get("human", 0)
+        return {
+            "mean_score": self.score_stats.mean,
+            "std_score": self.score_stats.std,
+            "num_feedback": self.total,
+            "human_feedback_ratio": human / self.total,
+            "source_counts": dict(self.source_counts),
+            "window_size": self._size,
+            "num_spilled": self.num_spilled + self._spill_size
+        }
+
+    def flush(self) -> None:
+        """Write buffered evicted entries to the spill file."""
+        if self._spill_size == 0 or self.spill_path is None:
+            return
+        with open(self.spill_path, "ab") as f:
+            self._spill_buffer[:self._spill_size].tofile(f)
+        self.num_spilled += self._spill_size
+        self._spill_size = 0
+
+    def load_spilled(self) -> np.ndarray:
+        """Read every spilled entry back as a structured array of ``SPILL_DTYPE``."""
+        self.flush()
+        if self.spill_path is None or not os.path.exists(self.spill_path):
+            return np.zeros(0, dtype=SPILL_DTYPE)
+        return np.fromfile(self.spill_path, dtype=SPILL_DTYPE)
+
+    def clear(self) -> None:
+        """Forget the window and the running statistics; spilled entries are kept."""
+        self.flush()
+        self._position = 0
+        self._size = 0
+        self.score_stats.reset()
+        self.source_counts = {}
+
+    def _spill(self, i: int) -> None:
+        """Buffer the entry at slot ``i`` before it is overwritten."""
+        source = self.source_names[self.source_codes[i]]
+        self._spill_buffer[self._spill_size] = (
+            self.timestamps[i], self.scores[i], source.encode("utf-8")[:16]
+        )
+        self._spill_size += 1
+        if self._spill_size == self.spill_chunk:
+            self.flush()
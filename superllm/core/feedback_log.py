@@ -0,0 +1,141 @@
+"""
+Append-only on-disk log of expert feedback shared between processes.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional, Tuple
+import json
+import os
+import time
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("score", "<f8"),
+    ("auto_score", "<f8"),
+    ("human_score", "<f8"),
+    ("source", "S16"),
+    ("text_offset", "<u8"),
+    ("text_length", "<u4")
+])
+
+
+class FeedbackLog:
+    """
+    Append-only feedback log made of two files.
+
+    ``path`` holds fixed-width records of ``RECORD_DTYPE``: timestamp, final
+    score, the automated and human scores it was combined from (NaN when
+    absent) and the source. Comments and suggestions are variable-length, so
+    they go to the side file ``path + '.text'`` as JSON, and each record
+    stores their offset and length there.
+
+    Several processes can append to the same log: every append holds an
+    exclusive ``flock`` on the record file while it writes both files.
+    Readers map the record file with ``np.memmap`` and only see complete
+    records.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the log, creating its files if needed.
+
+        Args:
+            path: Path of the record file
+        """
+        self.path = path
+        self.text_path = path + ".text"
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._records = open(path, "ab")
+        self._text = open(self.text_path, "ab")
+
+    def __len__(self) -> int:
+        return os.path.getsize(self.path) // RECORD_DTYPE.itemsize
+
+    def append(self, feedback: Any, timestamp: Optional[float] = None) -> int:
+        """
+        Append a ``Feedback`` to the log.
+
+        Args:
+            feedback: The feedback to store
+            timestamp: Time of the feedback; defaults to now
+
+        Returns:
+            Index of the new record
+        """
+        text = json.dumps({
+            "comments": feedback.comments,
+            "suggestions": list(feedback.suggestions)
+        }).encode("utf-8")
+        record = np.zeros(1, dtype=RECORD_DTYPE)
+        record["timestamp"] = time.time() if timestamp is None else timestamp
+        record["score"] = feedback.score
+        record["auto_score"] = feedback.metadata.get("auto_score", np.nan)
+        record["human_score"] = feedback.metadata.get("human_score", np.nan)
+        record["source"] = str(feedback.metadata.get("source", "unknown")).encode("utf-8")[:16]
+        record["text_length"] = len(text)
+
+        with self._locked():
+            # Offsets are only stable while the lock is held
+            self._text.seek(0, os.SEEK_END)
+            record["text_offset"] = self._text.tell()
+            self._text.write(text)
+            self._text.flush()
+            self._records.seek(0, os.SEEK_END)
+            index = self._records.tell() // RECORD_DTYPE.itemsize
+            self._records.write(record.tobytes())
+            self._records.flush()
+        return index
+
+    def records(self) -> np.ndarray:
+        """
+        Map the complete records of the log without copying them.
+
+        Returns:
+            A read-only structured array of ``RECORD_DTYPE``
+        """
+        count = len(self)
+        if count == 0:
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        return np.memmap(self.path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+
+    def text(self, index: int) -> Tuple[str, List[str]]:
+        """
+        Read the comments and suggestions of a record.
+
+        Returns:
+            Tuple of (comments, suggestions)
+        """
+        record = self.records()[index]
+        with open(self.text_path, "rb") as f:
+            f.seek(int(record["text_offset"]))
+            data = json.loads(f.read(int(record["text_length"])).decode("utf-8"))
+        return data["comments"], data["suggestions"]
+
+    def iter_records(self, start: int = 0) -> Iterator[Tuple[int, np.void]]:
+        """Iterate over ``(index, record)`` pairs from ``start``."""
+        records = self.records()
+        for index in range(start, len(records)):
+            yield index, records[index]
+
+    def close(self) -> None:
+        self._records.close()
+        self._text.close()
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._records.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._records.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,420 @@
+"""
+Batched text generation helpers shared by the reasoning components.
+"""
+
+from typing import Any, Dict, List, Sequence, Tuple
+import copy
+import math
+import time
+
+
+def generate_continuations(
+    model: Any,
+    tokenizer: Any,
+    contexts: Sequence[str],
+    num_return_sequences: int = 1,
+    temperature: float = 0.7,
+    max_new_tokens: int = 64,
+    batch_size: int = 8,
+    metrics: Any = None,
+    strip: bool = True,
+    **generate_kwargs
+) -> List[List[Tuple[str, float]]]:
+    """
+    Sample continuations for many contexts with as few ``generate`` calls as possible.
+
+    Contexts are tokenized together with left padding and every context gets
+    ``num_return_sequences`` samples from the same forward pass. Without
+    sampling, beam search returns the most likely distinct continuations
+    instead of repeating the greedy one.
+
+    Args:
+        model: A causal language model exposing ``generate``
+        tokenizer: The tokenizer for the model
+        contexts: Prompts to continue
+        num_return_sequences: Number of continuations per context
+        temperature: Sampling temperature; 0 selects beam search with one
+            beam per returned sequence, i.e. greedy decoding for one
+        max_new_tokens: Maximum number of tokens per continuation
+        batch_size: Maximum number of contexts per ``generate`` call
+        metrics: Optional ``MetricsTracker`` receiving model calls, generated
+            tokens and generation latency
+        strip: Strip surrounding whitespace from the continuations
+        **generate_kwargs: Extra arguments forwarded to ``model.generate``
+
+    Returns:
+        For every context, a list of ``(text, score)`` pairs where the score is
+        the geometric mean token probability of the continuation
+    """
+    import torch
+
+    results: List[List[Tuple[str, float]]] = []
+    if not contexts:
+        return results
+
+    batch_size = max(1, batch_size)
+    do_sample = temperature > 0
+    pad_token_id = _ensure_pad_token(tokenizer)
+    padding_side = getattr(tokenizer, "padding_side", None)
+    tokenizer.padding_side = "left"
+    try:
+        for start in range(0, len(contexts), batch_size):
+            chunk = list(contexts[start:start + batch_size])
+            inputs = tokenizer(chunk, return_tensors="pt", padding=True)
+            inputs = _to_device(inputs, getattr(model, "device", None))
+
+            start_time = time.perf_counter()
+            with torch.no_grad():
+                output = model.generate(
+                    **inputs,
+                    do_sample=do_sample,
+                    temperature=temperature if do_sample else None,
+                    num_beams=1 if do_sample else num_return_sequences,
+                    num_return_sequences=num_return_sequences,
+                    max_new_tokens=max_new_tokens,
+                    pad_token_id=pad_token_id,
+                    return_dict_in_generate=True,
+                    output_scores=True,
+                    **generate_kwargs
+                )
+
+            prompt_length = inputs["input_ids"].shape[1]
+            new_tokens = output.sequences[:, prompt_length:]
+            if metrics is not None:
+                _record_generation(metrics, start_time, new_tokens, pad_token_id)
+            scores = sequence_scores(model, output, new_tokens, pad_token_id)
+            texts = tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+
+            for i in range(len(chunk)):
+                rows = range(i * num_return_sequences, (i + 1) * num_return_sequences)
+                results.append([
+                    (texts[r].strip() if strip else texts[r], scores[r]) for r in rows
+                ])
+    finally:
+        if padding_side is not None:
+            tokenizer.padding_side = padding_side
+
+    return results
+
+
+def prefill(
+    model: Any,
+    token_ids: Sequence[int],
+    past_key_values: Any = None,
+    metrics: Any = None
+) -> Any:
+    """
+    Run the model over ``token_ids`` and return the resulting ``past_key_values``.
+
+    If ``past_key_values`` is given it must cover the tokens preceding
+    ``token_ids``; it is not modified. The tensors of a dynamic cache are
+    shared with the returned cache rather than copied; other caches are
+    deep-copied. Model calls and prefilled tokens are reported to
+    ``metrics`` if given.
+    """
+    import torch
+
+    if not token_ids:
+        return _share_cache(past_key_values)
+    device = getattr(model, "device", None)
+    input_ids = torch.tensor([list(token_ids)], dtype=torch.long, device=device)
+    start_time = time.perf_counter()
+    with torch.no_grad():
+        output = model(
+            input_ids=input_ids,
+            past_key_values=_share_cache(past_key_values),
+            use_cache=True
+        )
+    if metrics is not None:
+        metrics.increment("model_calls", labels={"kind": "prefill"})
+        metrics.increment("tokens_prefilled", len(token_ids))
+        metrics.observe("model_call_seconds", time.perf_counter() - start_time, {"kind": "prefill"})
+    return output.past_key_values
+
+
+def generate_from_prefix(
+    model: Any,
+    tokenizer: Any,
+    token_ids: Sequence[int],
+    past_key_values: Any,
+    num_return_sequences: int = 1,
+    temperature: float = 0.7,
+    max_new_tokens: int = 64,
+    metrics: Any = None,
+    **generate_kwargs
+) -> List[Tuple[str, float]]:
+    """
+    Sample continuations of ``token_ids`` reusing a cached prefix.
+
+    Args:
+        model: A causal language model exposing ``generate``
+        tokenizer: The tokenizer for the model
+        token_ids: Token ids of the full context
+        past_key_values: Cached keys/values for ``token_ids[:-1]``, or None
+        num_return_sequences: Number of continuations
+        temperature: Sampling temperature; 0 selects greedy decoding
+        max_new_tokens: Maximum number of tokens per continuation
+        metrics: Optional ``MetricsTracker`` as in ``generate_continuations``
+        **generate_kwargs: Extra arguments forwarded to ``model.generate``
+
+    Returns:
+        List of ``(text, score)`` pairs as in ``generate_continuations``
+    """
+    return generate_from_prefixes(
+        model, tokenizer, [token_ids], [past_key_values], num_return_sequences,
+        temperature, max_new_tokens, metrics, **generate_kwargs
+    )[0]
+
+
+def generate_from_prefixes(
+    model: Any,
+    tokenizer: Any,
+    token_ids: Sequence[Sequence[int]],
+    past_key_values: Sequence[Any],
+    num_return_sequences: int = 1,
+    temperature: float = 0.7,
+    max_new_tokens: int = 64,
+    metrics: Any = None,
+    **generate_kwargs
+) -> List[List[Tuple[str, float]]]:
+    """
+    Sample continuations of several contexts of equal length in one ``generate`` call.
+
+    The caches of the contexts are repeated ``num_return_sequences`` times and
+    concatenated along the batch dimension; they are not modified. Either
+    every cache is None or every cache covers all but the last token of its
+    context. As in ``generate_continuations``, a temperature of 0 selects
+    beam search so that the continuations are distinct.
+
+    Args:
+        token_ids: Token ids of each context; all of the same length
+        past_key_values: Cached keys/values for each context, or Nones
+
+    Other arguments and the return value are as in ``generate_from_prefix``,
+    with one list of ``(text, score)`` pairs per context.
+    """
+    import torch
+
+    if len({len(ids) for ids in token_ids}) > 1:
+        raise ValueError("generate_from_prefixes needs contexts of equal token length")
+    pad_token_id = _ensure_pad_token(tokenizer)
+    device = getattr(model, "device", None)
+    input_ids = torch.tensor([list(ids) for ids in token_ids], dtype=torch.long, device=device)
+    if temperature > 0:
+        input_ids = input_ids.repeat_interleave(num_return_sequences, dim=0)
+    else:
+        # generate expands the inputs to one row per beam, but not a given cache
+        generate_kwargs.update(num_beams=num_return_sequences, num_return_sequences=num_return_sequences)
+    if past_key_values[0] is not None:
+        generate_kwargs["past_key_values"] = _batch_caches(past_key_values, num_return_sequences)
+
+    start_time = time.perf_counter()
+    with torch.no_grad():
+        output = model.generate(
+            input_ids=input_ids,
+            attention_mask=torch.ones_like(input_ids),
+            do_sample=temperature > 0,
+            temperature=temperature if temperature > 0 else None,
+            max_new_tokens=max_new_tokens,
+            pad_token_id=pad_token_id,
+            return_dict_in_generate=True,
+            output_scores=True,
+            **generate_kwargs
+        )
+
+    new_tokens = output.sequences[:, input_ids.shape[1]:]
+    if metrics is not None:
+        _record_generation(metrics, start_time, new_tokens, pad_token_id)
+    scores = sequence_scores(model, output, new_tokens, pad_token_id)
+    texts = tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+    return [
+        [
+            (texts[r].strip(), scores[r])
+            for r in range(i * num_return_sequences, (i + 1) * num_return_sequences)
+        ]
+        for i in range(len(token_ids))
+    ]
+
+
+def token_logprobs(
+    model: Any,
+    sequences: Sequence[Sequence[int]],
+    starts: Sequence[int],
+    batch_size: int = 8,
+    pad_token_id: int = 0,
+    metrics: Any = None
+) -> List[List[float]]:
+    """
+    Score given token sequences with a single forward pass per batch.
+
+    Args:
+        model: A causal language model
+        sequences: Token ids of each context followed by its continuation
+        starts: Index of the first continuation token in each sequence; at
+            least 1, since the first token has no prediction
+        batch_size: Maximum number of sequences per forward pass
+        pad_token_id: Token id used to right-pad the batch
+        metrics: Optional ``MetricsTracker`` receiving model calls, scored
+            tokens and latency
+
+    Returns:
+        For every sequence, the log-probabilities the model assigns to each of
+        its continuation tokens
+    """
+    import torch
+
+    if any(first < 1 for first in starts):
+        raise ValueError("Every start must be at least 1; the first token has no prediction")
+    results: List[List[float]] = []
+    device = getattr(model, "device", None)
+    batch_size = max(1, batch_size)
+    for start in range(0, len(sequences), batch_size):
+        chunk = [list(ids) for ids in sequences[start:start + batch_size]]
+        chunk_starts = starts[start:start + batch_size]
+        width = max(len(ids) for ids in chunk)
+        input_ids = torch.full((len(chunk), width), pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(chunk), width), dtype=torch.long)
+        for row, ids in enumerate(chunk):
+            input_ids[row, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+            attention_mask[row, :len(ids)] = 1
+        if device is not None:
+            input_ids = input_ids.to(device)
+            attention_mask = attention_mask.to(device)
+
+        start_time = time.perf_counter()
+        with torch.no_grad():
+            logits = model(input_ids=input_ids, attention_mask=attention_mask).logits
+        log_probs = torch.log_softmax(logits[:, :-1].float(), dim=-1)
+        log_probs = log_probs.gather(-1, input_ids[:, 1:].unsqueeze(-1)).squeeze(-1)
+        for row, (ids, first) in enumerate(zip(chunk, chunk_starts)):
+            results.append(log_probs[row, first - 1:len(ids) - 1].tolist())
+
+        if metrics is not None:
+            metrics.increment("model_calls", labels={"kind": "score"})
+            metrics.increment(
+                "tokens_scored", sum(len(ids) - first for ids, first in zip(chunk, chunk_starts))
+            )
+            metrics.observe("model_call_seconds", time.perf_counter() - start_time, {"kind": "score"})
+    return results
+
+
+def _record_generation(metrics: Any, start_time: float, new_tokens: Any, pad_token_id: int) -> None:
+    """Report one ``generate`` call, its latency and its non-padding tokens."""
+    metrics.increment("model_calls", labels={"kind": "generate"})
+    metrics.increment("tokens_generated", int((new_tokens != pad_token_id).sum()))
+    metrics.observe("model_call_seconds", time.perf_counter() - start_time, {"kind": "generate"})
+
+
+# Cache layers whose update replaces their tensors instead of writing into them
+_CONCATENATING_LAYERS = ("DynamicLayer", "DynamicSlidingWindowLayer")
+
+
+def _grows_by_concatenation(past_key_values: Any) -> bool:
+    """Whether model calls extending ``past_key_values`` leave its tensors untouched."""
+    from transformers import DynamicCache
+
+    if type(past_key_values) is not DynamicCache:
+        return False
+    layers = getattr(past_key_values, "layers", None)
+    if layers is None:
+        # Older versions keep plain per-layer lists of tensors
+        return hasattr(past_key_values, "key_cache")
+    return all(type(layer).__name__ in _CONCATENATING_LAYERS for layer in layers)
+
+
+def _share_cache(past_key_values: Any) -> Any:
+    """
+    Copy a cache so that extending the copy leaves the original intact.
+
+    Dynamic caches grow by concatenation, which replaces their tensors
+    instead of writing into them, so their structure is copied and the
+    cached keys and values are shared. Other caches, e.g. static or
+    quantized ones, write in place and are deep-copied.
+    """
+    if past_key_values is None or isinstance(past_key_values, tuple):
+        return past_key_values
+    if not _grows_by_concatenation(past_key_values):
+        return copy.deepcopy(past_key_values)
+    cache = copy.copy(past_key_values)
+    if hasattr(cache, "layers"):
+        cache.layers = [copy.copy(layer) for layer in past_key_values.layers]
+    else:
+        cache.key_cache = list(past_key_values.key_cache)
+        cache.value_cache = list(past_key_values.value_cache)
+    return cache
+
+
+def _batch_caches(caches: Sequence[Any], repeats: int) -> Any:
+    """Repeat each single-sequence cache and concatenate them along the batch dimension."""
+    import torch
+
+    def merge(tensors):
+        return torch.cat([tensor.repeat_interleave(repeats, dim=0) for tensor in tensors], dim=0)
+
+    first = caches[0]
+    if len(caches) == 1 and repeats == 1:
+        return _share_cache(first)
+    if isinstance(first, tuple):
+        return tuple(
+            tuple(merge([cache[i][j] for cache in caches]) for j in range(len(layer)))
+            for i, layer in enumerate(first)
+        )
+    if not _grows_by_concatenation(first):
+        raise TypeError(f"Cannot batch caches of type {type(first).__name__}")
+    cache = _share_cache(first)
+    if hasattr(cache, "layers"):
+        for i, layer in enumerate(cache.layers):
+            if getattr(layer, "keys", None) is not None:
+                layer.keys = merge([other.layers[i].keys for other in caches])
+                layer.values = merge([other.layers[i].values for other in caches])
+    else:
+        cache.key_cache = [
+            merge([other.key_cache[i] for other in caches]) for i in range(len(first.key_cache))
+        ]
+        cache.value_cache = [
+            merge([other.value_cache[i] for other in caches]) for i in range(len(first.value_cache))
+        ]
+    return cache
+
+
+def sequence_scores(
+    model: Any,
+    output: Any,
+    new_tokens: Any,
+    pad_token_id: int
+) -> List[float]:
+    """Compute the geometric mean token probability of each generated sequence."""
+    import torch
+
+    if not getattr(output, "scores", None):
+        return [0.0] * new_tokens.shape[0]
+
+    # Beam search reorders its rows at every step; beam_indices undo that
+    log_probs = model.compute_transition_scores(
+        output.sequences, output.scores, getattr(output, "beam_indices", None), normalize_logits=True
+    )
+    mask = torch.isfinite(log_probs) & (new_tokens != pad_token_id)
+    log_probs = torch.where(mask, log_probs, torch.zeros_like(log_probs))
+    counts = mask.sum(dim=1)
+
+    scores = []
+    for total, count in zip(log_probs.sum(dim=1).tolist(), counts.tolist()):
+        scores.append(math.exp(total / count) if count else 0.0)
+    return scores
+
+
+def _ensure_pad_token(tokenizer: Any) -> int:
+    """Return the pad token id, falling back to the eos token like most causal LMs."""
+    if getattr(tokenizer, "pad_token_id", None) is None:
+        if getattr(tokenizer, "eos_token", None) is not None:
+            tokenizer.pad_token = tokenizer.eos_token
+    pad_token_id = getattr(tokenizer, "pad_token_id", None)
+    if pad_token_id is None:
+        raise ValueError("Tokenizer must define a pad or eos token for batched generation")
+    return pad_token_id
+
+
+def _to_device(inputs: Dict[str, Any], device: Any) -> Dict[str, Any]:
+    if device is None:
+        return dict(inputs)
+    return {key: value.to(device) for key, value in inputs.items()}
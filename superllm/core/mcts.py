@@ -0,0 +1,234 @@
+"""
+Monte Carlo Tree Search solver for ThoughtTree.
+"""
+
+from typing import Any, Dict, List, TYPE_CHECKING
+import math
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .thought_tree import ThoughtTree
+
+
+class MCTSSolver:
+    """
+    Spend a fixed expansion budget on the most promising subtrees of a ThoughtTree.
+
+    Every simulation selects a path from the root with UCT or PUCT, expands the
+    leaf it reaches, evaluates the new children and backs the value up the
+    path. Simulations are run in groups of ``parallel_simulations``: virtual
+    loss spreads the selections of a group over different leaves, and all of
+    their expansions and evaluations share one model and scorer call.
+
+    The budget is counted in expansions. A selection that reaches a leaf
+    already chosen by its group is discarded and selection is repeated, and
+    one that reaches a terminal leaf is backed up at no cost, so every
+    simulation charged to the budget expands a distinct node.
+    """
+
+    def __init__(
+        self,
+        tree: "ThoughtTree",
+        num_simulations: int = 32,
+        exploration_constant: float = 1.4,
+        selection_rule: str = "puct",
+        parallel_simulations: int = 4,
+        virtual_loss: float = 1.0
+    ):
+        """
+        Initialize the solver.
+
+        Args:
+            tree: The ThoughtTree whose store, model and evaluators are used
+            num_simulations: Number of simulations, i.e. node expansions, to run
+            exploration_constant: Exploration weight ``c`` in the selection rule
+            selection_rule: 'uct' or 'puct' (priors from the thought scores)
+            parallel_simulations: Number of simulations selected before their
+                leaves are expanded together in one batch
+            virtual_loss: Visits temporarily added along a selected path so
+                that concurrent selections prefer other paths
+        """
+        if selection_rule not in ("uct", "puct"):
+            raise ValueError(f"Unknown selection rule '{selection_rule}', expected 'uct' or 'puct'")
+        self.tree = tree
+        self.num_simulations = num_simulations
+        self.exploration_constant = exploration_constant
+        self.selection_rule = selection_rule
+        self.parallel_simulations = max(1, parallel_simulations)
+        self.virtual_loss = virtual_loss
+        self.visits = np.zeros(64)
+        self.value_sum = np.zeros(64)
+        self.expanded = np.zeros(64, dtype=bool)
+        self.num_batches = 0
+        self.num_expansions = 0
+
+    def run(self, search_algorithm: Any = None, expert_system: Any = None) -> Dict[str, Any]:
+        """
+        Run all simulations on the tree rooted at node 0 and extract the solution.
+
+        Returns:
+            Dict containing the solution and reasoning path
+        """
+        store = self.tree.tree
+        self._grow(len(store))
+
+        remaining = self.num_simulations
+        if remaining > 0 and self._expandable(0):
+            # Every first selection would reach the root, so expand it up front
+            self._expand([0], search_algorithm, expert_system)
+            self._backpropagate([0], self._leaf_value(0))
+            remaining -= 1
+
+        while remaining > 0:
+            group = min(self.parallel_simulations, remaining)
+            paths: List[List[int]] = []
+            leaves: List[int] = []
+            collided: List[List[int]] = []
+            # Bounded, since selection may keep reaching the same leaves
+            for _ in range(4 * group):
+                if len(leaves) == group:
+                    break
+                path = self._select()
+                leaf = path[-1]
+                if leaf in leaves:
+                    # Keep its virtual loss so that the next selection differs
+                    collided.append(path)
+                elif self._expandable(leaf):
+                    leaves.append(leaf)
+                    paths.append(path)
+                else:
+                    # Terminal leaves are evaluated without a model call
+                    self._revert_virtual_loss(path)
+                    self._backpropagate(path, self._leaf_value(leaf))
+            for path in collided:
+                self._revert_virtual_loss(path)
+            if not leaves:
+                break
+
+            # Expand the distinct leaves of the group in one batch
+            self._expand(leaves, search_algorithm, expert_system)
+            remaining -= len(leaves)
+            for path in paths:
+                self._revert_virtual_loss(path)
+                self._backpropagate(path, self._leaf_value(path[-1]))
+
+        self._update_frontier()
+        return self._extract_solution()
+
+    def _expandable(self, node: int) -> bool:
+        return not self.expanded[node] and self.tree.tree.depth(node) < self.tree.max_depth
+
+    def _expand(self, leaves: List[int], search_algorithm: Any, expert_system: Any) -> None:
+        """Expand and evaluate ``leaves`` with one batched call."""
+        self.tree._expand_nodes(leaves, search_algorithm, expert_system)
+        self._grow(len(self.tree.tree))
+        self.expanded[leaves] = True
+        self.num_batches += 1
+        self.num_expansions += len(leaves)
+
+    def _grow(self, size: int) -> None:
+        if size <= len(self.visits):
+            return
+        capacity = len(self.visits)
+        while capacity < size:
+            capacity *= 2
+        for name in ("visits", "value_sum", "expanded"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _select(self) -> List[int]:
+        """Descend from the root to a leaf, applying virtual loss along the way."""
+        store = self.tree.tree
+        node = 0
+        path = [node]
+        self.visits[node] += self.virtual_loss
+        while self.expanded[node]:
+            children = store.children(node)
+            if len(children) == 0:
+                break
+            node = self._best_child(node, children)
+            path.append(node)
+            self.visits[node] += self.virtual_loss
+        return path
+
+    def _best_child(self, node: int, children: Any) -> int:
+        """Pick the child maximizing the UCT or PUCT score."""
+        children = np.asarray(children, dtype=np.int64)
+        visits = self.visits[children]
+        values = np.divide(
+            self.value_sum[children], visits,
+            out=np.zeros(len(children)), where=visits > 0
+        )
+        parent_visits = max(self.visits[node], 1.0)
+
+        if self.selection_rule == "uct":
+            if (visits == 0).any():
+                return int(children[np.argmax(visits == 0)])
+            scores = values + self.exploration_constant * np.sqrt(math.log(parent_visits) / visits)
+        else:
+            priors = self.tree.tree.scores(children)
+            total = priors.sum()
+            priors = priors / total if total > 0 else np.full(len(children), 1.0 / len(children))
+            scores = values + self.exploration_constant * priors * math.sqrt(parent_visits) / (1 + visits)
+        return int(children[np.argmax(scores)])
+
+    def _leaf_value(self, leaf: int) -> float:
+        """
+        Estimate the value of a leaf.
+
+        Expanded leaves are valued by their best evaluated child, a one-step
+        lookahead rather than a full rollout; terminal leaves by their own
+        evaluation.
+        """
+        children = self.tree.tree.children(leaf)
+        if self.expanded[leaf] and len(children):
+            return max(self.tree._node_value(child) for child in children)
+        return self.tree._node_value(leaf)
+
+    def _revert_virtual_loss(self, path: List[int]) -> None:
+        self.visits[path] -= self.virtual_loss
+
+    def _backpropagate(self, path: List[int], value: float) -> None:
+        self.visits[path] += 1
+        self.value_sum[path] += value
+
+    def _update_frontier(self) -> None:
+        """
+        Leave the tree as a breadth-first solve would: unexpanded leaves on the
+        frontier and expanded nodes without children as dead ends, so that a
+        later solve with ``reuse_tree=True`` can continue from it.
+        """
+        store = self.tree.tree
+        frontier, dead_ends = [], []
+        for node in range(len(store)):
+            if not self.expanded[node]:
+                frontier.append(node)
+            elif len(store.children(node)) == 0:
+                dead_ends.append(node)
+        self.tree._frontier = frontier
+        self.tree._dead_ends = dead_ends
+
+    def _extract_solution(self) -> Dict[str, Any]:
+        """Follow the most visited child from the root down to a leaf."""
+        store = self.tree.tree
+        node = 0
+        while True:
+            children = list(store.children(node))
+            if not children:
+                break
+            visits = self.visits[children]
+            if visits.max() > 0:
+                node = children[int(np.argmax(visits))]
+            else:
+                # Children of the last expanded node were only evaluated
+                node = max(children, key=self.tree._node_value)
+
+        path = store.path(node)
+        return {
+            "solution": store.content(node),
+            "reasoning_path": [store.content(n) for n in path],
+            "confidence": self.tree._node_value(node)
+        }
@@ -0,0 +1,118 @@
+"""
+Prefix KV cache shared between a thought and its descendants.
+
+Every thought extends the text of its parent, so the attention keys and values
+computed for a node are a valid prefix for all of its children. The cache maps
+tree node ids to the token ids of the node's context and the model's
+``past_key_values`` for them, evicting least recently used entries once the
+configured byte budget is exceeded.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class CacheEntry:
+    """Cached model state for the context of one tree node."""
+    token_ids: List[int]
+    past_key_values: Any
+    nbytes: int
+
+
+def cache_nbytes(past_key_values: Any) -> int:
+    """Return the number of bytes held by the tensors of a ``past_key_values`` object."""
+    if past_key_values is None:
+        return 0
+    if hasattr(past_key_values, "element_size") and hasattr(past_key_values, "nelement"):
+        return past_key_values.element_size() * past_key_values.nelement()
+    if isinstance(past_key_values, (list, tuple)):
+        return sum(cache_nbytes(item) for item in past_key_values)
+    if hasattr(past_key_values, "layers"):
+        return sum(
+            cache_nbytes(getattr(layer, "keys", None)) + cache_nbytes(getattr(layer, "values", None))
+            for layer in past_key_values.layers
+        )
+    if hasattr(past_key_values, "key_cache"):
+        return cache_nbytes(past_key_values.key_cache) + cache_nbytes(past_key_values.value_cache)
+    return 0
+
+
+class PrefixCache:
+    """
+    LRU cache of per-node ``past_key_values`` bounded by a byte budget.
+    """
+
+    def __init__(self, max_bytes: int = 1 << 30):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Maximum total size of the cached key/value tensors
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, node_id: int) -> bool:
+        return node_id in self._entries
+
+    def get(self, node_id: int) -> Optional[CacheEntry]:
+        """Look up the entry for ``node_id`` and mark it as recently used."""
+        entry = self._entries.get(node_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(node_id)
+        self.hits += 1
+        return entry
+
+    def put(self, node_id: int, token_ids: List[int], past_key_values: Any) -> Optional[CacheEntry]:
+        """
+        Store the model state for ``node_id``.
+
+        Entries larger than the whole budget are not stored.
+
+        Returns:
+            The stored entry, or None if it did not fit
+        """
+        self.pop(node_id)
+        entry = CacheEntry(token_ids, past_key_values, cache_nbytes(past_key_values))
+        if entry.nbytes > self.max_bytes:
+            return None
+        self._entries[node_id] = entry
+        self.nbytes += entry.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
+        return entry
+
+    def pop(self, node_id: int) -> Optional[CacheEntry]:
+        entry = self._entries.pop(node_id, None)
+        if entry is not None:
+            self.nbytes -= entry.nbytes
+        return entry
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.nbytes = 0
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get hit/miss counters and memory usage."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "nbytes": self.nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,222 @@
+"""
+Asynchronous queue of thoughts awaiting human review.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+import threading
+
+from ..cache import LRUCache, stable_hash
+
+
+def review_key(thought: Any) -> bytes:
+    """Content key under which reviews of ``thought`` are deduplicated."""
+    return stable_hash(getattr(thought, "content", thought))
+
+
+@dataclass
+class ReviewRequest:
+    """A thought waiting for a reviewer, with the future its review resolves."""
+    key: bytes
+    thought: Any
+    auto_score: float
+    future: Future = field(default_factory=Future)
+
+
+class ReviewQueue:
+    """
+    Bounded, deduplicated queue between the search and human reviewers.
+
+    Producers ``submit`` thoughts and get a ``concurrent.futures.Future``
+    back; they never block on a reviewer. Reviewers pull requests with
+    ``take`` and answer them with ``resolve``, which completes the future and
+    runs its callbacks. A thought that is already queued, or was reviewed
+    recently, is not queued again. When the queue is full, new thoughts are
+    dropped and keep their automated score.
+
+    Futures can be awaited from asyncio code with ``asyncio.wrap_future``.
+    """
+
+    def __init__(self, maxsize: int = 1000, completed_cache_size: int = 10000):
+        """
+        Initialize the queue.
+
+        Args:
+            maxsize: Maximum number of thoughts waiting for review
+            completed_cache_size: Number of finished reviews remembered so that
+                the same thought is not sent to a reviewer twice
+        """
+        self.maxsize = maxsize
+        self.completed = LRUCache(completed_cache_size)
+        self.submitted = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.resolved = 0
+        self._pending: "OrderedDict[bytes, ReviewRequest]" = OrderedDict()
+        self._in_review: Dict[bytes, ReviewRequest] = {}
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def submit(self, thought: Any, auto_score: float) -> Optional[Future]:
+        """
+        Queue ``thought`` for review without waiting for it.
+
+        Args:
+            thought: The thought to review
+            auto_score: Its automated score, shown to the reviewer
+
+        Returns:
+            A future resolving to the reviewer's ``Feedback``; already resolved
+            if the thought was reviewed recently, or None if the queue is full
+        """
+        key = review_key(thought)
+        with self._lock:
+            self.submitted += 1
+            request = self._pending.get(key) or self._in_review.get(key)
+            if request is not None:
+                self.deduplicated += 1
+                return request.future
+            feedback = self.completed.get(key)
+            if feedback is not None:
+                self.deduplicated += 1
+                future = Future()
+                future.set_result(feedback)
+                return future
+            if len(self._pending) >= self.maxsize:
+                self.dropped += 1
+                return None
+            request = ReviewRequest(key=key, thought=thought, auto_score=float(auto_score))
+            self._pending[key] = request
+            self._available.notify()
+            return request.future
+
+    def take(self, max_items: int = 1, timeout: Optional[float] = 0.0) -> List[ReviewRequest]:
+        """
+        Hand the oldest waiting requests to a reviewer.
+
+        Args:
+            max_items: Maximum number of requests to return
+            timeout: Seconds to wait for a request if the queue is empty;
+                None waits indefinitely
+
+        Returns:
+            Up to ``max_items`` requests, oldest first
+        """
+        with self._available:
+            if not self._pending and timeout != 0:
+                self._available.wait_for(lambda: self._pending, timeout)
+            requests = []
+            while self._pending and len(requests) < max_items:
+                key, request = self._pending.popitem(last=False)
+                self._in_review[key] = request
+                requests.append(request)
+            return requests
+
+    def resolve(self, request: ReviewRequest, feedback: Any) -> None:
+        """Complete a review, running the callbacks registered on its future."""
+        with self._lock:
+            self._in_review.pop(request.key, None)
+            self._pending.pop(request.key, None)
+            self.completed.put(request.key, feedback)
+            self.resolved += 1
+        if not request.future.done():
+            request.future.set_result(feedback)
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get queue depth and throughput counters."""
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "in_review": len(self._in_review),
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "dropped": self.dropped,
+                "resolved": self.resolved
+            }
+
+
+class LocalReviewer:
+    """
+    In-process reviewer that answers queued requests with a scoring function.
+
+    Stands in for a human in tests and offline runs. Requests are answered
+    either synchronously with ``review_pending`` or by a background thread
+    started with ``start``.
+    """
+
+    def __init__(
+        self,
+        queue: ReviewQueue,
+        score_fn: Callable[[Any], float],
+        comments: str = "Local review"
+    ):
+        """
+        Initialize the reviewer.
+
+        Args:
+            queue: The queue to take requests from
+            score_fn: Function mapping a thought to a score in [0, 1]
+            comments: Comment attached to every review
+        """
+        self.queue = queue
+        self.score_fn = score_fn
+        self.comments = comments
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def review(self, request: ReviewRequest) -> Any:
+        """Review a single request and resolve it."""
+        from .expert_feedback import Feedback
+
+        feedback = Feedback(
+            score=float(self.score_fn(request.thought)),
+            comments=self.comments,
+            suggestions=[],
+            metadata={"source": "human", "reviewer": "local"}
+        )
+        self.queue.resolve(request, feedback)
+        return feedback
+
+    def review_pending(self, max_items: Optional[int] = None) -> int:
+        """
+        Review the requests currently waiting, without blocking.
+
+        Returns:
+            The number of requests reviewed
+        """
+        count = 0
+        while max_items is None or count < max_items:
+            requests = self.queue.take(1, timeout=0.0)
+            if not requests:
+                break
+            self.review(requests[0])
+            count += 1
+        return count
+
+    def start(self, poll_interval: float = 0.05) -> None:
+        """Review requests in a background thread until ``stop`` is called."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.is_set():
+                for request in self.queue.take(1, timeout=poll_interval):
+                    self.review(request)
+
+        self._thread = threading.Thread(target=loop, name="local-reviewer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
@@ -0,0 +1,326 @@
+"""
+Shared generation scheduling across concurrent reasoning sessions.
+"""
+
+from collections import OrderedDict, deque
+from concurrent.futures import Future, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Sequence, Tuple
+import threading
+import time
+
+from ..stats import RunningStats
+from .generation import generate_continuations
+
+
+@dataclass
+class GenerationRequest:
+    """A single context waiting to be continued by the scheduler."""
+    session: Hashable
+    context: str
+    num_tokens: int
+    num_return_sequences: int
+    temperature: float
+    max_new_tokens: int
+    future: Future = field(default_factory=Future)
+    submitted_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def batch_key(self) -> Tuple[int, float, int]:
+        """Requests can only share a ``generate`` call if their keys are equal."""
+        return (self.num_return_sequences, self.temperature, self.max_new_tokens)
+
+
+class GenerationScheduler:
+    """
+    Owns a model and batches the generation requests of many sessions together.
+
+    Sessions, e.g. concurrent ``ThoughtTree`` solves or ``AdaptiveBeamSearch``
+    runs, submit contexts and receive their continuations through futures.
+    Whenever the model is free, the scheduler builds the next batch from
+    whatever is queued: it visits the sessions round-robin, taking the oldest
+    request of each in turn, until the batch would exceed ``token_budget``
+    padded tokens or ``max_batch_size`` contexts. A session with many pending
+    requests therefore cannot starve the others, and the more sessions are
+    active the fuller each ``generate`` call gets.
+
+    Batches are run either by a background thread (``start``/``stop``, or use
+    the scheduler as a context manager) or, without one, by whichever caller
+    of ``generate`` is waiting for a result.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        tokenizer: Any,
+        token_budget: int = 4096,
+        max_batch_size: int = 32,
+        poll_interval: float = 0.01,
+        metrics: Any = None
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            model: The LLM model shared by all sessions
+            tokenizer: The tokenizer for the model
+            token_budget: Maximum padded tokens per batch, counted as rows
+                times (longest context + ``max_new_tokens``); a single
+                request larger than the budget runs on its own
+            max_batch_size: Maximum number of contexts per batch
+            poll_interval: Seconds between checks while waiting for the
+                background thread
+            metrics: Optional ``MetricsTracker`` receiving batch sizes, queue
+                wait times, model calls and generated tokens
+        """
+        self.model = model
+        self.tokenizer = tokenizer
+        self.token_budget = token_budget
+        self.max_batch_size = max(1, max_batch_size)
+        self.poll_interval = poll_interval
+        self.metrics = metrics
+        self.num_batches = 0
+        self.num_requests = 0
+        self.batch_size_stats = RunningStats()
+        self.batch_token_stats = RunningStats()
+        # Pending requests per session, in round-robin order
+        self._queues: "OrderedDict[Hashable, Deque[GenerationRequest]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._has_work = threading.Condition(self._lock)
+        self._model_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = False
+
+    def submit(
+        self,
+        context: str,
+        session: Hashable = None,
+        num_return_sequences: int = 1,
+        temperature: float = 0.7,
+        max_new_tokens: int = 64
+    ) -> Future:
+        """
+        Queue a context for generation.
+
+        Args:
+            context: Prompt to continue
+            session: Key identifying the submitting session for fair scheduling
+            num_return_sequences: Number of continuations
+            temperature: Sampling temperature; 0 selects beam search, as in
+                ``generate_continuations``
+            max_new_tokens: Maximum number of tokens per continuation
+
+        Returns:
+            Future resolving to a list of ``(text, score)`` pairs as in
+            ``generate_continuations``
+        """
+        request = GenerationRequest(
+            session=session,
+            context=context,
+            num_tokens=len(self.tokenizer(context)["input_ids"]),
+            num_return_sequences=num_return_sequences,
+            temperature=temperature,
+            max_new_tokens=max_new_tokens
+        )
+        with self._has_work:
+            queue = self._queues.get(session)
+            if queue is None:
+                queue = self._queues[session] = deque()
+            queue.append(request)
+            self._has_work.notify()
+        return request.future
+
+    def generate(
+        self,
+        contexts: Sequence[str],
+        session: Hashable = None,
+        num_return_sequences: int = 1,
+        temperature: float = 0.7,
+        max_new_tokens: int = 64
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Submit ``contexts`` and wait for their continuations.
+
+        A drop-in replacement for ``generate_continuations`` whose requests
+        are batched with those of the other sessions.
+        """
+        futures = [
+            self.submit(context, session, num_return_sequences, temperature, max_new_tokens)
+            for context in contexts
+        ]
+        for future in futures:
+            while not future.done():
+                if self._thread is None:
+                    self.step()
+                else:
+                    wait([future], timeout=self.poll_interval)
+        return [future.result() for future in futures]
+
+    def expand_fn(
+        self,
+        num_branches: int = 3,
+        separator: str = "\n",
+        session: Hashable = None,
+        temperature: float = 0.7,
+        max_new_tokens: int = 64
+    ) -> Callable[[str], List[str]]:
+        """
+        Build an ``expand_fn`` for ``AdaptiveBeamSearch`` backed by this scheduler.
+
+        Each state is a text; its successors are the state followed by
+        ``separator`` and one of ``num_branches`` sampled continuations. Give
+        the search a thread pool ``executor`` so that the states of a beam are
+        expanded concurrently and batched together.
+        """
+        def expand(state: str) -> List[str]:
+            samples = self.generate(
+                [state], session, num_branches, temperature, max_new_tokens
+            )[0]
+            return [state + separator + text for text, _ in samples]
+
+        return expand
+
+    def step(self) -> int:
+        """
+        Run the next batch, if any, in the calling thread.
+
+        Returns:
+            The number of requests in the batch
+        """
+        with self._model_lock:
+            with self._lock:
+                batch = self._next_batch()
+            if batch:
+                self._run(batch)
+            return len(batch)
+
+    def pending(self) -> int:
+        """Number of queued requests."""
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def start(self) -> None:
+        """Run batches in a background thread until ``stop`` is called."""
+        if self._thread is not None:
+            return
+        self._stop = False
+
+        def loop():
+            while True:
+                with self._has_work:
+                    while not self._queues and not self._stop:
+                        self._has_work.wait()
+                    if not self._queues:
+                        return
+                self.step()
+
+        self._thread = threading.Thread(target=loop, name="generation-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread once the queued requests are done."""
+        if self._thread is None:
+            return
+        with self._has_work:
+            self._stop = True
+            self._has_work.notify_all()
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self) -> "GenerationScheduler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get batching statistics."""
+        with self._lock:
+            pending = sum(len(queue) for queue in self._queues.values())
+            sessions = len(self._queues)
+        return {
+            "num_batches": self.num_batches,
+            "num_requests": self.num_requests,
+            "mean_batch_size": self.batch_size_stats.mean,
+            "max_batch_size": self.batch_size_stats.max if self.num_batches else 0,
+            "mean_batch_tokens": self.batch_token_stats.mean,
+            "pending_requests": pending,
+            "active_sessions": sessions
+        }
+
+    def _next_batch(self) -> List[GenerationRequest]:
+        """
+        Take the next batch off the queues, visiting sessions round-robin.
+
+        Only the oldest request of a session is eligible, so every session's
+        requests run in submission order. The batch contains requests with
+        the batch key of the first session's oldest request.
+        """
+        if not self._queues:
+            return []
+        sessions = list(self._queues)
+        key = self._queues[sessions[0]][0].batch_key
+        batch: List[GenerationRequest] = []
+        rows = width = 0
+        full = False
+        while not full:
+            added = False
+            for session in sessions:
+                queue = self._queues[session]
+                if not queue or queue[0].batch_key != key:
+                    continue
+                request = queue[0]
+                new_rows = rows + request.num_return_sequences
+                new_width = max(width, request.num_tokens)
+                cost = new_rows * (new_width + request.max_new_tokens)
+                if batch and (cost > self.token_budget or len(batch) >= self.max_batch_size):
+                    full = True
+                    break
+                batch.append(queue.popleft())
+                rows, width = new_rows, new_width
+                added = True
+            if not added:
+                break
+
+        # The next batch starts with the session after this one's first
+        self._queues.move_to_end(sessions[0])
+        for session in sessions:
+            if not self._queues[session]:
+                del self._queues[session]
+        self.batch_token_stats.update(rows * (width + batch[0].max_new_tokens))
+        return batch
+
+    def _run(self, batch: List[GenerationRequest]) -> None:
+        """Generate continuations for a batch and resolve its futures."""
+        batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        now = time.perf_counter()
+        self.num_batches += 1
+        self.num_requests += len(batch)
+        self.batch_size_stats.update(len(batch))
+        if self.metrics is not None:
+            self.metrics.increment("scheduler_batches")
+            self.metrics.observe("scheduler_batch_size", len(batch))
+            for request in batch:
+                self.metrics.observe("scheduler_queue_seconds", now - request.submitted_at)
+
+        first = batch[0]
+        try:
+            continuations = generate_continuations(
+                self.model,
+                self.tokenizer,
+                [request.context for request in batch],
+                num_return_sequences=first.num_return_sequences,
+                temperature=first.temperature,
+                max_new_tokens=first.max_new_tokens,
+                batch_size=len(batch),
+                metrics=self.metrics
+            )
+        except Exception as exc:
+            for request in batch:
+                request.future.set_exception(exc)
+            return
+        for request, samples in zip(batch, continuations):
+            request.future.set_result(samples)
@@ -0,0 +1,201 @@
+"""
+Self-consistency sampling with early stopping.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+import math
+import re
+
+from .generation import generate_continuations
+
+if TYPE_CHECKING:
+    from transformers import PreTrainedModel, PreTrainedTokenizer
+
+_ANSWER_MARKER = re.compile(r"(?:final answer|the answer is|answer)\s*[:=]?\s*", re.IGNORECASE)
+_NUMBER = re.compile(r"^[-+]?\d[\d,]*(?:\.\d+)?$")
+
+
+def normalize_answer(text: str) -> str:
+    """
+    Reduce a sampled reasoning path to a canonical final answer.
+
+    Takes the text after the last "answer" marker (or the last non-empty
+    line), lowercases it, drops surrounding punctuation and collapses
+    whitespace. Numbers are canonicalized, so "1,000", "1000.0" and "1000"
+    fall into the same cluster.
+
+    Args:
+        text: A sampled continuation
+
+    Returns:
+        The normalized answer, or "" if there is none
+    """
+    markers = list(_ANSWER_MARKER.finditer(text))
+    if markers:
+        text = text[markers[-1].end():]
+    else:
+        lines = [line for line in text.splitlines() if line.strip()]
+        text = lines[-1] if lines else ""
+    text = text.strip().splitlines()[0] if text.strip() else ""
+
+    answer = " ".join(text.lower().split()).strip(" .,;:!?\"'`()[]{}")
+    if _NUMBER.match(answer):
+        value = float(answer.replace(",", ""))
+        answer = str(int(value)) if value.is_integer() else repr(value)
+    return answer
+
+
+class SelfConsistency:
+    """
+    Answers a prompt by majority vote over independently sampled reasoning paths.
+
+    Samples are drawn in batches of ``batch_size`` from one ``generate`` call
+    each. After every batch the answers are normalized and clustered, and
+    sampling stops as soon as the leading answer is decided: either the
+    remaining budget cannot close the gap to the runner-up, or an exact
+    binomial test shows the leader beats the runner-up with the requested
+    confidence. This usually needs far fewer samples than a fixed-size vote.
+    """
+
+    def __init__(
+        self,
+        model: Optional["PreTrainedModel"] = None,
+        tokenizer: Optional["PreTrainedTokenizer"] = None,
+        max_samples: int = 40,
+        batch_size: int = 8,
+        temperature: float = 0.7,
+        max_new_tokens: int = 64,
+        confidence: float = 0.95,
+        normalizer: Callable[[str], str] = normalize_answer,
+        metrics: Any = None
+    ):
+        """
+        Initialize self-consistency sampling.
+
+        Args:
+            model: The LLM model used to sample reasoning paths
+            tokenizer: The tokenizer for the model
+            max_samples: Maximum number of sampled reasoning paths
+            batch_size: Number of paths sampled per ``generate`` call; the
+                stopping test runs after every batch
+            temperature: Sampling temperature
+            max_new_tokens: Maximum number of tokens per reasoning path
+            confidence: Confidence required to stop early on the binomial
+                test; 1.0 only stops when the leader cannot be overtaken
+            normalizer: Function mapping a sampled path to its answer cluster
+            metrics: Optional ``MetricsTracker`` receiving model calls and tokens
+        """
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_samples = max_samples
+        self.batch_size = max(1, batch_size)
+        self.temperature = temperature
+        self.max_new_tokens = max_new_tokens
+        self.confidence = confidence
+        self.normalizer = normalizer
+        self.metrics = metrics
+
+    def solve(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """
+        Sample reasoning paths for ``prompt`` until the majority answer is decided.
+
+        Args:
+            prompt: The problem or question
+            **kwargs: ``max_samples`` and ``confidence`` override the instance
+                settings for this call
+
+        Returns:
+            Dict containing the solution, its reasoning path and vote share
+            ("confidence"), the answer distribution, the number of samples
+            used, all samples and the reason sampling stopped
+        """
+        if self.model is None:
+            raise ValueError("Model must be set to sample reasoning paths")
+        if self.tokenizer is None:
+            raise ValueError("Tokenizer must be set to sample reasoning paths")
+
+        max_samples = kwargs.get("max_samples", self.max_samples)
+        confidence = kwargs.get("confidence", self.confidence)
+        # Bonferroni correction over all the looks the test may take
+        alpha = (1.0 - confidence) / max(1, math.ceil(max_samples / self.batch_size))
+
+        samples: List[Tuple[str, float, str]] = []
+        counts: Dict[str, int] = {}
+        stop_reason = "max_samples"
+        while len(samples) < max_samples:
+            batch = min(self.batch_size, max_samples - len(samples))
+            continuations = generate_continuations(
+                self.model,
+                self.tokenizer,
+                [prompt],
+                num_return_sequences=batch,
+                temperature=self.temperature,
+                max_new_tokens=self.max_new_tokens,
+                metrics=self.metrics
+            )[0]
+            for text, score in continuations:
+                answer = self.normalizer(text)
+                samples.append((text, score, answer))
+                if answer:
+                    counts[answer] = counts.get(answer, 0) + 1
+
+            reason = self._decided(counts, max_samples - len(samples), alpha)
+            if reason is not None:
+                stop_reason = reason
+                break
+
+        return self._result(prompt, samples, counts, stop_reason)
+
+    @staticmethod
+    def _decided(counts: Dict[str, int], remaining: int, alpha: float) -> Optional[str]:
+        """Return why the vote is decided, or None if sampling should continue."""
+        if not counts:
+            return None
+        ranked = sorted(counts.values(), reverse=True)
+        leader = ranked[0]
+        runner_up = ranked[1] if len(ranked) > 1 else 0
+        if leader - runner_up > remaining:
+            return "unbeatable"
+        if alpha > 0 and binomial_tail(leader, leader + runner_up) <= alpha:
+            return "significant"
+        return None
+
+    def _result(
+        self,
+        prompt: str,
+        samples: List[Tuple[str, float, str]],
+        counts: Dict[str, int],
+        stop_reason: str
+    ) -> Dict[str, Any]:
+        distribution = {
+            answer: count / len(samples)
+            for answer, count in sorted(counts.items(), key=lambda item: -item[1])
+        }
+        if counts:
+            best = max(counts, key=counts.get)
+            # Most likely path among those reaching the majority answer
+            text = max((s for s in samples if s[2] == best), key=lambda s: s[1])[0]
+        else:
+            best, text = "", ""
+        return {
+            "solution": best,
+            "reasoning_path": [prompt, text],
+            "confidence": counts.get(best, 0) / len(samples) if samples else 0.0,
+            "answer_distribution": distribution,
+            "samples_used": len(samples),
+            "samples": [text for text, _, _ in samples],
+            "stop_reason": stop_reason
+        }
+
+
+def binomial_tail(successes: int, trials: int) -> float:
+    """
+    Exact probability of at least ``successes`` heads in ``trials`` fair coin flips.
+
+    This is the one-sided p-value of the leader winning ``successes`` of the
+    ``trials`` votes split between it and the runner-up, if both were
+    equally likely.
+    """
+    if trials == 0:
+        return 1.0
+    return sum(math.comb(trials, k) for k in range(successes, trials + 1)) / 2 ** trials
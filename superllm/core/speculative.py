@@ -0,0 +1,401 @@
+"""
+Draft-and-verify generation of candidate thoughts.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import math
+import random
+import time
+
+from ..cache import LRUCache, stable_hash
+from .generation import _ensure_pad_token, generate_continuations, token_logprobs
+
+
+class NGramDrafter:
+    """
+    Proposes drafts by sampling from n-gram statistics of the text seen so far.
+
+    Every context passed to ``propose`` is added to the statistics before
+    drafting, so drafts mostly continue phrases that already occur in the
+    prompt and earlier thoughts. Unseen histories back off to shorter n-grams
+    and finally to token frequencies. No model is involved, which makes
+    drafting nearly free. Memory is bounded: only the most recently used
+    histories and context hashes are kept.
+    """
+
+    def __init__(
+        self,
+        tokenizer: Any,
+        n: int = 3,
+        seed: Optional[int] = None,
+        max_histories: int = 100000,
+        max_contexts: int = 10000
+    ):
+        """
+        Initialize the drafter.
+
+        Args:
+            tokenizer: The tokenizer of the main model
+            n: Longest n-gram used for drafting
+            seed: Optional random seed
+            max_histories: Maximum number of token histories kept per n-gram
+                order; the least recently used are forgotten
+            max_contexts: Number of recent contexts remembered so that a
+                context proposed from again is not counted twice
+        """
+        self.tokenizer = tokenizer
+        self.n = max(1, n)
+        # tables[k] maps a history of k tokens to next-token counts
+        self.tables = [LRUCache(max_histories) for _ in range(self.n)]
+        self._seen = LRUCache(max_contexts)
+        self._rng = random.Random(seed)
+
+    def update(self, token_ids: Sequence[int]) -> None:
+        """Add the n-grams of a token sequence to the statistics."""
+        token_ids = list(token_ids)
+        for i, token in enumerate(token_ids):
+            for k in range(min(i, self.n - 1) + 1):
+                history = tuple(token_ids[i - k:i])
+                counts = self.tables[k].get(history, count=False)
+                if counts is None:
+                    counts = {}
+                    self.tables[k].put(history, counts)
+                counts[token] = counts.get(token, 0) + 1
+
+    def propose(
+        self,
+        contexts: Sequence[str],
+        num_drafts: int,
+        max_new_tokens: int
+    ) -> List[List[str]]:
+        """
+        Draft ``num_drafts`` continuations of up to ``max_new_tokens`` tokens per context.
+        """
+        eos_token_id = getattr(self.tokenizer, "eos_token_id", None)
+        drafts = []
+        for context in contexts:
+            token_ids = list(self.tokenizer(context)["input_ids"])
+            key = stable_hash(context)
+            if self._seen.get(key, count=False) is None:
+                self._seen.put(key, True)
+                self.update(token_ids)
+            samples = []
+            for _ in range(num_drafts):
+                sequence = list(token_ids)
+                for _ in range(max_new_tokens):
+                    token = self._sample(sequence)
+                    if token is None or token == eos_token_id:
+                        break
+                    sequence.append(token)
+                samples.append(
+                    self.tokenizer.decode(sequence[len(token_ids):], skip_special_tokens=True)
+                )
+            drafts.append(samples)
+        return drafts
+
+    def _sample(self, sequence: List[int]) -> Optional[int]:
+        """Sample the next token from the longest history with statistics."""
+        for k in range(min(len(sequence), self.n - 1), -1, -1):
+            counts = self.tables[k].get(tuple(sequence[len(sequence) - k:]), count=False)
+            if counts:
+                return self._rng.choices(list(counts), weights=list(counts.values()))[0]
+        return None
+
+
+class ModelDrafter:
+    """
+    Proposes drafts by sampling from a small draft model.
+
+    The draft model must share the tokenizer (or at least the text format) of
+    the main model.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        tokenizer: Any,
+        temperature: float = 1.0,
+        batch_size: int = 8
+    ):
+        """
+        Initialize the drafter.
+
+        Args:
+            model: The small draft model
+            tokenizer: The tokenizer for the draft model
+            temperature: Sampling temperature for drafts
+            batch_size: Maximum number of contexts per ``generate`` call
+        """
+        self.model = model
+        self.tokenizer = tokenizer
+        self.temperature = temperature
+        self.batch_size = batch_size
+
+    def propose(
+        self,
+        contexts: Sequence[str],
+        num_drafts: int,
+        max_new_tokens: int
+    ) -> List[List[str]]:
+        """
+        Draft ``num_drafts`` continuations of up to ``max_new_tokens`` tokens per context.
+        """
+        continuations = generate_continuations(
+            self.model,
+            self.tokenizer,
+            contexts,
+            num_return_sequences=num_drafts,
+            temperature=self.temperature,
+            max_new_tokens=max_new_tokens,
+            batch_size=self.batch_size,
+            strip=False
+        )
+        return [[text for text, _ in samples] for samples in continuations]
+
+
+class SpeculativeGenerator:
+    """
+    Generates candidate thoughts by drafting cheaply and verifying with the main model.
+
+    For every context, a drafter proposes ``num_drafts`` continuations. The
+    main model scores all drafts of all contexts in batched forward passes of
+    up to ``verify_batch_size`` sequences (by default a single pass) and
+    accepts each draft up to its first token with probability below
+    ``accept_prob``. The best ``num_branches`` drafts of a context, ranked by
+    their geometric mean token probability under the main model, survive.
+    Fully accepted survivors are used as they are; the others keep their
+    accepted prefix and are completed by the main model in a single
+    ``generate`` call, then rescored. Full-model decoding is thus only paid
+    for the rejected remainder of the surviving drafts.
+    """
+
+    def __init__(
+        self,
+        drafter: Any,
+        num_drafts: Optional[int] = None,
+        accept_prob: float = 0.1,
+        metrics: Any = None,
+        verify_batch_size: Optional[int] = None
+    ):
+        """
+        Initialize speculative generation.
+
+        Args:
+            drafter: Object with ``propose(contexts, num_drafts, max_new_tokens)``
+                returning draft texts per context, e.g. ``NGramDrafter`` or
+                ``ModelDrafter``
+            num_drafts: Drafts per context; defaults to twice the number of
+                branches requested
+            accept_prob: Minimum main-model probability of an accepted draft token
+            metrics: Optional ``MetricsTracker`` receiving draft and
+                verification timings and draft token counts
+            verify_batch_size: Maximum number of drafts scored per
+                verification pass; if None, all drafts of a ``generate``
+                call are verified in one pass
+        """
+        self.drafter = drafter
+        self.num_drafts = num_drafts
+        self.accept_prob = accept_prob
+        self.metrics = metrics
+        self.verify_batch_size = verify_batch_size
+        self.drafts_proposed = 0
+        self.draft_tokens_proposed = 0
+        self.draft_tokens_accepted = 0
+        self.drafts_fully_accepted = 0
+        self.survivors_completed = 0
+        self.main_tokens_decoded = 0
+        self.baseline_tokens = 0
+
+    def generate(
+        self,
+        model: Any,
+        tokenizer: Any,
+        contexts: Sequence[str],
+        num_branches: int,
+        temperature: float = 0.7,
+        max_new_tokens: int = 64,
+        batch_size: int = 8
+    ) -> List[List[Tuple[str, float]]]:
+        """
+        Generate ``num_branches`` continuations per context.
+
+        Args:
+            model: The main model
+            tokenizer: The tokenizer for the main model
+            contexts: Prompts to continue
+            num_branches: Number of continuations per context
+            temperature: Sampling temperature for completing survivors
+            max_new_tokens: Maximum number of tokens per continuation
+            batch_size: Maximum number of sequences per call completing or
+                rescoring survivors
+
+        Returns:
+            For every context, a list of ``(text, score)`` pairs where the score
+            is the geometric mean main-model token probability of the text
+        """
+        if not contexts:
+            return []
+        pad_token_id = _ensure_pad_token(tokenizer)
+        num_drafts = self.num_drafts or 2 * num_branches
+
+        start_time = time.perf_counter()
+        drafts = self.drafter.propose(contexts, num_drafts, max_new_tokens)
+        if self.metrics is not None:
+            self.metrics.observe("draft_seconds", time.perf_counter() - start_time)
+
+        # The first token has no prediction, so empty contexts start from BOS
+        bos_token_id = getattr(tokenizer, "bos_token_id", None)
+        start_ids = [pad_token_id if bos_token_id is None else bos_token_id]
+        context_ids = [list(tokenizer(context)["input_ids"]) or start_ids for context in contexts]
+        candidates: List[List[List[int]]] = []
+        for samples in drafts:
+            unique: Dict[Tuple[int, ...], List[int]] = {}
+            for text in samples:
+                ids = list(tokenizer(text, add_special_tokens=False)["input_ids"])[:max_new_tokens]
+                if ids:
+                    unique.setdefault(tuple(ids), ids)
+            candidates.append(list(unique.values()))
+
+        # Verify every draft of every context, in one pass unless capped
+        start_time = time.perf_counter()
+        pairs = [(c, ids) for c, drafts_ids in enumerate(candidates) for ids in drafts_ids]
+        log_probs = token_logprobs(
+            model,
+            [context_ids[c] + ids for c, ids in pairs],
+            [len(context_ids[c]) for c, _ in pairs],
+            batch_size=self.verify_batch_size or len(pairs),
+            pad_token_id=pad_token_id,
+            metrics=self.metrics
+        )
+        if self.metrics is not None:
+            self.metrics.observe("verify_seconds", time.perf_counter() - start_time)
+
+        threshold = math.log(self.accept_prob) if self.accept_prob > 0 else -math.inf
+        verified: List[List[Tuple[float, List[int], int, List[float]]]] = [[] for _ in contexts]
+        for (c, ids), scores in zip(pairs, log_probs):
+            accepted = next((i for i, lp in enumerate(scores) if lp < threshold), len(ids))
+            verified[c].append((_mean_probability(scores), ids, accepted, scores))
+            self.draft_tokens_proposed += len(ids)
+            self.draft_tokens_accepted += accepted
+            self.drafts_fully_accepted += accepted == len(ids)
+        self.drafts_proposed += len(pairs)
+        if self.metrics is not None:
+            self.metrics.increment("draft_tokens_proposed", sum(len(ids) for _, ids in pairs))
+            self.metrics.increment(
+                "draft_tokens_accepted", sum(v[2] for rows in verified for v in rows)
+            )
+
+        # Keep the best drafts; missing branches start from an empty draft
+        survivors = []
+        for rows in verified:
+            rows.sort(key=lambda row: -row[0])
+            rows = rows[:num_branches]
+            rows += [(0.0, [], 0, [])] * (num_branches - len(rows))
+            survivors.append(rows)
+
+        results: List[List[Any]] = [[None] * num_branches for _ in contexts]
+        pending = []
+        for c, rows in enumerate(survivors):
+            for b, (score, ids, accepted, _) in enumerate(rows):
+                if ids and accepted == len(ids):
+                    results[c][b] = (tokenizer.decode(ids, skip_special_tokens=True).strip(), score)
+                else:
+                    pending.append((c, b, ids[:accepted]))
+        self.baseline_tokens += len(contexts) * num_branches * max_new_tokens
+        if pending:
+            self._complete(
+                model, tokenizer, contexts, context_ids, pending, results,
+                temperature, max_new_tokens, batch_size, pad_token_id
+            )
+        return results
+
+    def _complete(
+        self,
+        model: Any,
+        tokenizer: Any,
+        contexts: Sequence[str],
+        context_ids: List[List[int]],
+        pending: List[Tuple[int, int, List[int]]],
+        results: List[List[Any]],
+        temperature: float,
+        max_new_tokens: int,
+        batch_size: int,
+        pad_token_id: int
+    ) -> None:
+        """Complete the accepted prefixes of survivors with the main model and rescore them."""
+        budget = max_new_tokens - min(len(prefix) for _, _, prefix in pending)
+        prefixes = [tokenizer.decode(prefix, skip_special_tokens=True) for _, _, prefix in pending]
+        completions = generate_continuations(
+            model,
+            tokenizer,
+            [contexts[c] + prefix for (c, _, _), prefix in zip(pending, prefixes)],
+            num_return_sequences=1,
+            temperature=temperature,
+            max_new_tokens=budget,
+            batch_size=batch_size,
+            metrics=self.metrics,
+            strip=False
+        )
+        self.main_tokens_decoded += len(pending) * budget
+        self.survivors_completed += len(pending)
+
+        thoughts = []
+        for (c, b, prefix), samples in zip(pending, completions):
+            ids = list(tokenizer(samples[0][0], add_special_tokens=False)["input_ids"])
+            thoughts.append(prefix + ids[:max_new_tokens - len(prefix)])
+        scored = [(i, thought) for i, thought in enumerate(thoughts) if thought]
+        log_probs = token_logprobs(
+            model,
+            [context_ids[pending[i][0]] + thought for i, thought in scored],
+            [len(context_ids[pending[i][0]]) for i, _ in scored],
+            batch_size=batch_size,
+            pad_token_id=pad_token_id,
+            metrics=self.metrics
+        )
+        scores = {i: _mean_probability(lp) for (i, _), lp in zip(scored, log_probs)}
+        for i, ((c, b, _), thought) in enumerate(zip(pending, thoughts)):
+            text = tokenizer.decode(thought, skip_special_tokens=True).strip()
+            results[c][b] = (text, scores.get(i, 0.0))
+
+    @property
+    def acceptance_rate(self) -> float:
+        """Fraction of proposed draft tokens accepted by the main model."""
+        if not self.draft_tokens_proposed:
+            return 0.0
+        return self.draft_tokens_accepted / self.draft_tokens_proposed
+
+    @property
+    def speedup(self) -> Optional[float]:
+        """
+        Estimated decoding speedup over generating every branch with the main model.
+
+        The ratio of the tokens plain generation would decode to the tokens the
+        main model decoded while completing survivors. Drafting and the
+        verification passes are not counted. None while the main model has
+        decoded nothing, e.g. when every draft was accepted, since the ratio
+        is then undefined.
+        """
+        if not self.main_tokens_decoded:
+            return None
+        return self.baseline_tokens / self.main_tokens_decoded
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get draft acceptance and speedup statistics."""
+        return {
+            "drafts_proposed": self.drafts_proposed,
+            "draft_tokens_proposed": self.draft_tokens_proposed,
+            "draft_tokens_accepted": self.draft_tokens_accepted,
+            "acceptance_rate": self.acceptance_rate,
+            "drafts_fully_accepted": self.drafts_fully_accepted,
+            "survivors_completed": self.survivors_completed,
+            "main_tokens_decoded": self.main_tokens_decoded,
+            "baseline_tokens": self.baseline_tokens,
+            "speedup": self.speedup
+        }
+
+
+def _mean_probability(log_probs: Sequence[float]) -> float:
+    """Geometric mean probability of a token sequence."""
+    if not len(log_probs):
+        return 0.0
+    return math.exp(sum(log_probs) / len(log_probs))
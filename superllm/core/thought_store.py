@@ -0,0 +1,380 @@
+"""
+Storage backends for the nodes of a ThoughtTree.
+
+The default backend keeps the tree in flat NumPy arrays (parent index, depth,
+score and child offsets) with thought contents interned in a string table.
+Nodes are addressed by integer indices; ``ThoughtNode`` objects are lightweight
+views that are created on demand.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Type, Union
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class Thought:
+    """Represents a single thought node in the tree."""
+    content: str
+    score: float
+    metadata: Dict[str, Any]
+    parent_id: Optional[int] = None
+
+
+class ThoughtNode:
+    """Read-only view of a single node in a thought store."""
+
+    __slots__ = ("_store", "index")
+
+    def __init__(self, store: "ArrayThoughtStore", index: int):
+        self._store = store
+        self.index = index
+
+    @property
+    def content(self) -> str:
+        return self._store.content(self.index)
+
+    @property
+    def score(self) -> float:
+        return self._store.score(self.index)
+
+    @property
+    def depth(self) -> int:
+        return self._store.depth(self.index)
+
+    @property
+    def parent(self) -> Optional[int]:
+        return self._store.parent(self.index)
+
+    @property
+    def children(self) -> Sequence[int]:
+        return self._store.children(self.index)
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self._store.metadata(self.index)
+
+    @property
+    def thought(self) -> Thought:
+        return self._store.thought(self.index)
+
+    def __repr__(self) -> str:
+        return f"ThoughtNode(index={self.index}, depth={self.depth}, score={self.score:.3f})"
+
+
+class ArrayThoughtStore:
+    """
+    Compact, array-backed storage for a thought tree.
+
+    Children of a node are stored contiguously, so each node only needs a
+    start offset and a count to enumerate its children. Metadata beyond the
+    depth is kept in a sparse side table, so nodes without extra metadata do
+    not allocate a dictionary.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Initialize the store.
+
+        Args:
+            capacity: Number of nodes to preallocate; arrays grow geometrically
+        """
+        self._capacity = max(1, capacity)
+        self._size = 0
+        self._allocate(self._capacity)
+        self._strings: List[str] = []
+        self._string_ids: Dict[str, int] = {}
+        self._metadata: Dict[int, Dict[str, Any]] = {}
+
+    def _allocate(self, capacity: int) -> None:
+        self._parent = np.full(capacity, -1, dtype=np.int64)
+        self._depth = np.zeros(capacity, dtype=np.int32)
+        self._score = np.zeros(capacity, dtype=np.float64)
+        self._content = np.zeros(capacity, dtype=np.int32)
+        self._child_start = np.full(capacity, -1, dtype=np.int64)
+        self._child_count = np.zeros(capacity, dtype=np.int32)
+
+    def _reserve(self, needed: int) -> None:
+        if needed <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        old = (
+            self._parent, self._depth, self._score,
+            self._content, self._child_start, self._child_count
+        )
+        self._allocate(capacity)
+        n = self._size
+        self._parent[:n] = old[0][:n]
+        self._depth[:n] = old[1][:n]
+        self._score[:n] = old[2][:n]
+        self._content[:n] = old[3][:n]
+        self._child_start[:n] = old[4][:n]
+        self._child_count[:n] = old[5][:n]
+        self._capacity = capacity
+
+    def _intern(self, content: str) -> int:
+        string_id = self._string_ids.get(content)
+        if string_id is None:
+            string_id = len(self._strings)
+            self._strings.append(content)
+            self._string_ids[content] = string_id
+        return string_id
+
+    def _append(self, thought: Thought, parent: int, depth: int) -> int:
+        index = self._size
+        self._parent[index] = parent
+        self._depth[index] = depth
+        self._score[index] = thought.score
+        self._content[index] = self._intern(thought.content)
+        extra = {k: v for k, v in thought.metadata.items() if k != "depth"}
+        if extra:
+            self._metadata[index] = extra
+        self._size += 1
+        return index
+
+    def __len__(self) -> int:
+        return self._size
+
+    def clear(self) -> None:
+        """Remove all nodes from the store."""
+        self._size = 0
+        self._child_start[:] = -1
+        self._child_count[:] = 0
+        self._strings = []
+        self._string_ids = {}
+        self._metadata = {}
+
+    def add_root(self, thought: Thought) -> int:
+        """Add a root node and return its index."""
+        self._reserve(self._size + 1)
+        return self._append(thought, -1, thought.metadata.get("depth", 0))
+
+    def add_children(self, parent: int, thoughts: Sequence[Thought]) -> range:
+        """
+        Add all children of ``parent`` in one contiguous block.
+
+        Args:
+            parent: Index of the parent node
+            thoughts: Child thoughts, in order
+
+        Returns:
+            Range of the indices assigned to the children
+        """
+        if self._child_count[parent] > 0:
+            raise ValueError(f"Node {parent} has already been expanded")
+        start = self._size
+        self._reserve(start + len(thoughts))
+        depth = int(self._depth[parent]) + 1
+        for thought in thoughts:
+            self._append(thought, parent, depth)
+            thought.parent_id = parent
+        if thoughts:
+            self._child_start[parent] = start
+            self._child_count[parent] = len(thoughts)
+        return range(start, self._size)
+
+    def node(self, index: int) -> ThoughtNode:
+        return ThoughtNode(self, index)
+
+    def content(self, index: int) -> str:
+        return self._strings[self._content[index]]
+
+    def score(self, index: int) -> float:
+        return float(self._score[index])
+
+    def set_score(self, index: int, score: float) -> None:
+        self._score[index] = score
+
+    def depth(self, index: int) -> int:
+        return int(self._depth[index])
+
+    def parent(self, index: int) -> Optional[int]:
+        parent = int(self._parent[index])
+        return None if parent < 0 else parent
+
+    def children(self, index: int) -> range:
+        count = int(self._child_count[index])
+        if count == 0:
+            return range(0)
+        start = int(self._child_start[index])
+        return range(start, start + count)
+
+    def metadata(self, index: int) -> Dict[str, Any]:
+        metadata = {"depth": self.depth(index)}
+        metadata.update(self._metadata.get(index, {}))
+        return metadata
+
+    def update_metadata(self, index: int, **values: Any) -> None:
+        self._metadata.setdefault(index, {}).update(values)
+
+    def thought(self, index: int) -> Thought:
+        """Materialize the node at ``index`` as a ``Thought``."""
+        return Thought(
+            content=self.content(index),
+            score=self.score(index),
+            metadata=self.metadata(index),
+            parent_id=self.parent(index)
+        )
+
+    def leaves(self) -> np.ndarray:
+        """Return the indices of all nodes without children."""
+        return np.flatnonzero(self._child_count[:self._size] == 0)
+
+    def scores(self, indices: Optional[Sequence[int]] = None) -> np.ndarray:
+        if indices is None:
+            return self._score[:self._size]
+        return self._score[np.asarray(indices, dtype=np.int64)]
+
+    def path(self, index: int) -> List[int]:
+        """Return the node indices from the root down to ``index``."""
+        path = [index]
+        parent = int(self._parent[index])
+        while parent >= 0:
+            path.append(parent)
+            parent = int(self._parent[parent])
+        path.reverse()
+        return path
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory used by the node arrays."""
+        return sum(
+            a.nbytes for a in (
+                self._parent, self._depth, self._score,
+                self._content, self._child_start, self._child_count
+            )
+        )
+
+    def to_networkx(self) -> Any:
+        """Export the tree as a ``networkx.DiGraph`` with ``thought`` node attributes."""
+        import networkx as nx
+
+        graph = nx.DiGraph()
+        for index in range(self._size):
+            graph.add_node(index, thought=self.thought(index))
+        parents = self._parent[:self._size]
+        children = np.flatnonzero(parents >= 0)
+        graph.add_edges_from(zip(parents[children].tolist(), children.tolist()))
+        return graph
+
+
+class NetworkXThoughtStore:
+    """
+    Thought store backed by a ``networkx.DiGraph``.
+
+    Slower and larger than ``ArrayThoughtStore``, but convenient when the tree
+    is inspected with networkx algorithms while it is being built.
+    """
+
+    def __init__(self):
+        import networkx as nx
+
+        self.graph = nx.DiGraph()
+
+    def __len__(self) -> int:
+        return self.graph.number_of_nodes()
+
+    def clear(self) -> None:
+        self.graph.clear()
+
+    def _add(self, thought: Thought, parent: Optional[int]) -> int:
+        index = self.graph.number_of_nodes()
+        self.graph.add_node(index, thought=thought, parent=parent)
+        return index
+
+    def add_root(self, thought: Thought) -> int:
+        return self._add(thought, None)
+
+    def add_children(self, parent: int, thoughts: Sequence[Thought]) -> range:
+        if self.graph.out_degree(parent) > 0:
+            raise ValueError(f"Node {parent} has already been expanded")
+        start = self.graph.number_of_nodes()
+        depth = self.depth(parent) + 1
+        for thought in thoughts:
+            thought.metadata["depth"] = depth
+            thought.parent_id = parent
+            self.graph.add_edge(parent, self._add(thought, parent))
+        return range(start, self.graph.number_of_nodes())
+
+    def node(self, index: int) -> Thought:
+        return self.graph.nodes[index]["thought"]
+
+    def content(self, index: int) -> str:
+        return self.node(index).content
+
+    def score(self, index: int) -> float:
+        return float(self.node(index).score)
+
+    def set_score(self, index: int, score: float) -> None:
+        self.node(index).score = score
+
+    def depth(self, index: int) -> int:
+        return int(self.node(index).metadata.get("depth", 0))
+
+    def parent(self, index: int) -> Optional[int]:
+        return self.graph.nodes[index]["parent"]
+
+    def children(self, index: int) -> List[int]:
+        return list(self.graph.successors(index))
+
+    def metadata(self, index: int) -> Dict[str, Any]:
+        return self.node(index).metadata
+
+    def update_metadata(self, index: int, **values: Any) -> None:
+        self.node(index).metadata.update(values)
+
+    def thought(self, index: int) -> Thought:
+        return self.node(index)
+
+    def leaves(self) -> np.ndarray:
+        return np.array(
+            [n for n in self.graph.nodes() if self.graph.out_degree(n) == 0],
+            dtype=np.int64
+        )
+
+    def scores(self, indices: Optional[Sequence[int]] = None) -> np.ndarray:
+        if indices is None:
+            indices = range(len(self))
+        return np.array([self.score(i) for i in indices], dtype=np.float64)
+
+    def path(self, index: int) -> List[int]:
+        path = [index]
+        parent = self.parent(index)
+        while parent is not None:
+            path.append(parent)
+            parent = self.parent(parent)
+        path.reverse()
+        return path
+
+    def to_networkx(self) -> Any:
+        return self.graph.copy()
+
+
+ThoughtStore = Union[ArrayThoughtStore, NetworkXThoughtStore]
+
+TREE_BACKENDS: Dict[str, Type] = {
+    "array": ArrayThoughtStore,
+    "networkx": NetworkXThoughtStore,
+}
+
+
+def create_thought_store(backend: Union[str, Type] = "array") -> ThoughtStore:
+    """
+    Create a thought store.
+
+    Args:
+        backend: Name of a registered backend ('array' or 'networkx') or a store class
+
+    Returns:
+        An empty thought store
+    """
+    if isinstance(backend, str):
+        if backend not in TREE_BACKENDS:
+            raise ValueError(
+                f"Unknown tree backend '{backend}', expected one of {sorted(TREE_BACKENDS)}"
+            )
+        backend = TREE_BACKENDS[backend]
+    return backend()
@@ -2,18 +2,42 @@
 Implementation of the ThoughtTree algorithm for enhanced LLM reasoning.
 """
 
-import networkx as nx
-from typing import List, Dict, Any, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from transformers import PreTrainedModel, PreTrainedTokenizer
+import asyncio
+import time
+import numpy as np
+from typing import (
+    List, Dict, Any, AsyncIterator, Generator, Iterator, Optional, Tuple, Type, Union,
+    TYPE_CHECKING
+)
+
+from .generation import generate_continuations, generate_from_prefixes, prefill
+from .mcts import MCTSSolver
+from .prefix_cache import PrefixCache
+from .speculative import SpeculativeGenerator
+from .thought_store import Thought, ThoughtStore, create_thought_store
+
+if TYPE_CHECKING:
+    from transformers import PreTrainedModel, PreTrainedTokenizer
 
 @dataclass
-class Thought:
-    """Represents a single thought node in the tree."""
-    content: str
-    score: float
-    metadata: Dict[str, Any]
-    parent_id: Optional[str] = None
+class SolveEvent:
+    """
+    Progress event emitted by ``ThoughtTree.solve_stream``.
+    
+    ``type`` is 'node_added', 'score_updated', 'best_so_far' or 'done'. Node
+    events describe one node; 'best_so_far' and 'done' carry a solution dict
+    in ``result``.
+    """
+    type: str
+    node_id: Optional[int] = None
+    parent_id: Optional[int] = None
+    depth: Optional[int] = None
+    content: Optional[str] = None
+    score: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
 
 class ThoughtTree:
     """
@@ -23,11 +47,30 @@ class ThoughtTree:
     
     def __init__(
         self,
-        model: Optional[PreTrainedModel] = None,
-        tokenizer: Optional[PreTrainedTokenizer] = None,
+        model: Optional["PreTrainedModel"] = None,
+        tokenizer: Optional["PreTrainedTokenizer"] = None,
         max_branches: int = 5,
         max_depth: int = 3,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        tree_backend: Union[str, Type] = "array",
+        reuse_tree: bool = False,
+        max_new_tokens: int = 64,
+        generation_batch_size: int = 8,
+        prefix_cache_bytes: Optional[int] = None,
+        solver: str = "bfs",
+        num_simulations: int = 32,
+        exploration_constant: float = 1.4,
+        selection_rule: str = "puct",
+        parallel_simulations: int = 4,
+        beam_width: Optional[int] = None,
+        min_score: Optional[float] = None,
+        relative_threshold: Optional[float] = None,
+        prune_with_search_algorithm: bool = False,
+        scheduler: Any = None,
+        drafter: Any = None,
+        num_drafts: Optional[int] = None,
+        draft_accept_prob: float = 0.1,
+        metrics: Any = None
     ):
         """
         Initialize the ThoughtTree.
@@ -38,13 +81,77 @@ class ThoughtTree:
             max_branches: Maximum number of branches per thought
             max_depth: Maximum depth of the thought tree
             temperature: Sampling temperature for thought generation
+            tree_backend: Storage backend for the tree ('array' or 'networkx')
+            reuse_tree: Keep the tree between calls to ``solve`` with the same
+                prompt and continue expanding from its frontier instead of
+                rebuilding it
+            max_new_tokens: Maximum number of tokens per generated thought
+            generation_batch_size: Maximum number of frontier nodes expanded
+                in a single ``model.generate`` call; bounds peak memory
+            prefix_cache_bytes: If set, keep the ``past_key_values`` of expanded
+                nodes in an LRU cache of this many bytes so that children only
+                prefill their own tokens. Cached prefixes are not padded, so only
+                nodes with contexts of equal token length are generated in one
+                batch; this trades batching for shorter prefills
+            solver: 'bfs' expands every node level by level up to ``max_depth``;
+                'mcts' runs Monte Carlo Tree Search and only expands the
+                nodes its simulations select
+            num_simulations: Number of MCTS simulations, i.e. the expansion budget
+            exploration_constant: MCTS exploration weight
+            selection_rule: MCTS selection rule, 'uct' or 'puct'
+            parallel_simulations: MCTS simulations whose leaves are expanded
+                and evaluated together in one batch, using virtual loss
+            beam_width: If set, only the ``beam_width`` best nodes of each
+                level are expanded further (BFS solver)
+            min_score: If set, nodes scoring below this value are pruned
+            relative_threshold: If set, nodes scoring below this fraction of
+                the best score of their level are pruned
+            prune_with_search_algorithm: Let a ``search_algorithm`` that
+                provides ``select_indices`` (such as ``AdaptiveBeamSearch``)
+                choose which nodes of each level are kept; off by default, so
+                passing a search algorithm alone does not prune the tree
+            scheduler: Optional ``GenerationScheduler`` that generates thoughts
+                in batches shared with other sessions; ``model`` may then be
+                None and ``prefix_cache_bytes`` is ignored
+            drafter: Optional drafter such as ``NGramDrafter`` or
+                ``ModelDrafter``; enables draft-and-verify generation, where
+                the model scores cheap drafts in one batched pass and only
+                completes the surviving ones (see ``SpeculativeGenerator``);
+                ``prefix_cache_bytes`` is then ignored
+            num_drafts: Drafts per node; defaults to ``2 * max_branches``
+            draft_accept_prob: Minimum model probability of an accepted
+                draft token
+            metrics: Optional ``MetricsTracker`` receiving solve and per-depth
+                timings, node counts, model calls and generated tokens
         """
         self.model = model
         self.tokenizer = tokenizer
         self.max_branches = max_branches
         self.max_depth = max_depth
         self.temperature = temperature
-        self.tree = nx.DiGraph()
+        self.reuse_tree = reuse_tree
+        self.max_new_tokens = max_new_tokens
+        self.generation_batch_size = generation_batch_size
+        self.prefix_cache = PrefixCache(prefix_cache_bytes) if prefix_cache_bytes else None
+        self.solver = solver
+        self.num_simulations = num_simulations
+        self.exploration_constant = exploration_constant
+        self.selection_rule = selection_rule
+        self.parallel_simulations = parallel_simulations
+        self.beam_width = beam_width
+        self.min_score = min_score
+        self.relative_threshold = relative_threshold
+        self.prune_with_search_algorithm = prune_with_search_algorithm
+        self.num_pruned = 0
+        self.scheduler = scheduler
+        self.speculative = (
+            SpeculativeGenerator(drafter, num_drafts, draft_accept_prob, metrics)
+            if drafter is not None else None
+        )
+        self.metrics = metrics
+        self.tree: ThoughtStore = create_thought_store(tree_backend)
+        self._frontier: List[int] = []
+        self._dead_ends: List[int] = []
         
     def solve(
         self,
@@ -60,46 +167,359 @@ class ThoughtTree:
             prompt: The initial problem or question
             search_algorithm: Optional search algorithm to use
             expert_system: Optional expert feedback system
-            **kwargs: Additional arguments for customization
+            **kwargs: Additional arguments for customization; ``reuse_tree``
+                and ``solver`` override the instance settings for this call
             
         Returns:
             Dict containing the solution and reasoning path
         """
-        # Initialize the root thought
-        root_thought = Thought(
-            content=prompt,
-            score=1.0,
-            metadata={"depth": 0, "type": "root"}
+        if self.metrics is None:
+            return self._solve(prompt, search_algorithm, expert_system, **kwargs)
+        self.metrics.increment("solves")
+        with self.metrics.timer("solve_seconds"):
+            return self._solve(prompt, search_algorithm, expert_system, **kwargs)
+    
+    def _solve(
+        self,
+        prompt: str,
+        search_algorithm: Any = None,
+        expert_system: Any = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Run the configured solver; ``solve`` without the instrumentation."""
+        solver = kwargs.get("solver", self.solver)
+        if solver == "mcts":
+            self._reset(prompt)
+            return MCTSSolver(
+                self,
+                num_simulations=kwargs.get("num_simulations", self.num_simulations),
+                exploration_constant=self.exploration_constant,
+                selection_rule=self.selection_rule,
+                parallel_simulations=self.parallel_simulations
+            ).run(search_algorithm, expert_system)
+        if solver != "bfs":
+            raise ValueError(f"Unknown solver '{solver}', expected 'bfs' or 'mcts'")
+        
+        for _ in self._expand_levels(prompt, search_algorithm, expert_system, **kwargs):
+            pass
+        
+        # Find best solution path
+        return self._extract_solution()
+    
+    def solve_stream(
+        self,
+        prompt: str,
+        search_algorithm: Any = None,
+        expert_system: Any = None,
+        **kwargs
+    ) -> Iterator[SolveEvent]:
+        """
+        Solve a problem level by level, yielding events as the tree grows.
+        
+        After each level, a 'node_added' event is emitted for every new node, a
+        'score_updated' event for every node that received expert feedback, and
+        a 'best_so_far' event with the solution extracted from the tree so
+        far. A final 'done' event carries the same result ``solve`` returns.
+        
+        If the expert system merges human reviews asynchronously (see
+        ``ExpertFeedback.add_review_listener``), reviews merged while the
+        stream is open are reported as further 'score_updated' events for
+        nodes of earlier levels, before the next 'best_so_far' or 'done'.
+        
+        Closing the generator cancels the solve after the level in progress;
+        the tree keeps every completed level, so a later call with
+        ``reuse_tree=True`` continues where it stopped. Only the 'bfs' solver
+        can be streamed.
+        
+        Args:
+            prompt: The initial problem or question
+            search_algorithm: Optional search algorithm to use
+            expert_system: Optional expert feedback system
+            **kwargs: As for ``solve``
+            
+        Yields:
+            SolveEvent objects
+        """
+        for events in self._stream_levels(prompt, search_algorithm, expert_system, **kwargs):
+            yield from events
+    
+    async def solve_stream_async(
+        self,
+        prompt: str,
+        search_algorithm: Any = None,
+        expert_system: Any = None,
+        **kwargs
+    ) -> AsyncIterator[SolveEvent]:
+        """
+        Asynchronous variant of ``solve_stream``.
+        
+        Each level is computed in a worker thread so that the event loop stays
+        responsive. Cancelling the consuming task, or closing the iterator,
+        stops the solve once the level in progress completes.
+        """
+        levels = self._stream_levels(prompt, search_algorithm, expert_system, **kwargs)
+        executor = ThreadPoolExecutor(max_workers=1)
+        pending = None
+        try:
+            while True:
+                pending = executor.submit(next, levels, None)
+                events = await asyncio.wrap_future(pending)
+                if events is None:
+                    return
+                for event in events:
+                    yield event
+        finally:
+            if pending is not None and not pending.done():
+                # The level is still running in the worker; stop after it
+                pending.add_done_callback(lambda _: levels.close())
+            else:
+                levels.close()
+            executor.shutdown(wait=False)
+    
+    def _stream_levels(
+        self,
+        prompt: str,
+        search_algorithm: Any = None,
+        expert_system: Any = None,
+        **kwargs
+    ) -> Generator[List[SolveEvent], None, None]:
+        """Yield the events of each completed level, then the final result."""
+        if kwargs.get("solver", self.solver) != "bfs":
+            raise ValueError("solve_stream only supports the 'bfs' solver")
+        
+        # Feedback merged by reviewers, appended from their threads
+        merged: deque = deque()
+        
+        def listener(thought: Any, feedback: Any) -> None:
+            merged.append(feedback)
+        
+        subscribed = hasattr(expert_system, "add_review_listener")
+        if subscribed:
+            expert_system.add_review_listener(listener)
+        try:
+            node_by_feedback: Dict[int, int] = {}
+            for new_nodes in self._expand_levels(prompt, search_algorithm, expert_system, **kwargs):
+                # Reviews of this level are already reflected in its own events
+                events = self._merged_review_events(merged, node_by_feedback)
+                events.extend(self._level_events(new_nodes))
+                for node_id in new_nodes:
+                    feedback = self.tree.metadata(node_id).get("feedback")
+                    if feedback is not None:
+                        node_by_feedback[id(feedback)] = node_id
+                events.append(SolveEvent(type="best_so_far", result=self._extract_solution()))
+                yield events
+            
+            events = self._merged_review_events(merged, node_by_feedback)
+            events.append(SolveEvent(type="done", result=self._extract_solution()))
+            yield events
+        finally:
+            if subscribed:
+                expert_system.remove_review_listener(listener)
+    
+    def _level_events(self, new_nodes: List[int]) -> List[SolveEvent]:
+        """Events describing the nodes added at one level."""
+        events = []
+        for node_id in new_nodes:
+            events.append(SolveEvent(
+                type="node_added",
+                node_id=node_id,
+                parent_id=self.tree.parent(node_id),
+                depth=self.tree.depth(node_id),
+                content=self.tree.content(node_id),
+                score=self.tree.score(node_id)
+            ))
+        for node_id in new_nodes:
+            if self.tree.metadata(node_id).get("feedback") is not None:
+                events.append(self._score_event(node_id))
+        return events
+    
+    def _merged_review_events(self, merged: deque, node_by_feedback: Dict[int, int]) -> List[SolveEvent]:
+        """
+        Drain ``merged`` into 'score_updated' events.
+        
+        Args:
+            merged: Feedback objects whose human review was merged
+            node_by_feedback: Maps ``id(feedback)`` to the node it belongs to;
+                feedback of nodes not in it is skipped
+            
+        Returns:
+            One event per merged review of a known node
+        """
+        events = []
+        while merged:
+            node_id = node_by_feedback.get(id(merged.popleft()))
+            if node_id is not None:
+                events.append(self._score_event(node_id))
+        return events
+    
+    def _score_event(self, node_id: int) -> SolveEvent:
+        """'score_updated' event with the current value of ``node_id``."""
+        return SolveEvent(
+            type="score_updated",
+            node_id=node_id,
+            depth=self.tree.depth(node_id),
+            score=self._node_value(node_id)
         )
-        self.tree.add_node("root", thought=root_thought)
+    
+    def _expand_levels(
+        self,
+        prompt: str,
+        search_algorithm: Any = None,
+        expert_system: Any = None,
+        **kwargs
+    ) -> Iterator[List[int]]:
+        """
+        Grow the tree breadth-first up to ``max_depth``.
         
-        # Generate and explore thoughts
-        current_depth = 0
-        while current_depth < self.max_depth:
-            leaf_nodes = [n for n in self.tree.nodes() if self.tree.out_degree(n) == 0]
+        The frontier left by an MCTS solve may mix depths; its shallowest
+        nodes are expanded first, so the tree is completed level by level.
+        
+        Yields:
+            The ids of the nodes added at each level; the frontier is updated
+            before every yield
+        """
+        reuse_tree = kwargs.get("reuse_tree", self.reuse_tree)
+        if not (reuse_tree and len(self.tree) and self.tree.content(0) == prompt):
+            self._reset(prompt)
+        
+        # Generate and explore thoughts one level at a time
+        frontier = self._frontier
+        while frontier:
+            level_start = time.perf_counter()
+            depths = [self.tree.depth(node_id) for node_id in frontier]
+            depth = min(depths)
+            if depth >= self.max_depth:
+                break
+            level = [n for n, d in zip(frontier, depths) if d == depth]
+            deeper = [n for n, d in zip(frontier, depths) if d != depth]
+            next_frontier: List[int] = []
             
-            for node_id in leaf_nodes:
-                # Generate new thoughts
-                new_thoughts = self._generate_thoughts(
-                    self.tree.nodes[node_id]["thought"],
-                    search_algorithm
-                )
-                
-                # Add thoughts to tree
-                for i, thought in enumerate(new_thoughts):
-                    thought_id = f"{node_id}_{i}"
-                    self.tree.add_node(thought_id, thought=thought)
-                    self.tree.add_edge(node_id, thought_id)
-                    
-                    # Get expert feedback if available
-                    if expert_system:
-                        feedback = expert_system.evaluate(thought)
-                        self.tree.nodes[thought_id]["thought"].metadata["feedback"] = feedback
+            # Generate new thoughts for the whole level at once
+            children = self._expand_nodes(level, search_algorithm, expert_system)
+            for node_id, child_ids in zip(level, children):
+                if not child_ids:
+                    self._dead_ends.append(node_id)
+                next_frontier.extend(child_ids)
             
-            current_depth += 1
+            # Only the surviving nodes are expanded at the next level
+            frontier = deeper + self._prune_frontier(next_frontier, search_algorithm)
+            self._frontier = frontier
+            if self.metrics is not None:
+                self.metrics.observe(
+                    "level_seconds",
+                    time.perf_counter() - level_start,
+                    {"depth": depth + 1}
+                )
+            yield next_frontier
+    
+    def _expand_nodes(
+        self,
+        node_ids: List[int],
+        search_algorithm: Any = None,
+        expert_system: Any = None
+    ) -> List[range]:
+        """
+        Generate children for all ``node_ids`` in one batch and add them to the tree.
         
-        # Find best solution path
-        return self._extract_solution()
+        Returns:
+            The range of child ids added under each node
+        """
+        if self.metrics is not None:
+            self.metrics.increment("nodes_expanded", len(node_ids))
+        if self.prefix_cache is not None and self.scheduler is None and self.speculative is None:
+            generated = self._generate_thoughts_cached(node_ids)
+        else:
+            generated = self._generate_thoughts_batch(
+                [self._context(node_id) for node_id in node_ids],
+                [self.tree.depth(node_id) for node_id in node_ids],
+                search_algorithm
+            )
+        
+        children = []
+        for node_id, new_thoughts in zip(node_ids, generated):
+            # Add thoughts to tree
+            children.append(self.tree.add_children(node_id, new_thoughts))
+        
+        # Get expert feedback if available, for all new thoughts at once
+        if expert_system:
+            thought_ids = [i for child_ids in children for i in child_ids]
+            thoughts = [thought for new_thoughts in generated for thought in new_thoughts]
+            if hasattr(expert_system, "evaluate_batch"):
+                feedbacks = expert_system.evaluate_batch(thoughts)
+            else:
+                feedbacks = [expert_system.evaluate(thought) for thought in thoughts]
+            for thought_id, feedback in zip(thought_ids, feedbacks):
+                self.tree.update_metadata(thought_id, feedback=feedback)
+        return children
+    
+    def _prune_frontier(self, node_ids: List[int], search_algorithm: Any = None) -> List[int]:
+        """
+        Drop the nodes of a level that are not worth expanding.
+        
+        Nodes below ``min_score`` or ``relative_threshold`` times the best
+        score are removed first; the best node always survives. The rest are
+        narrowed down by the search algorithm's ``select_indices`` if it has
+        one, otherwise to the ``beam_width`` best.
+        
+        Returns:
+            The kept node ids in tree order
+        """
+        if not node_ids:
+            return node_ids
+        
+        values = np.array([self._node_value(n) for n in node_ids], dtype=np.float64)
+        keep = np.ones(len(node_ids), dtype=bool)
+        if self.min_score is not None:
+            keep &= values >= self.min_score
+        if self.relative_threshold is not None:
+            keep &= values >= self.relative_threshold * values.max()
+        keep[np.argmax(values)] = True
+        candidates = np.flatnonzero(keep)
+        
+        select = getattr(search_algorithm, "select_indices", None)
+        if self.prune_with_search_algorithm and callable(select):
+            parents = [self.tree.parent(node_ids[i]) for i in candidates]
+            selected = select(
+                [self.tree.content(node_ids[i]) for i in candidates],
+                values[candidates],
+                parent_scores=[self._node_value(p) for p in parents]
+            )
+            candidates = candidates[np.asarray(selected, dtype=np.int64)]
+        elif self.beam_width is not None and len(candidates) > self.beam_width:
+            # Stable sort so that ties keep the earlier node
+            order = np.argsort(-values[candidates], kind="stable")[:self.beam_width]
+            candidates = candidates[order]
+        
+        kept = [node_ids[i] for i in np.sort(candidates)]
+        self.num_pruned += len(node_ids) - len(kept)
+        if self.metrics is not None:
+            self.metrics.increment("nodes_pruned", len(node_ids) - len(kept))
+        return kept
+    
+    def _node_value(self, node_id: int) -> float:
+        """Value of a node: its expert feedback score if available, else its thought score."""
+        feedback = self.tree.metadata(node_id).get("feedback")
+        if feedback is not None:
+            return float(feedback.score)
+        return self.tree.score(node_id)
+    
+    def _reset(self, prompt: str) -> None:
+        """Discard the current tree and start a new one rooted at ``prompt``."""
+        self.tree.clear()
+        if self.prefix_cache is not None:
+            self.prefix_cache.clear()
+        root_thought = Thought(
+            content=prompt,
+            score=1.0,
+            metadata={"depth": 0, "type": "root"}
+        )
+        self._frontier = [self.tree.add_root(root_thought)]
+        self._dead_ends = []
+        self.num_pruned = 0
+    
+    def _context(self, node_id: int) -> str:
+        """Build the model input for a node: the prompt followed by its ancestor thoughts."""
+        return "\n".join(self.tree.content(n) for n in self.tree.path(node_id))
     
     def _generate_thoughts(
         self,
@@ -107,41 +527,167 @@ class ThoughtTree:
         search_algorithm: Any = None
     ) -> List[Thought]:
         """Generate new thoughts based on the parent thought."""
+        return self._generate_thoughts_batch(
+            [parent_thought.content],
+            [parent_thought.metadata["depth"]],
+            search_algorithm
+        )[0]
+    
+    def _generate_thoughts_batch(
+        self,
+        contexts: List[str],
+        depths: List[int],
+        search_algorithm: Any = None
+    ) -> List[List[Thought]]:
+        """
+        Generate ``max_branches`` child thoughts for each context.
+        
+        All contexts are sampled together, at most ``generation_batch_size``
+        per ``model.generate`` call, or handed to the scheduler if there is one.
+        With a drafter, drafts are verified and completed instead.
+        """
+        if self.scheduler is not None:
+            continuations = self.scheduler.generate(
+                contexts,
+                session=id(self),
+                num_return_sequences=self.max_branches,
+                temperature=self.temperature,
+                max_new_tokens=self.max_new_tokens
+            )
+            return self._to_thoughts(continuations, depths)
         if self.model is None:
             raise ValueError("Model must be set to generate thoughts")
-            
-        # Implementation would use the model to generate thoughts
-        # This is a placeholder for the actual implementation
-        thoughts = []
-        for i in range(self.max_branches):
-            thoughts.append(
-                Thought(
-                    content=f"Generated thought {i}",
-                    score=0.9 - (i * 0.1),
-                    metadata={"depth": parent_thought.metadata["depth"] + 1},
-                    parent_id=id(parent_thought)
+        if self.tokenizer is None:
+            raise ValueError("Tokenizer must be set to generate thoughts")
+        
+        if self.speculative is not None:
+            continuations = self.speculative.generate(
+                self.model,
+                self.tokenizer,
+                contexts,
+                num_branches=self.max_branches,
+                temperature=self.temperature,
+                max_new_tokens=self.max_new_tokens,
+                batch_size=self.generation_batch_size
+            )
+            return self._to_thoughts(continuations, depths)
+        continuations = generate_continuations(
+            self.model,
+            self.tokenizer,
+            contexts,
+            num_return_sequences=self.max_branches,
+            temperature=self.temperature,
+            max_new_tokens=self.max_new_tokens,
+            batch_size=self.generation_batch_size,
+            metrics=self.metrics
+        )
+        return self._to_thoughts(continuations, depths)
+    
+    @staticmethod
+    def _to_thoughts(
+        continuations: List[List[Tuple[str, float]]],
+        depths: List[int]
+    ) -> List[List[Thought]]:
+        """Wrap the sampled continuations of each context as child thoughts."""
+        return [
+            [
+                Thought(content=text, score=score, metadata={"depth": depth + 1})
+                for text, score in samples
+            ]
+            for samples, depth in zip(continuations, depths)
+        ]
+    
+    def _generate_thoughts_cached(self, node_ids: List[int]) -> List[List[Thought]]:
+        """
+        Generate children for each node, reusing the cached prefix of its parent.
+        
+        Prefixes are not padded, so only nodes whose contexts have the same
+        token length share a ``generate`` call (at most
+        ``generation_batch_size`` of them); the others are generated in
+        separate calls.
+        """
+        if self.model is None:
+            raise ValueError("Model must be set to generate thoughts")
+        if self.tokenizer is None:
+            raise ValueError("Tokenizer must be set to generate thoughts")
+        
+        # Group the nodes by context length, in order of first appearance
+        groups: Dict[Tuple[int, bool], List[Tuple[int, List[int], Any]]] = {}
+        for node_id in node_ids:
+            token_ids, past_key_values = self._prefix_state(node_id)
+            key = (len(token_ids), past_key_values is None)
+            groups.setdefault(key, []).append((node_id, token_ids, past_key_values))
+        
+        generated: Dict[int, List[Thought]] = {}
+        batch_size = max(1, self.generation_batch_size)
+        for group in groups.values():
+            for start in range(0, len(group), batch_size):
+                chunk = group[start:start + batch_size]
+                samples = generate_from_prefixes(
+                    self.model,
+                    self.tokenizer,
+                    [token_ids for _, token_ids, _ in chunk],
+                    [past_key_values for _, _, past_key_values in chunk],
+                    num_return_sequences=self.max_branches,
+                    temperature=self.temperature,
+                    max_new_tokens=self.max_new_tokens,
+                    metrics=self.metrics
                 )
+                for (node_id, _, _), node_samples in zip(chunk, samples):
+                    generated[node_id] = self._to_thoughts(
+                        [node_samples], [self.tree.depth(node_id)]
+                    )[0]
+        return [generated[node_id] for node_id in node_ids]
+    
+    def _prefix_state(self, node_id: int) -> Tuple[List[int], Any]:
+        """
+        Return the context token ids of a node and the cached keys/values for
+        all but its last token, prefilling only the tokens its parent lacks.
+        """
+        prefix_cache, tokenizer = self.prefix_cache, self.tokenizer
+        if prefix_cache is None or tokenizer is None:
+            raise ValueError("Prefix cache and tokenizer must be set to reuse prefixes")
+        parent = self.tree.parent(node_id)
+        parent_entry = prefix_cache.get(parent) if parent is not None else None
+        
+        if parent_entry is None:
+            token_ids = list(tokenizer(self._context(node_id))["input_ids"])
+            past_key_values = prefill(self.model, token_ids[:-1], metrics=self.metrics)
+        else:
+            new_ids = tokenizer(
+                "\n" + self.tree.content(node_id), add_special_tokens=False
+            )["input_ids"]
+            token_ids = parent_entry.token_ids + list(new_ids)
+            past_key_values = prefill(
+                self.model,
+                token_ids[len(parent_entry.token_ids) - 1:-1],
+                parent_entry.past_key_values,
+                metrics=self.metrics
             )
-        return thoughts
+        
+        prefix_cache.put(node_id, token_ids, past_key_values)
+        return token_ids, past_key_values
     
     def _extract_solution(self) -> Dict[str, Any]:
         """Extract the best solution path from the thought tree."""
-        # Find the highest scoring leaf node
-        leaf_nodes = [n for n in self.tree.nodes() if self.tree.out_degree(n) == 0]
-        best_leaf = max(
-            leaf_nodes,
-            key=lambda n: self.tree.nodes[n]["thought"].score
-        )
+        # Find the highest scoring leaf node; leaves are the final frontier
+        # plus nodes that produced no children. Leaves are ranked by the same
+        # value as pruning, i.e. expert feedback where available
+        leaf_nodes = np.sort(np.asarray(self._frontier + self._dead_ends, dtype=np.int64))
+        values = [self._node_value(int(n)) for n in leaf_nodes]
+        best = int(np.argmax(values))
+        best_leaf = int(leaf_nodes[best])
         
         # Trace path back to root
-        path = nx.shortest_path(self.tree, "root", best_leaf)
-        solution_path = [
-            self.tree.nodes[n]["thought"].content
-            for n in path
-        ]
+        path = self.tree.path(best_leaf)
+        solution_path = [self.tree.content(n) for n in path]
         
         return {
-            "solution": self.tree.nodes[best_leaf]["thought"].content,
+            "solution": self.tree.content(best_leaf),
             "reasoning_path": solution_path,
-            "confidence": self.tree.nodes[best_leaf]["thought"].score
-        } 
\ No newline at end of file
+            "confidence": values[best]
+        }
+    
+    def to_networkx(self) -> Any:
+        """Export the current thought tree as a ``networkx.DiGraph``."""
+        return self.tree.to_networkx() 
\ No newline at end of file
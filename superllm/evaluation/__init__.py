@@ -0,0 +1,7 @@
+"""
+Evaluation and instrumentation utilities for SuperLLM.
+"""
+
+from .metrics import MetricsTracker
+
+__all__ = ["MetricsTracker"]
@@ -0,0 +1,227 @@
+"""
+Metrics tracking for SuperLLM runs.
+"""
+
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Any, Dict, Optional, Sequence, Tuple
+import json
+import math
+import time
+
+# Upper bounds, in seconds, suited to latencies from a cache hit to a long solve
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+_NULL_TIMER = nullcontext()
+
+MetricKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram with count, sum, min and max.
+    """
+
+    __slots__ = ("bounds", "bucket_counts", "count", "sum", "min", "max")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(bounds))
+        # One extra bucket for values above the largest bound
+        self.bucket_counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float) -> None:
+        self.bucket_counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "buckets": {
+                _format_bound(bound): count
+                for bound, count in zip(self.bounds + (math.inf,), self.bucket_counts)
+            }
+        }
+
+
+class _Timer:
+    """Context manager observing its wall time in a histogram."""
+
+    __slots__ = ("tracker", "name", "labels", "start")
+
+    def __init__(self, tracker: "MetricsTracker", name: str, labels: Optional[Dict[str, Any]]):
+        self.tracker = tracker
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.tracker.observe(self.name, time.perf_counter() - self.start, self.labels)
+
+
+class MetricsTracker:
+    """
+    Low-overhead counters and histograms for instrumenting SuperLLM runs.
+
+    Components such as ``ThoughtTree``, ``AdaptiveBeamSearch`` and
+    ``ExpertFeedback`` accept a tracker and report model calls, generated
+    tokens, latencies, cache hits and node counts to it. Metrics can carry
+    labels, e.g. the depth of a tree level. A disabled tracker returns from
+    every call immediately, and components skip instrumentation entirely when
+    no tracker is given.
+
+    Metrics are exported with ``to_json`` or, in the Prometheus text
+    exposition format, with ``to_prometheus``.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        histogram_buckets: Optional[Dict[str, Sequence[float]]] = None
+    ):
+        """
+        Initialize the tracker.
+
+        Args:
+            enabled: Whether metrics are recorded
+            buckets: Default histogram bucket upper bounds
+            histogram_buckets: Bucket bounds for specific histograms, by name
+        """
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.histogram_buckets = dict(histogram_buckets or {})
+        self.counters: Dict[MetricKey, float] = {}
+        self.histograms: Dict[MetricKey, Histogram] = {}
+
+    def increment(self, name: str, value: float = 1, labels: Optional[Dict[str, Any]] = None) -> None:
+        """Add ``value`` to the counter ``name``."""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, Any]] = None) -> None:
+        """Record an observation of ``name``, e.g. a latency or a batch size."""
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram(
+                self.histogram_buckets.get(name, self.buckets)
+            )
+        histogram.observe(float(value))
+
+    def timer(self, name: str, labels: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Context manager recording the wall time of its block in the histogram ``name``.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def counter(self, name: str, labels: Optional[Dict[str, Any]] = None) -> float:
+        """Current value of a counter, 0 if it was never incremented."""
+        return self.counters.get((name, _label_key(labels)), 0)
+
+    def histogram(self, name: str, labels: Optional[Dict[str, Any]] = None) -> Optional[Histogram]:
+        """The histogram ``name``, or None if nothing was observed."""
+        return self.histograms.get((name, _label_key(labels)))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get all counters and histograms, keyed by ``name{label="value"}``."""
+        return {
+            "counters": {
+                _format_key(key): value for key, value in sorted(self.counters.items())
+            },
+            "histograms": {
+                _format_key(key): histogram.to_dict()
+                for key, histogram in sorted(self.histograms.items())
+            }
+        }
+
+    def to_json(self, **kwargs) -> str:
+        """Serialize ``get_metrics`` as JSON."""
+        return json.dumps(self.get_metrics(), **kwargs)
+
+    def to_prometheus(self, prefix: str = "superllm_") -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Counters get the suffix ``_total``; histograms are exported with
+        cumulative ``_bucket`` series and ``_sum`` and ``_count``.
+        """
+        lines = []
+        typed = set()
+        for (name, labels), value in sorted(self.counters.items()):
+            metric = f"{prefix}{name}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_format_labels(labels)} {_format_value(value)}")
+
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            metric = f"{prefix}{name}"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.bounds + (math.inf,), histogram.bucket_counts):
+                cumulative += count
+                bucket_labels = labels + (("le", _format_bound(bound)),)
+                lines.append(f"{metric}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Discard all collected metrics."""
+        self.counters.clear()
+        self.histograms.clear()
+
+
+def _label_key(labels: Optional[Dict[str, Any]]) -> Tuple[Tuple[str, str], ...]:
+    if not labels:
+        return ()
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (k, v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for k, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _format_key(key: MetricKey) -> str:
+    return key[0] + _format_labels(key[1])
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == math.inf else repr(float(bound))
+
+
+def _format_value(value: float) -> str:
+    return repr(value) if isinstance(value, float) else str(value)
@@ -2,6 +2,30 @@
 Search algorithms for enhanced LLM exploration.
 """
 
-from .beam_search import AdaptiveBeamSearch
+from typing import TYPE_CHECKING
+import importlib
 
-__all__ = ["AdaptiveBeamSearch"] 
\ No newline at end of file
+__all__ = ["AdaptiveBeamSearch", "BestFirstSearch", "SearchProgress"]
+
+_LAZY_IMPORTS = {
+    "AdaptiveBeamSearch": ".beam_search",
+    "SearchProgress": ".beam_search",
+    "BestFirstSearch": ".best_first",
+}
+
+if TYPE_CHECKING:
+    from .beam_search import AdaptiveBeamSearch, SearchProgress
+    from .best_first import BestFirstSearch
+
+
+def __getattr__(name):
+    module = _LAZY_IMPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
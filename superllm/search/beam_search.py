@@ -2,10 +2,17 @@
 Implementation of adaptive beam search for LLM exploration.
 """
 
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, AsyncIterator, Deque, Iterator, Optional, Tuple
+from collections import deque
+from concurrent.futures import Executor
+import inspect
+import time
 import numpy as np
 from dataclasses import dataclass
-from queue import PriorityQueue
+
+from ..cache import LRUCache, stable_hash
+from ..stats import RunningStats
+from .executors import async_bounded_map, bounded_map
 
 @dataclass
 class BeamNode:
@@ -16,6 +23,17 @@ class BeamNode:
     depth: int
     metadata: Dict[str, Any]
 
+@dataclass
+class SearchProgress:
+    """Anytime snapshot of a running search, reported after every step."""
+    step: int
+    path: List[Any]
+    score: float
+    beam_width: int
+    score_calls: int
+    elapsed: float
+    stop_reason: Optional[str] = None
+
 class AdaptiveBeamSearch:
     """
     Implements an adaptive beam search algorithm that dynamically adjusts
@@ -29,7 +47,23 @@ class AdaptiveBeamSearch:
         min_beam_width: int = 2,
         adaptation_rate: float = 0.1,
         max_steps: int = 10,
-        diversity_weight: float = 0.3
+        diversity_weight: float = 0.3,
+        executor: Optional[Executor] = None,
+        max_in_flight: Optional[int] = None,
+        embedding_fn: Optional[callable] = None,
+        selection: str = "topk",
+        state_key_fn: Optional[callable] = None,
+        cache_size: int = 10000,
+        cache_ttl: Optional[float] = None,
+        prune_transpositions: bool = False,
+        goal_fn: Optional[callable] = None,
+        patience: Optional[int] = None,
+        min_improvement: float = 0.0,
+        time_budget: Optional[float] = None,
+        max_score_calls: Optional[int] = None,
+        history_mode: str = "full",
+        summary_window: int = 1000,
+        metrics: Any = None
     ):
         """
         Initialize the adaptive beam search.
@@ -41,20 +75,90 @@ class AdaptiveBeamSearch:
             adaptation_rate: Rate at which beam width adapts
             max_steps: Maximum number of search steps
             diversity_weight: Weight given to diversity in scoring
+            executor: Optional ``concurrent.futures`` executor (thread or process
+                pool) used to expand and score the whole beam concurrently
+            max_in_flight: Maximum number of concurrently pending expand/score
+                calls; unbounded if None
+            embedding_fn: Optional function mapping a state to a vector; enables
+                the diversity bonus based on cosine similarity to the beam
+            selection: How the next beam is chosen from the candidates: 'topk'
+                (highest blended score) or 'mmr' (greedy maximal marginal
+                relevance, requires ``embedding_fn``)
+            state_key_fn: Optional function mapping a state to a hashable key used
+                for deduplication and caching; defaults to a stable content hash
+            cache_size: Maximum number of memoized ``score_fn`` and ``expand_fn``
+                results each; 0 disables memoization
+            cache_ttl: Seconds after which memoized results expire
+            prune_transpositions: Drop candidates whose state was already reached
+                at an earlier step of the same search
+            goal_fn: Optional predicate on states; the search stops as soon as
+                a beam contains a goal state and returns the best goal state
+            patience: Stop after this many consecutive steps without the best
+                score improving by more than ``min_improvement``
+            min_improvement: Minimum gain in best score that resets ``patience``
+            time_budget: Wall-clock budget in seconds, checked after every step
+            max_score_calls: Budget of scored states (cache misses), checked
+                after every step
+            history_mode: What is kept about past steps: 'full' keeps every beam
+                in ``search_history``; 'summary' keeps a per-step summary of the
+                last ``summary_window`` steps; 'off' keeps only running aggregates.
+                Statistics are available in all modes.
+            summary_window: Number of step summaries kept in 'summary' mode
+            metrics: Optional ``MetricsTracker`` receiving search and step
+                timings, score function latency and cache hits
         """
+        if history_mode not in ("full", "summary", "off"):
+            raise ValueError(
+                f"Unknown history_mode '{history_mode}', expected 'full', 'summary' or 'off'"
+            )
+        if selection not in ("topk", "mmr"):
+            raise ValueError(f"Unknown selection '{selection}', expected 'topk' or 'mmr'")
         self.beam_width = initial_beam_width
         self.max_beam_width = max_beam_width
         self.min_beam_width = min_beam_width
         self.adaptation_rate = adaptation_rate
         self.max_steps = max_steps
         self.diversity_weight = diversity_weight
+        self.executor = executor
+        self.max_in_flight = max_in_flight
+        self.embedding_fn = embedding_fn
+        self.selection = selection
+        self.state_key_fn = state_key_fn
+        self.prune_transpositions = prune_transpositions
+        self.score_cache = LRUCache(cache_size, cache_ttl)
+        self.expand_cache = LRUCache(cache_size, cache_ttl)
+        self.transpositions = 0
+        self._cached_functions: Tuple[Any, ...] = ()
+        self._transposition_table: Dict[Any, int] = {}
+        self._embedding_cache: Dict[Any, np.ndarray] = {}
+        # Scores set by update_score; unlike the caches, never evicted or cleared
+        self.score_overrides: Dict[Any, float] = {}
+        self._live_beam: List[BeamNode] = []
+        self.goal_fn = goal_fn
+        self.patience = patience
+        self.min_improvement = min_improvement
+        self.time_budget = time_budget
+        self.max_score_calls = max_score_calls
+        self.stop_reason: Optional[str] = None
+        self._search_start = 0.0
+        self._score_calls = 0
+        self._best_score = -np.inf
+        self._stale_steps = 0
+        self.history_mode = history_mode
         self.search_history: List[List[BeamNode]] = []
+        self.step_summaries: Deque[Dict[str, Any]] = deque(maxlen=summary_window)
+        self.score_stats = RunningStats()
+        self.beam_width_stats = RunningStats()
+        self.num_steps = 0
+        self.metrics = metrics
         
     def search(
         self,
         initial_state: Any,
-        score_fn: callable,
-        expand_fn: callable,
+        score_fn: Optional[callable] = None,
+        expand_fn: Optional[callable] = None,
+        score_batch_fn: Optional[callable] = None,
+        callback: Optional[callable] = None,
         **kwargs
     ) -> Tuple[List[Any], float]:
         """
@@ -64,64 +168,579 @@ class AdaptiveBeamSearch:
             initial_state: Starting state for the search
             score_fn: Function to score states
             expand_fn: Function to generate next states
+            score_batch_fn: Optional function scoring a list of states at once and
+                returning an array of scores; used instead of ``score_fn``
+            callback: Optional function called with a ``SearchProgress`` after
+                every step; returning a truthy value stops the search
             **kwargs: Additional arguments for scoring/expansion
             
         Returns:
             Tuple of (best path, score)
         """
+        if self.metrics is not None:
+            self.metrics.increment("searches")
+            search_start = time.perf_counter()
+        progress = None
+        for progress in self.iter_search(initial_state, score_fn, expand_fn, score_batch_fn):
+            if callback is not None and callback(progress):
+                self._stop_early(progress, "callback")
+                break
+        if self.metrics is not None:
+            self.metrics.observe("search_seconds", time.perf_counter() - search_start)
+        return progress.path, progress.score
+    
+    def iter_search(
+        self,
+        initial_state: Any,
+        score_fn: Optional[callable] = None,
+        expand_fn: Optional[callable] = None,
+        score_batch_fn: Optional[callable] = None,
+        **kwargs
+    ) -> Iterator[SearchProgress]:
+        """
+        Run the search as a generator yielding the current best path after every step.
+        
+        The first item describes the root; the last item has ``stop_reason``
+        set. Callers with a deadline can stop iterating at any time and use
+        the latest ``SearchProgress``.
+        
+        Args:
+            initial_state: Starting state for the search
+            score_fn: Function to score states
+            expand_fn: Function to generate next states
+            score_batch_fn: Optional function scoring a list of states at once
+            **kwargs: Additional arguments for scoring/expansion
+            
+        Yields:
+            SearchProgress snapshots
+        """
+        self._begin_search(score_fn, expand_fn, score_batch_fn)
+        
+        def score_states(states: List[Any]) -> np.ndarray:
+            if self.metrics is None or not states:
+                return self._score_states(states, score_fn, score_batch_fn)
+            self.metrics.increment("states_scored", len(states))
+            with self.metrics.timer("score_seconds"):
+                return self._score_states(states, score_fn, score_batch_fn)
+        
         # Initialize beam with root node
+        root_key = self._state_key(initial_state)
         current_beam = [
             BeamNode(
                 state=initial_state,
-                score=score_fn(initial_state),
+                score=float(self._cached_scores([initial_state], [root_key], score_states)[0]),
                 parent=None,
                 depth=0,
-                metadata={}
+                metadata={"state_key": root_key}
             )
         ]
+        self._transposition_table[root_key] = 0
+        self._live_beam = current_beam
+        progress = self._progress(0, current_beam, self._initial_stop_reason())
+        yield progress
+        if progress.stop_reason:
+            return
         
         for step in range(self.max_steps):
-            # Generate candidates
-            candidates = PriorityQueue()
-            for node in current_beam:
-                next_states = expand_fn(node.state)
-                for next_state in next_states:
-                    score = self._compute_score(
-                        next_state,
-                        score_fn,
-                        current_beam,
-                        **kwargs
-                    )
-                    candidates.put(
-                        (-score,  # Negative for max-heap
-                        BeamNode(
-                            state=next_state,
-                            score=score,
-                            parent=node,
-                            depth=step + 1,
-                            metadata={"parent_score": node.score}
-                        ))
-                    )
+            step_start = time.perf_counter()
+            # Expand and score the whole beam, fanning out over the executor
+            expansions = self._cached_expansions(
+                current_beam, lambda states: self._map(expand_fn, states)
+            )
+            parents, states, keys = self._collect_candidates(current_beam, expansions, step)
+            base_scores = self._cached_scores(states, keys, score_states)
+            
+            if self.metrics is not None:
+                self.metrics.increment("beam_nodes_expanded", len(current_beam))
+            next_beam = self._advance(current_beam, parents, states, keys, base_scores, step)
+            current_beam, stop_reason = self._after_step(step, current_beam, next_beam)
+            self._live_beam = current_beam
+            if self.metrics is not None:
+                self.metrics.increment("beam_candidates", len(states))
+                self.metrics.observe("beam_step_seconds", time.perf_counter() - step_start)
             
-            # Select next beam
-            next_beam = []
-            seen_states = set()
-            while len(next_beam) < self.beam_width and not candidates.empty():
-                _, node = candidates.get()
-                state_hash = hash(str(node.state))
-                if state_hash not in seen_states:
-                    next_beam.append(node)
-                    seen_states.add(state_hash)
+            yield self._progress(step + 1, current_beam, stop_reason)
+            if stop_reason:
+                return
+    
+    async def async_search(
+        self,
+        initial_state: Any,
+        score_fn: Optional[callable] = None,
+        expand_fn: Optional[callable] = None,
+        score_batch_fn: Optional[callable] = None,
+        callback: Optional[callable] = None,
+        **kwargs
+    ) -> Tuple[List[Any], float]:
+        """
+        Perform adaptive beam search with coroutine expand and score functions.
+        
+        All expansions of a step, and then all scores, are awaited concurrently
+        with at most ``max_in_flight`` calls running at once.
+        
+        Args:
+            initial_state: Starting state for the search
+            score_fn: Async function to score states
+            expand_fn: Async function to generate next states
+            score_batch_fn: Optional (async) function scoring a list of states at once
+            callback: Optional function called with a ``SearchProgress`` after
+                every step; returning a truthy value stops the search
+            **kwargs: Additional arguments for scoring/expansion
+            
+        Returns:
+            Tuple of (best path, score)
+        """
+        if self.metrics is not None:
+            self.metrics.increment("searches")
+            search_start = time.perf_counter()
+        progress = None
+        steps = self._async_iter_search(initial_state, score_fn, expand_fn, score_batch_fn)
+        try:
+            async for progress in steps:
+                if callback is not None and callback(progress):
+                    self._stop_early(progress, "callback")
+                    break
+        finally:
+            await steps.aclose()
+        if self.metrics is not None:
+            self.metrics.observe("search_seconds", time.perf_counter() - search_start)
+        return progress.path, progress.score
+    
+    async def _async_iter_search(
+        self,
+        initial_state: Any,
+        score_fn: Optional[callable],
+        expand_fn: Optional[callable],
+        score_batch_fn: Optional[callable]
+    ) -> AsyncIterator[SearchProgress]:
+        """Asynchronous counterpart of ``iter_search`` used by ``async_search``."""
+        self._begin_search(score_fn, expand_fn, score_batch_fn)
+        
+        async def score_states(states: List[Any]) -> np.ndarray:
+            if not states:
+                return np.empty(0)
+            if score_batch_fn is None:
+                return np.asarray(
+                    await async_bounded_map(score_fn, states, self.max_in_flight),
+                    dtype=np.float64
+                )
+            scores = score_batch_fn(states)
+            if inspect.isawaitable(scores):
+                scores = await scores
+            return self._as_score_array(scores, len(states))
+        
+        async def cached_scores(states: List[Any], keys: List[Any]) -> np.ndarray:
+            scores, missing = self._lookup_scores(keys)
+            self._count_cache_lookups(len(keys), len(missing))
+            computed = await score_states([states[i] for i in missing])
+            self._score_calls += len(missing)
+            self._fill(self.score_cache, keys, scores, missing, computed.tolist())
+            return np.asarray(scores, dtype=np.float64)
+        
+        root_key = self._state_key(initial_state)
+        current_beam = [
+            BeamNode(
+                state=initial_state,
+                score=float((await cached_scores([initial_state], [root_key]))[0]),
+                parent=None,
+                depth=0,
+                metadata={"state_key": root_key}
+            )
+        ]
+        self._transposition_table[root_key] = 0
+        self._live_beam = current_beam
+        progress = self._progress(0, current_beam, self._initial_stop_reason())
+        yield progress
+        if progress.stop_reason:
+            return
+        
+        for step in range(self.max_steps):
+            keys = [node.metadata["state_key"] for node in current_beam]
+            expansions, missing = self._lookup(self.expand_cache, keys)
+            computed = await async_bounded_map(
+                expand_fn, [current_beam[i].state for i in missing], self.max_in_flight
+            )
+            # expand_fn may return any iterable; cache a list that can be re-read
+            computed = [list(children) for children in computed]
+            self._fill(self.expand_cache, keys, expansions, missing, computed)
             
-            # Adapt beam width based on progress
-            self._adapt_beam_width(next_beam)
+            parents, states, keys = self._collect_candidates(current_beam, expansions, step)
+            base_scores = await cached_scores(states, keys)
             
-            # Store search history
-            self.search_history.append(next_beam)
-            current_beam = next_beam
+            next_beam = self._advance(current_beam, parents, states, keys, base_scores, step)
+            current_beam, stop_reason = self._after_step(step, current_beam, next_beam)
+            self._live_beam = current_beam
             
-        # Return best path
-        return self._extract_best_path(current_beam)
+            yield self._progress(step + 1, current_beam, stop_reason)
+            if stop_reason:
+                return
+    
+    def _begin_search(
+        self,
+        score_fn: Optional[callable],
+        expand_fn: Optional[callable],
+        score_batch_fn: Optional[callable]
+    ) -> None:
+        """Validate the search functions and reset per-search state."""
+        self._check_functions(score_fn, expand_fn, score_batch_fn)
+        functions = (score_fn, expand_fn, score_batch_fn)
+        if functions != self._cached_functions:
+            # Memoized results are only valid for the functions that produced them
+            self.score_cache.clear()
+            self.expand_cache.clear()
+            self._cached_functions = functions
+        self._transposition_table = {}
+        self._embedding_cache = {}
+        self.stop_reason = None
+        self._search_start = time.monotonic()
+        self._score_calls = 0
+        self._best_score = -np.inf
+        self._stale_steps = 0
+    
+    def _initial_stop_reason(self) -> Optional[str]:
+        return "max_steps" if self.max_steps <= 0 else None
+    
+    def _after_step(
+        self,
+        step: int,
+        current_beam: List[BeamNode],
+        next_beam: List[BeamNode]
+    ) -> Tuple[List[BeamNode], Optional[str]]:
+        """
+        Decide whether the search should stop after ``step``.
+        
+        Returns:
+            Tuple of (beam to continue from, stop reason or None)
+        """
+        if not next_beam:
+            # Every state in the beam is terminal; keep the last non-empty beam
+            return current_beam, "exhausted"
+        
+        best_score = max(node.score for node in next_beam)
+        if best_score > self._best_score + self.min_improvement:
+            self._best_score = best_score
+            self._stale_steps = 0
+        else:
+            self._stale_steps += 1
+        
+        if self.goal_fn is not None and any(self.goal_fn(node.state) for node in next_beam):
+            return next_beam, "goal"
+        if (
+            [node.metadata["state_key"] for node in next_beam]
+            == [node.metadata.get("state_key") for node in current_beam]
+        ):
+            return next_beam, "converged"
+        if self.patience is not None and self._stale_steps >= self.patience:
+            return next_beam, "patience"
+        if self.time_budget is not None and time.monotonic() - self._search_start >= self.time_budget:
+            return next_beam, "time_budget"
+        if self.max_score_calls is not None and self._score_calls >= self.max_score_calls:
+            return next_beam, "score_budget"
+        if step + 1 >= self.max_steps:
+            return next_beam, "max_steps"
+        return next_beam, None
+    
+    def _progress(
+        self,
+        step: int,
+        beam: List[BeamNode],
+        stop_reason: Optional[str] = None
+    ) -> SearchProgress:
+        """Snapshot the current answer: the best goal node if any, else the best node."""
+        candidates = beam
+        if self.goal_fn is not None:
+            candidates = [node for node in beam if self.goal_fn(node.state)] or beam
+        path, score = self._extract_best_path(candidates)
+        if stop_reason:
+            self.stop_reason = stop_reason
+        return SearchProgress(
+            step=step,
+            path=path,
+            score=score,
+            beam_width=len(beam),
+            score_calls=self._score_calls,
+            elapsed=time.monotonic() - self._search_start,
+            stop_reason=stop_reason
+        )
+    
+    def _stop_early(self, progress: SearchProgress, reason: str) -> None:
+        progress.stop_reason = reason
+        self.stop_reason = reason
+    
+    def _state_key(self, state: Any) -> Any:
+        """Key identifying a state for deduplication and caching."""
+        if self.state_key_fn is not None:
+            return self.state_key_fn(state)
+        return stable_hash(state)
+    
+    @staticmethod
+    def _lookup(cache: LRUCache, keys: List[Any]) -> Tuple[List[Any], List[int]]:
+        """Return cached values for ``keys`` (None where missing) and the missing positions."""
+        values, missing = [], []
+        for i, key in enumerate(keys):
+            value = cache.get(key)
+            if value is None:
+                missing.append(i)
+            values.append(value)
+        return values, missing
+    
+    def _lookup_scores(self, keys: List[Any]) -> Tuple[List[Any], List[int]]:
+        """Like ``_lookup`` on the score cache, but overridden scores take precedence."""
+        scores, missing = self._lookup(self.score_cache, keys)
+        if self.score_overrides:
+            for i, key in enumerate(keys):
+                override = self.score_overrides.get(key)
+                if override is not None:
+                    scores[i] = override
+            missing = [i for i in missing if scores[i] is None]
+        return scores, missing
+    
+    @staticmethod
+    def _fill(
+        cache: LRUCache,
+        keys: List[Any],
+        values: List[Any],
+        missing: List[int],
+        computed: List[Any]
+    ) -> None:
+        """Insert freshly computed values into ``values`` and the cache."""
+        for i, value in zip(missing, computed):
+            values[i] = value
+            cache.put(keys[i], value)
+    
+    def _cached_scores(
+        self,
+        states: List[Any],
+        keys: List[Any],
+        score_states: callable
+    ) -> np.ndarray:
+        """Score states, only calling the scorer for states not in the memo cache."""
+        scores, missing = self._lookup_scores(keys)
+        self._count_cache_lookups(len(keys), len(missing))
+        computed = score_states([states[i] for i in missing])
+        self._score_calls += len(missing)
+        self._fill(self.score_cache, keys, scores, missing, computed.tolist())
+        return np.asarray(scores, dtype=np.float64)
+    
+    def _count_cache_lookups(self, lookups: int, misses: int) -> None:
+        if self.metrics is not None:
+            self.metrics.increment("cache_hits", lookups - misses, {"cache": "beam_score"})
+            self.metrics.increment("cache_misses", misses, {"cache": "beam_score"})
+    
+    def _cached_expansions(
+        self,
+        current_beam: List[BeamNode],
+        expand_states: callable
+    ) -> List[List[Any]]:
+        """Expand the beam, only calling ``expand_fn`` for states not in the memo cache."""
+        keys = [node.metadata["state_key"] for node in current_beam]
+        expansions, missing = self._lookup(self.expand_cache, keys)
+        computed = expand_states([current_beam[i].state for i in missing])
+        # expand_fn may return any iterable; cache a list that can be re-read
+        computed = [list(children) for children in computed]
+        self._fill(self.expand_cache, keys, expansions, missing, computed)
+        return expansions
+    
+    def _collect_candidates(
+        self,
+        current_beam: List[BeamNode],
+        expansions: List[List[Any]],
+        step: int
+    ) -> Tuple[List[BeamNode], List[Any], List[Any]]:
+        """
+        Pair every expanded state with the beam node it came from.
+        
+        States reached along several paths in the same step are merged into
+        the first occurrence, i.e. the one from the best-scoring parent, before
+        any scoring happens. States first reached at an earlier step are
+        dropped when ``prune_transpositions`` is set.
+        """
+        parents, states, keys = [], [], []
+        seen_this_step = set()
+        for node, next_states in zip(current_beam, expansions):
+            for next_state in next_states:
+                key = self._state_key(next_state)
+                if key in seen_this_step:
+                    self.transpositions += 1
+                    continue
+                first_step = self._transposition_table.get(key)
+                if first_step is None:
+                    self._transposition_table[key] = step + 1
+                elif first_step <= step:
+                    self.transpositions += 1
+                    if self.prune_transpositions:
+                        continue
+                seen_this_step.add(key)
+                parents.append(node)
+                states.append(next_state)
+                keys.append(key)
+        return parents, states, keys
+    
+    @staticmethod
+    def _check_functions(
+        score_fn: Optional[callable],
+        expand_fn: Optional[callable],
+        score_batch_fn: Optional[callable]
+    ) -> None:
+        if expand_fn is None:
+            raise ValueError("expand_fn is required")
+        if score_fn is None and score_batch_fn is None:
+            raise ValueError("Either score_fn or score_batch_fn is required")
+    
+    def _map(self, fn: callable, items: List[Any]) -> List[Any]:
+        """Apply ``fn`` to all items in order, on the executor if one is set."""
+        return bounded_map(fn, items, self.executor, self.max_in_flight)
+    
+    def _score_states(
+        self,
+        states: List[Any],
+        score_fn: Optional[callable],
+        score_batch_fn: Optional[callable]
+    ) -> np.ndarray:
+        """Score all states with one batch call, or one ``score_fn`` call each."""
+        if not states:
+            return np.empty(0)
+        if score_batch_fn is not None:
+            return self._as_score_array(score_batch_fn(states), len(states))
+        return np.asarray(self._map(score_fn, states), dtype=np.float64)
+    
+    @staticmethod
+    def _as_score_array(scores: Any, expected: int) -> np.ndarray:
+        scores = np.asarray(scores, dtype=np.float64).reshape(-1)
+        if scores.shape[0] != expected:
+            raise ValueError(
+                f"score_batch_fn returned {scores.shape[0]} scores for {expected} states"
+            )
+        return scores
+    
+    def _advance(
+        self,
+        current_beam: List[BeamNode],
+        parents: List[BeamNode],
+        states: List[Any],
+        keys: List[Any],
+        base_scores: np.ndarray,
+        step: int
+    ) -> List[BeamNode]:
+        """Turn the scored, deduplicated candidates of one step into the next beam."""
+        if not states:
+            return []
+        k = int(np.ceil(self.beam_width))
+        embeddings = None
+        if self.embedding_fn is not None and states:
+            embeddings = self._embed(states, keys)
+        
+        # Fold in the diversity bonus for all candidates at once
+        scores = self._combine_scores(states, base_scores, current_beam, embeddings)
+        
+        # Select next beam
+        if self.selection == "mmr" and embeddings is not None:
+            selected = self._select_mmr(base_scores, embeddings, k)
+        else:
+            selected = self._select_top(scores, k)
+        next_beam = [
+            BeamNode(
+                state=states[i],
+                score=float(scores[i]),
+                parent=parents[i],
+                depth=step + 1,
+                metadata={
+                    "parent_score": parents[i].score,
+                    "state_key": keys[i],
+                    "base_score": float(base_scores[i])
+                }
+            )
+            for i in selected
+        ]
+        
+        # Adapt beam width based on progress
+        self._adapt_beam_width(next_beam)
+        
+        # Store search history
+        self._record_step(step, next_beam)
+        return next_beam
+    
+    def _record_step(self, step: int, beam: List[BeamNode]) -> None:
+        """
+        Fold a finished step into the running aggregates.
+        
+        Only 'full' history keeps references to the beam, so in the other modes
+        nodes that drop out of the beam are released as soon as no live node
+        descends from them.
+        """
+        step_scores = RunningStats()
+        step_scores.update_many(node.score for node in beam)
+        self.score_stats.merge(step_scores)
+        self.beam_width_stats.update(len(beam))
+        self.num_steps += 1
+        
+        if self.history_mode == "full":
+            self.search_history.append(beam)
+        elif self.history_mode == "summary":
+            self.step_summaries.append({
+                "step": step + 1,
+                "beam_width": len(beam),
+                "mean_score": step_scores.mean,
+                "max_score": step_scores.max
+            })
+    
+    def _select_top(self, scores: np.ndarray, k: int) -> List[int]:
+        """
+        Return the indices of the ``k`` best-scoring candidates.
+        
+        Uses ``np.argpartition`` so only the selected candidates are sorted.
+        Ties are broken by candidate order.
+        """
+        n = len(scores)
+        if n == 0 or k <= 0:
+            return []
+        if k < n:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(n)
+        return top[np.lexsort((top, -scores[top]))].tolist()
+    
+    def _select_mmr(
+        self,
+        base_scores: np.ndarray,
+        embeddings: np.ndarray,
+        k: int
+    ) -> List[int]:
+        """
+        Greedy maximal marginal relevance selection.
+        
+        Each pick maximizes ``(1 - w) * score - w * max_sim`` where ``max_sim`` is
+        the highest cosine similarity to the candidates already picked. The
+        similarities are updated with one matrix-vector product per pick.
+        """
+        n = len(base_scores)
+        max_sim = np.zeros(n)
+        available = np.ones(n, dtype=bool)
+        selected: List[int] = []
+        while len(selected) < k and available.any():
+            objective = (1 - self.diversity_weight) * base_scores - self.diversity_weight * max_sim
+            objective[~available] = -np.inf
+            i = int(np.argmax(objective))
+            available[i] = False
+            selected.append(i)
+            max_sim = np.maximum(max_sim, embeddings @ embeddings[i])
+        return selected
+    
+    def _embed(self, states: List[Any], keys: Optional[List[Any]] = None) -> np.ndarray:
+        """Return unit-norm embeddings of ``states``, one row per state, cached per state."""
+        if keys is None:
+            keys = [self._state_key(state) for state in states]
+        rows = []
+        for state, key in zip(states, keys):
+            vector = self._embedding_cache.get(key)
+            if vector is None:
+                vector = np.asarray(self.embedding_fn(state), dtype=np.float64).ravel()
+                norm = np.linalg.norm(vector)
+                if norm > 0:
+                    vector = vector / norm
+                self._embedding_cache[key] = vector
+            rows.append(vector)
+        return np.vstack(rows)
     
     def _compute_score(
         self,
@@ -131,34 +750,58 @@ class AdaptiveBeamSearch:
         **kwargs
     ) -> float:
         """Compute score for a state, incorporating diversity bonus."""
-        base_score = score_fn(state)
+        return float(self._combine_scores([state], np.array([score_fn(state)]), current_beam)[0])
+    
+    def _combine_scores(
+        self,
+        states: List[Any],
+        base_scores: np.ndarray,
+        current_beam: List[BeamNode],
+        embeddings: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Blend base scores with the diversity bonus for all candidates of a step.
         
-        # Add diversity bonus
-        if current_beam:
-            diversity_bonus = self._compute_diversity_bonus(state, current_beam)
-            return (1 - self.diversity_weight) * base_score + self.diversity_weight * diversity_bonus
-        return base_score
+        Without an ``embedding_fn`` there is no notion of similarity between
+        states and the base scores are returned unchanged.
+        """
+        if self.embedding_fn is None or not current_beam or len(states) == 0:
+            return base_scores
+        if embeddings is None:
+            embeddings = self._embed(states)
+        bonuses = self._compute_diversity_bonus(embeddings, current_beam)
+        return (1 - self.diversity_weight) * base_scores + self.diversity_weight * bonuses
     
     def _compute_diversity_bonus(
         self,
-        state: Any,
+        embeddings: np.ndarray,
         current_beam: List[BeamNode]
-    ) -> float:
-        """Compute diversity bonus based on difference from current beam."""
-        # This is a placeholder - actual implementation would depend on state representation
-        return np.random.uniform(0.5, 1.0)
+    ) -> np.ndarray:
+        """
+        Compute diversity bonus based on difference from current beam.
+        
+        The bonus is one minus each candidate's highest cosine similarity to a
+        beam state, clipped to [0, 1].
+        """
+        beam_embeddings = self._embed(
+            [node.state for node in current_beam],
+            [node.metadata.get("state_key") for node in current_beam]
+        )
+        max_similarity = (embeddings @ beam_embeddings.T).max(axis=1)
+        return 1.0 - np.clip(max_similarity, 0.0, 1.0)
     
     def _adapt_beam_width(self, current_beam: List[BeamNode]) -> None:
         """Adapt beam width based on search progress."""
-        if not current_beam:
-            return
-            
-        # Compute average score improvement
-        avg_improvement = np.mean([
+        improvements = [
             node.score - node.metadata["parent_score"]
             for node in current_beam
             if "parent_score" in node.metadata
-        ])
+        ]
+        if not improvements:
+            return
+            
+        # Compute average score improvement
+        avg_improvement = np.mean(improvements)
         
         # Adjust beam width
         if avg_improvement > 0.1:
@@ -192,22 +835,109 @@ class AdaptiveBeamSearch:
             
         return list(reversed(path)), best_node.score
     
+    def update_score(self, state: Any, score: float) -> None:
+        """
+        Override the score of ``state``, e.g. when a late human review arrives.
+        
+        The override is kept apart from the memo caches, so it survives
+        eviction, expiry and the cache reset when a search uses new functions,
+        and ``score_fn`` is never called for the state again. Nodes of the
+        live beam with this state are rescored immediately; steps after the
+        update see the new score.
+        """
+        key = self._state_key(state)
+        score = float(score)
+        self.score_overrides[key] = score
+        self.score_cache.put(key, score)
+        for node in self._live_beam:
+            if node.metadata.get("state_key") != key:
+                continue
+            base_score = node.metadata.get("base_score", node.score)
+            # Beam scores past the root carry the diversity bonus on top
+            weight = 1.0
+            if self.embedding_fn is not None and "base_score" in node.metadata:
+                weight = 1.0 - self.diversity_weight
+            node.score += weight * (score - base_score)
+            node.metadata["base_score"] = score
+    
+    def select_indices(
+        self,
+        states: List[Any],
+        scores: Any,
+        parent_scores: Optional[Any] = None
+    ) -> List[int]:
+        """
+        Choose which externally scored candidates to keep, as one beam step.
+        
+        Lets other components, such as ``ThoughtTree``, use this search's
+        selection rule and width adaptation as their frontier policy. Duplicate
+        states are merged and the step is recorded in the search statistics.
+        
+        Args:
+            states: Candidate states
+            scores: Score of each candidate
+            parent_scores: Optional score of each candidate's parent, used to
+                adapt the beam width
+            
+        Returns:
+            Indices of the selected candidates, best first
+        """
+        scores = np.asarray(scores, dtype=np.float64)
+        self._embedding_cache = {}
+        
+        unique, keys, seen_states = [], [], set()
+        for i, state in enumerate(states):
+            key = self._state_key(state)
+            if key not in seen_states:
+                seen_states.add(key)
+                unique.append(i)
+                keys.append(key)
+        if not unique:
+            return []
+        
+        k = int(np.ceil(self.beam_width))
+        unique_scores = scores[unique]
+        if self.selection == "mmr" and self.embedding_fn is not None:
+            embeddings = self._embed([states[i] for i in unique], keys)
+            selected = self._select_mmr(unique_scores, embeddings, k)
+        else:
+            selected = self._select_top(unique_scores, k)
+        chosen = [unique[i] for i in selected]
+        
+        beam = []
+        for i, j in zip(chosen, selected):
+            metadata = {"state_key": keys[j]}
+            if parent_scores is not None:
+                metadata["parent_score"] = float(parent_scores[i])
+            beam.append(BeamNode(
+                state=states[i],
+                score=float(scores[i]),
+                parent=None,
+                depth=self.num_steps + 1,
+                metadata=metadata
+            ))
+        self._adapt_beam_width(beam)
+        self._record_step(self.num_steps, beam)
+        return chosen
+    
+    def get_cache_statistics(self) -> Dict[str, Any]:
+        """Get memoization and transposition counters."""
+        return {
+            "score_cache": self.score_cache.get_statistics(),
+            "expand_cache": self.expand_cache.get_statistics(),
+            "transpositions": self.transpositions
+        }
+    
     def get_search_statistics(self) -> Dict[str, Any]:
         """Get statistics about the search process."""
-        if not self.search_history:
+        if not self.num_steps:
             return {}
             
         return {
             "final_beam_width": self.beam_width,
-            "num_steps": len(self.search_history),
-            "avg_beam_score": np.mean([
-                node.score
-                for beam in self.search_history
-                for node in beam
-            ]),
-            "max_score_achieved": max(
-                node.score
-                for beam in self.search_history
-                for node in beam
-            )
-        } 
\ No newline at end of file
+            "num_steps": self.num_steps,
+            "avg_beam_score": self.score_stats.mean,
+            "max_score_achieved": self.score_stats.max,
+            "avg_beam_size": self.beam_width_stats.mean,
+            "stop_reason": self.stop_reason
+        }
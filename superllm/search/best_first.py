@@ -0,0 +1,189 @@
+"""
+Implementation of best-first (A*-style) search for LLM exploration.
+"""
+
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple
+import heapq
+import itertools
+import numpy as np
+
+from ..cache import stable_hash
+from .beam_search import BeamNode
+
+class BestFirstSearch:
+    """
+    Best-first search over a single global frontier.
+
+    Unlike a fixed-width beam, promising states that only pay off several steps
+    later stay on the frontier until they become the best option. With an
+    admissible heuristic (one that never underestimates the score still
+    reachable from a state) the search is A* and the first goal state popped
+    is optimal.
+    """
+
+    def __init__(
+        self,
+        max_expansions: int = 100,
+        heuristic_fn: Optional[Callable[[Any], float]] = None,
+        heuristic_weight: float = 1.0,
+        goal_fn: Optional[Callable[[Any], bool]] = None,
+        max_frontier_size: Optional[int] = None,
+        state_key_fn: Optional[Callable[[Any], Any]] = None
+    ):
+        """
+        Initialize the best-first search.
+
+        Args:
+            max_expansions: Budget of ``expand_fn`` calls
+            heuristic_fn: Optional estimate of the additional score reachable
+                from a state; added to the state's score to form its priority
+            heuristic_weight: Multiplier for the heuristic (1.0 gives A*)
+            goal_fn: Optional predicate; the search stops when a goal state is
+                popped from the frontier
+            max_frontier_size: Optional cap on the frontier; the lowest-priority
+                states are dropped when it is exceeded
+            state_key_fn: Optional function mapping a state to a hashable key used
+                to skip states that were already expanded
+        """
+        self.max_expansions = max_expansions
+        self.heuristic_fn = heuristic_fn
+        self.heuristic_weight = heuristic_weight
+        self.goal_fn = goal_fn
+        self.max_frontier_size = max_frontier_size
+        self.state_key_fn = state_key_fn
+        self.num_expansions = 0
+        self.num_scored = 0
+        self.max_frontier_seen = 0
+        self.stop_reason: Optional[str] = None
+
+    def search(
+        self,
+        initial_state: Any,
+        score_fn: Optional[Callable[[Any], float]] = None,
+        expand_fn: Optional[Callable[[Any], Iterable[Any]]] = None,
+        score_batch_fn: Optional[Callable[[List[Any]], Any]] = None,
+        **kwargs
+    ) -> Tuple[List[Any], float]:
+        """
+        Perform best-first search.
+
+        Args:
+            initial_state: Starting state for the search
+            score_fn: Function to score states
+            expand_fn: Function to generate next states
+            score_batch_fn: Optional function scoring a list of states at once and
+                returning an array of scores; used instead of ``score_fn``
+            **kwargs: Additional arguments for scoring/expansion
+
+        Returns:
+            Tuple of (best path, score)
+        """
+        if expand_fn is None:
+            raise ValueError("expand_fn is required")
+        if score_fn is None and score_batch_fn is None:
+            raise ValueError("Either score_fn or score_batch_fn is required")
+
+        self.num_expansions = 0
+        self.num_scored = 0
+        self.max_frontier_seen = 0
+        self.stop_reason = None
+
+        counter = itertools.count()
+        root = BeamNode(
+            state=initial_state,
+            score=float(self._score([initial_state], score_fn, score_batch_fn)[0]),
+            parent=None,
+            depth=0,
+            metadata={}
+        )
+        frontier = [(-self._priority(root), next(counter), root)]
+        expanded = set()
+        best_node = root
+
+        while frontier:
+            _, _, node = heapq.heappop(frontier)
+            if self.goal_fn is not None and self.goal_fn(node.state):
+                self.stop_reason = "goal"
+                return self._extract_path(node)
+
+            key = self._state_key(node.state)
+            if key in expanded:
+                continue
+            if self.num_expansions >= self.max_expansions:
+                self.stop_reason = "max_expansions"
+                break
+            expanded.add(key)
+
+            next_states = list(expand_fn(node.state))
+            self.num_expansions += 1
+            if not next_states:
+                continue
+
+            scores = self._score(next_states, score_fn, score_batch_fn)
+            for next_state, score in zip(next_states, scores.tolist()):
+                child = BeamNode(
+                    state=next_state,
+                    score=score,
+                    parent=node,
+                    depth=node.depth + 1,
+                    metadata={"parent_score": node.score}
+                )
+                if child.score > best_node.score:
+                    best_node = child
+                heapq.heappush(frontier, (-self._priority(child), next(counter), child))
+
+            if self.max_frontier_size is not None and len(frontier) > self.max_frontier_size:
+                frontier = heapq.nsmallest(self.max_frontier_size, frontier)
+            self.max_frontier_seen = max(self.max_frontier_seen, len(frontier))
+        else:
+            self.stop_reason = "exhausted"
+
+        return self._extract_path(best_node)
+
+    def _score(
+        self,
+        states: List[Any],
+        score_fn: Optional[Callable[[Any], float]],
+        score_batch_fn: Optional[Callable[[List[Any]], Any]]
+    ) -> np.ndarray:
+        """Score states with one batch call, or one ``score_fn`` call each."""
+        self.num_scored += len(states)
+        if score_batch_fn is None:
+            if score_fn is None:
+                raise ValueError("Either score_fn or score_batch_fn is required")
+            return np.array([score_fn(state) for state in states], dtype=np.float64)
+        scores = np.asarray(score_batch_fn(states), dtype=np.float64).reshape(-1)
+        if scores.shape[0] != len(states):
+            raise ValueError(
+                f"score_batch_fn returned {scores.shape[0]} scores for {len(states)} states"
+            )
+        return scores
+
+    def _priority(self, node: BeamNode) -> float:
+        if self.heuristic_fn is None:
+            return node.score
+        return node.score + self.heuristic_weight * self.heuristic_fn(node.state)
+
+    def _state_key(self, state: Any) -> Any:
+        if self.state_key_fn is not None:
+            return self.state_key_fn(state)
+        return stable_hash(state)
+
+    @staticmethod
+    def _extract_path(node: BeamNode) -> Tuple[List[Any], float]:
+        """Trace the path from the root to ``node``."""
+        path = []
+        current: Optional[BeamNode] = node
+        while current is not None:
+            path.append(current.state)
+            current = current.parent
+        return list(reversed(path)), node.score
+
+    def get_search_statistics(self) -> Dict[str, Any]:
+        """Get statistics about the last search."""
+        return {
+            "num_expansions": self.num_expansions,
+            "num_scored": self.num_scored,
+            "max_frontier_size": self.max_frontier_seen,
+            "stop_reason": self.stop_reason
+        }
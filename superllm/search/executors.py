@@ -0,0 +1,93 @@
+"""
+Ordered, bounded fan-out helpers for running expansion and scoring concurrently.
+"""
+
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Awaitable, Callable, Deque, Iterable, Iterator, List, Optional
+import asyncio
+
+
+def bounded_map(
+    fn: Callable[[Any], Any],
+    items: Iterable[Any],
+    executor: Optional[Executor] = None,
+    max_in_flight: Optional[int] = None
+) -> List[Any]:
+    """
+    Apply ``fn`` to every item, optionally on an executor.
+
+    Results are returned in input order regardless of completion order. At most
+    ``max_in_flight`` calls are submitted to the executor at any time.
+
+    Args:
+        fn: Function to apply; must be picklable for process pools
+        items: Inputs to ``fn``
+        executor: A ``concurrent.futures`` executor, or None to run serially
+        max_in_flight: Maximum number of pending calls (unbounded if None)
+
+    Returns:
+        List of results in the order of ``items``
+    """
+    return list(bounded_imap(fn, items, executor, max_in_flight))
+
+
+def bounded_imap(
+    fn: Callable[[Any], Any],
+    items: Iterable[Any],
+    executor: Optional[Executor] = None,
+    max_in_flight: Optional[int] = None
+) -> Iterator[Any]:
+    """
+    Lazily apply ``fn`` to every item, yielding results in input order.
+
+    Like ``bounded_map``, but results are yielded as soon as they are next in
+    order and ``items`` is consumed only as far as needed to keep
+    ``max_in_flight`` calls pending, so arbitrarily long inputs stream
+    through in bounded memory. Pending calls are cancelled if the iterator is
+    closed early.
+    """
+    if executor is None:
+        for item in items:
+            yield fn(item)
+        return
+
+    pending: Deque[Any] = deque()
+    try:
+        for item in items:
+            if max_in_flight is not None and len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+            pending.append(executor.submit(fn, item))
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+async def async_bounded_map(
+    fn: Callable[[Any], Awaitable[Any]],
+    items: Iterable[Any],
+    max_in_flight: Optional[int] = None
+) -> List[Any]:
+    """
+    Await ``fn`` for every item concurrently, preserving input order.
+
+    Args:
+        fn: Coroutine function to apply
+        items: Inputs to ``fn``
+        max_in_flight: Maximum number of concurrently running calls (unbounded if None)
+
+    Returns:
+        List of results in the order of ``items``
+    """
+    if max_in_flight is None:
+        return list(await asyncio.gather(*(fn(item) for item in items)))
+
+    semaphore = asyncio.Semaphore(max_in_flight)
+
+    async def run(item: Any) -> Any:
+        async with semaphore:
+            return await fn(item)
+
+    return list(await asyncio.gather(*(run(item) for item in items)))
@@ -0,0 +1,97 @@
+"""
+Streaming statistics accumulators.
+"""
+
+from typing import Any, Dict, Iterable
+import math
+
+
+class RunningStats:
+    """
+    Constant-memory accumulator for count, mean, variance, min and max.
+
+    Uses Welford's online algorithm, so the variance stays numerically stable
+    over long streams.
+    """
+
+    __slots__ = ("count", "mean", "_m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @classmethod
+    def from_moments(
+        cls,
+        count: int,
+        mean: float,
+        variance: float,
+        minimum: float,
+        maximum: float
+    ) -> "RunningStats":
+        """Build an accumulator from precomputed moments, e.g. of a NumPy array."""
+        stats = cls()
+        if count:
+            stats.count = int(count)
+            stats.mean = float(mean)
+            stats._m2 = float(variance) * stats.count
+            stats.min = float(minimum)
+            stats.max = float(maximum)
+        return stats
+
+    def update(self, value: float) -> None:
+        """Add a single observation."""
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def update_many(self, values: Iterable[float]) -> None:
+        """Add several observations."""
+        for value in values:
+            self.update(value)
+
+    def merge(self, other: "RunningStats") -> None:
+        """Fold the observations of another accumulator into this one."""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self._m2 = other.count, other.mean, other._m2
+            self.min, self.max = other.min, other.max
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self) -> float:
+        """Population variance, matching ``np.var``."""
+        return self._m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def reset(self) -> None:
+        self.__init__()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None
+        }
@@ -0,0 +1,92 @@
+"""
+Shared fixtures: a tiny randomly initialized causal LM and a character tokenizer.
+"""
+
+import pytest
+import torch
+
+
+class CharTokenizer:
+    """Minimal character-level tokenizer with the subset of the HF API used by SuperLLM."""
+
+    pad_token = "\0"
+    eos_token = "\0"
+    pad_token_id = 0
+    eos_token_id = 0
+    vocab_size = 128
+
+    def __init__(self):
+        self.padding_side = "right"
+
+    def encode(self, text, add_special_tokens=True):
+        return [min(ord(c), self.vocab_size - 1) or 1 for c in text]
+
+    def __call__(self, texts, return_tensors=None, padding=False, add_special_tokens=True):
+        single = isinstance(texts, str)
+        encoded = [self.encode(t) for t in ([texts] if single else texts)]
+        if not padding and not return_tensors:
+            ids = encoded[0] if single else encoded
+            return {"input_ids": ids}
+        width = max(len(ids) for ids in encoded)
+        input_ids, attention_mask = [], []
+        for ids in encoded:
+            pad = [self.pad_token_id] * (width - len(ids))
+            mask = [1] * len(ids)
+            if self.padding_side == "left":
+                input_ids.append(pad + ids)
+                attention_mask.append([0] * len(pad) + mask)
+            else:
+                input_ids.append(ids + pad)
+                attention_mask.append(mask + [0] * len(pad))
+        return {
+            "input_ids": torch.tensor(input_ids, dtype=torch.long),
+            "attention_mask": torch.tensor(attention_mask, dtype=torch.long),
+        }
+
+    def decode(self, ids, skip_special_tokens=False):
+        if hasattr(ids, "tolist"):
+            ids = ids.tolist()
+        return "".join(
+            chr(i) for i in ids
+            if not (skip_special_tokens and i == self.pad_token_id)
+        )
+
+    def batch_decode(self, sequences, skip_special_tokens=False):
+        return [self.decode(ids, skip_special_tokens) for ids in sequences]
+
+
+@pytest.fixture
+def tokenizer():
+    return CharTokenizer()
+
+
+def build_model():
+    from transformers import GPT2Config, GPT2LMHeadModel
+
+    torch.manual_seed(0)
+    config = GPT2Config(
+        vocab_size=CharTokenizer.vocab_size,
+        n_positions=512,
+        n_embd=16,
+        n_layer=2,
+        n_head=2,
+        bos_token_id=0,
+        eos_token_id=0,
+    )
+    return GPT2LMHeadModel(config).eval()
+
+
+def load_model_and_tokenizer():
+    """Picklable model loader for tests that run solves in worker processes."""
+    return build_model(), CharTokenizer()
+
+
+@pytest.fixture
+def model():
+    return build_model()
+
+
+@pytest.fixture
+def model_loader():
+    """The picklable loader, for tests that cannot import this module directly."""
+    return load_model_and_tokenizer
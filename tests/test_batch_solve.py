@@ -0,0 +1,42 @@
+"""
+Tests for solving many prompts in worker processes.
+"""
+
+from functools import partial
+import multiprocessing
+import os
+
+from superllm.core import solve_many
+
+# Forked workers start much faster than spawned ones, which re-import torch
+START_METHOD = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+TREE_KWARGS = {"max_branches": 2, "max_depth": 2, "max_new_tokens": 4, "temperature": 0.0}
+
+def count_loads(loader):
+    """Call ``loader`` and record the process it ran in."""
+    with open(os.environ["SUPERLLM_TEST_LOADS"], "a") as f:
+        f.write(f"{os.getpid()}\n")
+    return loader()
+
+def test_solve_many_serial(model_loader):
+    """Test that serial solves are isolated and loaded once."""
+    prompts = ["Prove it", "Explain it", "Prove it"]
+    results = list(solve_many(prompts, model_loader, tree_kwargs=TREE_KWARGS))
+    assert [r["reasoning_path"][0] for r in results] == prompts
+    # Greedy decoding on fresh trees gives identical results for identical prompts
+    assert results[0] == results[2]
+
+def test_solve_many_workers(model_loader, tmp_path, monkeypatch):
+    """Test that worker processes load the model once and results stay in order."""
+    loads = tmp_path / "loads.txt"
+    monkeypatch.setenv("SUPERLLM_TEST_LOADS", str(loads))
+    prompts = [f"Question {i}" for i in range(8)]
+    serial = list(solve_many(prompts, model_loader, tree_kwargs=TREE_KWARGS))
+
+    results = solve_many(
+        iter(prompts), partial(count_loads, model_loader), workers=2, tree_kwargs=TREE_KWARGS, max_in_flight=3,
+        mp_context=multiprocessing.get_context(START_METHOD)
+    )
+    assert list(results) == serial
+    pids = loads.read_text().split()
+    assert len(pids) == len(set(pids)) <= 2
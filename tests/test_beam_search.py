@@ -0,0 +1,302 @@
+"""
+Tests for the AdaptiveBeamSearch implementation.
+"""
+
+import asyncio
+import gc
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from superllm import MetricsTracker
+from superllm.search import AdaptiveBeamSearch
+
+
+def score_fn(state):
+    # Base-4 digit weighting keeps scores of distinct states distinct
+    return float(sum(step * 4.0 ** -i for i, step in enumerate(state)))
+
+
+def expand_fn(state):
+    return [state + (step,) for step in (1, 2, 3)]
+
+
+def run_search(**kwargs):
+    search = AdaptiveBeamSearch(initial_beam_width=3, max_steps=4, diversity_weight=0.0, **kwargs)
+    return search.search(initial_state=(), score_fn=score_fn, expand_fn=expand_fn)
+
+
+@pytest.mark.parametrize("executor_cls", [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_executor_matches_serial(executor_cls):
+    """Test that fanning out over an executor gives the serial result."""
+    expected = run_search()
+    with executor_cls(max_workers=2) as executor:
+        assert run_search(executor=executor, max_in_flight=3) == expected
+
+
+def test_async_search_matches_serial():
+    """Test the asyncio variant with coroutine expand and score functions."""
+    async def async_score(state):
+        await asyncio.sleep(0)
+        return score_fn(state)
+    
+    async def async_expand(state):
+        await asyncio.sleep(0)
+        return expand_fn(state)
+    
+    search = AdaptiveBeamSearch(
+        initial_beam_width=3, max_steps=4, diversity_weight=0.0, max_in_flight=2
+    )
+    result = asyncio.run(search.async_search((), async_score, async_expand))
+    assert result == run_search()
+    
+    # The callback sees every step, including the last one and its stop reason
+    metrics = MetricsTracker()
+    sync_seen, async_seen = [], []
+    search = AdaptiveBeamSearch(initial_beam_width=3, max_steps=4, diversity_weight=0.0)
+    search.search((), score_fn, expand_fn, callback=sync_seen.append)
+    search = AdaptiveBeamSearch(
+        initial_beam_width=3, max_steps=4, diversity_weight=0.0, metrics=metrics
+    )
+    asyncio.run(search.async_search((), async_score, async_expand, callback=async_seen.append))
+    assert [p.step for p in async_seen] == [p.step for p in sync_seen] == list(range(5))
+    assert async_seen[-1].stop_reason == "max_steps"
+    assert metrics.counter("searches") == 1
+    assert metrics.histogram("search_seconds").count == 1
+    
+    # A search stopped at the root still reports to the callback
+    search = AdaptiveBeamSearch(max_steps=0)
+    async_seen.clear()
+    asyncio.run(search.async_search((), async_score, async_expand, callback=async_seen.append))
+    assert [p.stop_reason for p in async_seen] == ["max_steps"]
+
+
+def test_score_batch_fn_matches_score_fn():
+    """Test that a vectorized batch scorer gives the same result as score_fn."""
+    calls = []
+    
+    def score_batch_fn(states):
+        calls.append(len(states))
+        return np.array([score_fn(state) for state in states])
+    
+    search = AdaptiveBeamSearch(initial_beam_width=3, max_steps=4, diversity_weight=0.0)
+    result = search.search(initial_state=(), expand_fn=expand_fn, score_batch_fn=score_batch_fn)
+    
+    assert result == run_search()
+    # One call for the root, then one call per step
+    assert len(calls) == 5
+
+
+def test_generator_expand_fn():
+    """Test that expansions returned as generators are cached as reusable lists."""
+    def generator_expand(state):
+        return (state + (step,) for step in (1, 2, 3))
+    
+    search = AdaptiveBeamSearch(initial_beam_width=3, max_steps=4, diversity_weight=0.0)
+    expected = run_search()
+    assert search.search((), score_fn, generator_expand) == expected
+    # The second search is answered from the expansion cache
+    assert search.search((), score_fn, generator_expand) == expected
+    assert search.get_cache_statistics()["expand_cache"]["hits"] > 0
+    
+    async def async_score(state):
+        return score_fn(state)
+    
+    async def async_generator_expand(state):
+        return generator_expand(state)
+    
+    search = AdaptiveBeamSearch(initial_beam_width=3, max_steps=4, diversity_weight=0.0)
+    for _ in range(2):
+        assert asyncio.run(search.async_search((), async_score, async_generator_expand)) == expected
+
+
+def test_update_score_overrides():
+    """Test that reviewed scores survive cache clears and rescore the live beam."""
+    search = AdaptiveBeamSearch(
+        initial_beam_width=1, min_beam_width=1, max_steps=2, diversity_weight=0.0, cache_size=0
+    )
+    search.update_score((3,), -1.0)
+    # New function objects reset the caches, but not the override
+    for _ in range(2):
+        path, _ = search.search((), lambda state: score_fn(state), expand_fn)
+        assert path[1] == (2,)
+    
+    search = AdaptiveBeamSearch(initial_beam_width=2, max_steps=3, diversity_weight=0.0)
+    for progress in search.iter_search((), score_fn, expand_fn):
+        if progress.step == 1:
+            best = progress.path[-1]
+            search.update_score(best, 5.0)
+            assert [node.score for node in search._live_beam if node.state == best] == [5.0]
+    assert search.score_overrides[search._state_key(best)] == 5.0
+
+
+def test_tied_and_duplicate_candidates():
+    """Test that tied scores do not break selection and duplicates are dropped."""
+    search = AdaptiveBeamSearch(initial_beam_width=2, max_steps=3, diversity_weight=0.0)
+    path, score = search.search(
+        initial_state=0,
+        score_fn=lambda state: 1.0,
+        expand_fn=lambda state: [state + 1, state + 1, state + 2]
+    )
+    
+    assert len(path) == 4
+    assert score == 1.0
+    assert [node.state for node in search.search_history[0]] == [1, 2]
+
+
+def test_embedding_diversity_bonus():
+    """Test that the diversity bonus favours states unlike the current beam."""
+    directions = {"a": [1.0, 0.0], "a'": [0.99, 0.1], "b": [0.0, 1.0]}
+    search = AdaptiveBeamSearch(
+        initial_beam_width=1,
+        min_beam_width=1,
+        max_steps=1,
+        diversity_weight=0.5,
+        embedding_fn=lambda state: directions[state]
+    )
+    path, score = search.search(
+        initial_state="a",
+        score_fn=lambda state: {"a": 1.0, "a'": 0.9, "b": 0.7}[state],
+        expand_fn=lambda state: ["a'", "b"]
+    )
+    
+    assert path == ["a", "b"]
+    assert score == pytest.approx(0.5 * 0.7 + 0.5 * 1.0)
+    assert search.search(initial_state="a", score_fn=lambda state: 1.0,
+                         expand_fn=lambda state: ["a'", "b"]) == (["a", "b"], 1.0)
+
+
+def test_mmr_selection():
+    """Test that MMR selection spreads the beam across dissimilar states."""
+    directions = {0: [1.0, 0.0], 1: [1.0, 0.05], 2: [0.0, 1.0]}
+    search = AdaptiveBeamSearch(
+        initial_beam_width=2,
+        max_steps=1,
+        diversity_weight=0.5,
+        embedding_fn=lambda state: directions.get(state, [1.0, 1.0]),
+        selection="mmr"
+    )
+    search.search(
+        initial_state=-1,
+        score_fn=lambda state: {0: 1.0, 1: 0.95, 2: 0.6}.get(state, 0.0),
+        expand_fn=lambda state: [0, 1, 2]
+    )
+    
+    assert [node.state for node in search.search_history[0]] == [0, 2]
+
+
+def test_memoized_scores_and_transpositions():
+    """Test that duplicate states are merged and no state is scored twice."""
+    scored = []
+    
+    def counting_score(state):
+        scored.append(state)
+        return float(sum(state))
+    
+    def commutative_expand(state):
+        # Multisets of steps: (1, 2) and (2, 1) are the same state
+        return [tuple(sorted(state + (step,))) for step in (1, 2)]
+    
+    search = AdaptiveBeamSearch(initial_beam_width=4, max_steps=3, diversity_weight=0.0)
+    first = search.search((), counting_score, commutative_expand)
+    
+    assert len(scored) == len(set(scored))
+    assert search.get_cache_statistics()["transpositions"] > 0
+    
+    calls = len(scored)
+    assert search.search((), counting_score, commutative_expand) == first
+    assert len(scored) == calls
+    assert search.get_cache_statistics()["score_cache"]["hits"] > 0
+
+
+def test_goal_and_patience_stop_early():
+    """Test that goal and patience criteria end the search before max_steps."""
+    search = AdaptiveBeamSearch(
+        initial_beam_width=2, max_steps=50, diversity_weight=0.0,
+        goal_fn=lambda state: state >= 5
+    )
+    path, score = search.search(0, score_fn=float, expand_fn=lambda state: [state + 1, state + 2])
+    assert path[-1] >= 5
+    assert search.stop_reason == "goal"
+    assert len(search.search_history) < 50
+    
+    search = AdaptiveBeamSearch(
+        initial_beam_width=2, max_steps=50, diversity_weight=0.0, patience=2
+    )
+    search.search(0, score_fn=lambda state: min(state, 3), expand_fn=lambda state: [state + 1])
+    assert search.stop_reason == "patience"
+    assert search.get_search_statistics()["num_steps"] == 5
+
+
+def test_exhausted_search_keeps_last_beam():
+    """Test that a search whose states are all terminal returns the last beam."""
+    search = AdaptiveBeamSearch(max_steps=10, diversity_weight=0.0)
+    path, score = search.search(
+        0, score_fn=float, expand_fn=lambda state: [state + 1] if state < 3 else []
+    )
+    assert path == [0, 1, 2, 3]
+    assert score == 3.0
+    assert search.stop_reason == "exhausted"
+
+
+def test_anytime_results():
+    """Test the anytime generator and the stopping callback."""
+    search = AdaptiveBeamSearch(initial_beam_width=2, max_steps=5, diversity_weight=0.0)
+    progress = list(search.iter_search(0, score_fn=float, expand_fn=lambda state: [state + 1]))
+    assert [p.step for p in progress] == list(range(6))
+    assert [p.score for p in progress] == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+    assert progress[-1].stop_reason == "max_steps"
+    
+    seen = []
+    path, score = search.search(
+        0, score_fn=float, expand_fn=lambda state: [state + 1],
+        callback=lambda p: seen.append(p) or p.step == 2
+    )
+    assert path == [0, 1, 2]
+    assert seen[-1].stop_reason == "callback"
+    
+    budgeted = AdaptiveBeamSearch(max_steps=100, diversity_weight=0.0, max_score_calls=10)
+    budgeted.search(0, score_fn=float, expand_fn=lambda state: [state + 1, state + 2])
+    assert budgeted.stop_reason == "score_budget"
+
+
+@pytest.mark.parametrize("history_mode", ["summary", "off"])
+def test_bounded_history_modes(history_mode):
+    """Test that bounded history modes keep the same statistics as full history."""
+    full = AdaptiveBeamSearch(initial_beam_width=3, max_steps=4, diversity_weight=0.0)
+    bounded = AdaptiveBeamSearch(
+        initial_beam_width=3, max_steps=4, diversity_weight=0.0, history_mode=history_mode
+    )
+    full.search(initial_state=(), score_fn=score_fn, expand_fn=expand_fn)
+    bounded.search(initial_state=(), score_fn=score_fn, expand_fn=expand_fn)
+    
+    full_stats = full.get_search_statistics()
+    bounded_stats = bounded.get_search_statistics()
+    assert bounded.search_history == []
+    assert bounded_stats["num_steps"] == full_stats["num_steps"]
+    assert bounded_stats["avg_beam_score"] == pytest.approx(full_stats["avg_beam_score"])
+    assert bounded_stats["max_score_achieved"] == full_stats["max_score_achieved"]
+    assert len(bounded.step_summaries) == (4 if history_mode == "summary" else 0)
+
+
+def test_dropped_nodes_are_released():
+    """Test that nodes falling out of the beam are freed unless the live beam descends from them."""
+    search = AdaptiveBeamSearch(
+        initial_beam_width=2, min_beam_width=2, max_beam_width=2, max_steps=3,
+        diversity_weight=0.0, history_mode="off"
+    )
+    beams = []
+    record_step = search._record_step
+    
+    def recording(step, beam):
+        beams.append({node.state: weakref.ref(node) for node in beam})
+        record_step(step, beam)
+    
+    search._record_step = recording
+    for progress in search.iter_search(1, score_fn=float, expand_fn=lambda s: [2 * s, 2 * s + 1]):
+        if progress.step == 3:
+            gc.collect()
+            # Node 3 is an ancestor of the live beam (15, 14); node 2 is not
+            assert beams[0][3]() is not None
+            assert beams[0][2]() is None
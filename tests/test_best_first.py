@@ -0,0 +1,53 @@
+"""
+Tests for the BestFirstSearch implementation.
+"""
+
+from superllm.search import AdaptiveBeamSearch, BestFirstSearch
+
+
+def delayed_score(state):
+    """The 'x' branch looks good early but never pays off; 'yyy' is the goal."""
+    if state.startswith("x"):
+        return 0.5
+    return {"": 0.0, "y": 0.2, "yy": 0.3, "yyy": 1.0}.get(state, 0.0)
+
+
+def expand(state):
+    return [state + "x", state + "y"] if len(state) < 3 else []
+
+
+def heuristic(state):
+    # Admissible: states containing 'x' can never improve, all-'y' states can reach 1.0
+    return 0.0 if "x" in state else 1.0 - delayed_score(state)
+
+
+def test_best_first_finds_delayed_goal():
+    """Test that A* reaches the delayed goal that a narrow beam misses."""
+    search = BestFirstSearch(
+        max_expansions=50,
+        heuristic_fn=heuristic,
+        goal_fn=lambda state: state == "yyy"
+    )
+    path, score = search.search("", delayed_score, expand)
+    
+    assert path == ["", "y", "yy", "yyy"]
+    assert score == 1.0
+    stats = search.get_search_statistics()
+    assert stats["num_expansions"] == 3
+    assert stats["stop_reason"] == "goal"
+    
+    beam = AdaptiveBeamSearch(initial_beam_width=1, min_beam_width=1, max_beam_width=1,
+                              max_steps=3, diversity_weight=0.0)
+    _, beam_score = beam.search("", delayed_score, expand)
+    assert beam_score < score
+
+
+def test_best_first_expansion_budget():
+    """Test that the search returns the best state found within its budget."""
+    search = BestFirstSearch(max_expansions=2, max_frontier_size=3)
+    path, score = search.search("", delayed_score, expand)
+    
+    assert score == 0.5
+    assert path[0] == ""
+    assert search.get_search_statistics()["num_expansions"] == 2
+    assert search.stop_reason == "max_expansions"
@@ -0,0 +1,37 @@
+"""
+Tests for the shared caching utilities.
+"""
+
+import numpy as np
+from superllm.cache import LRUCache, stable_hash
+
+
+def test_stable_hash():
+    """Test that content hashes are structural and order independent for mappings."""
+    assert stable_hash({"a": 1, "b": [1, 2]}) == stable_hash({"b": [1, 2], "a": 1})
+    assert stable_hash((1, 2)) != stable_hash([1, 2])
+    assert stable_hash(1) != stable_hash(1.0)
+    assert stable_hash(np.arange(2000)) != stable_hash(np.arange(2000) + (np.arange(2000) == 1000))
+    assert len(stable_hash("thought")) == 16
+
+
+def test_lru_cache_eviction_and_ttl():
+    """Test LRU eviction, expiry and hit counters."""
+    now = [0.0]
+    cache = LRUCache(maxsize=2, ttl=10.0, clock=lambda: now[0])
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    
+    now[0] = 20.0
+    assert cache.get("c") is None
+    
+    stats = cache.get_statistics()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["expirations"] == 1
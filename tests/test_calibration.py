@@ -0,0 +1,47 @@
+"""
+Tests for online calibration of automated scores.
+"""
+
+import numpy as np
+
+from superllm import ExpertFeedback
+from superllm.core.calibration import OnlineCalibrator
+
+def test_calibrator_learns_mapping():
+    """Test that the calibrator recovers a logistic mapping and its spread."""
+    rng = np.random.default_rng(0)
+    calibrator = OnlineCalibrator(refit_every=10)
+    auto = rng.uniform(0.0, 1.0, 500)
+    human = 1.0 / (1.0 + np.exp(-8.0 * (auto - 0.6)))
+    for a, h in zip(auto, human):
+        calibrator.update(a, h)
+
+    assert calibrator.is_fitted
+    for a in (0.2, 0.6, 0.9):
+        assert abs(calibrator.predict(a) - 1.0 / (1.0 + np.exp(-8.0 * (a - 0.6)))) < 0.05
+    assert calibrator.uncertainty(0.6) < 0.05
+
+    noisy = OnlineCalibrator()
+    noisy.update_many(auto, np.clip(human + rng.normal(0.0, 0.2, 500), 0.0, 1.0))
+    assert noisy.uncertainty(0.6) > calibrator.uncertainty(0.6)
+
+def test_hybrid_escalation_uses_calibration():
+    """Test that confidently calibrated thoughts are not escalated to a human."""
+    calibrator = OnlineCalibrator()
+    # Humans rate everything highly, whatever the automated score
+    calibrator.update_many(np.linspace(0.0, 1.0, 50), np.full(50, 0.9))
+
+    expert = ExpertFeedback(
+        feedback_strategy="hybrid",
+        custom_evaluator=lambda thought: 0.3,
+        calibrator=calibrator
+    )
+    feedback = expert.evaluate("thought")
+    assert feedback.metadata["source"] == "automated"
+    assert abs(feedback.score - 0.9) < 0.05
+    assert feedback.metadata["auto_score"] == 0.3
+
+    # Without calibration the same thought needs a human
+    uncalibrated = ExpertFeedback(feedback_strategy="hybrid", custom_evaluator=lambda thought: 0.3)
+    assert uncalibrated.evaluate("thought").metadata["source"] == "human"
+    assert uncalibrated.calibrator.num_updates == 1
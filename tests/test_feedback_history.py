@@ -0,0 +1,123 @@
+"""
+Tests for the bounded feedback history.
+"""
+
+import numpy as np
+
+from superllm import ExpertFeedback
+from superllm.core.calibration import OnlineCalibrator
+from superllm.core.feedback_history import SPILL_DTYPE, FeedbackHistory
+from superllm.core.feedback_log import FeedbackLog
+from superllm.core.review_queue import LocalReviewer, ReviewQueue
+
+def test_ring_buffer_statistics(tmp_path):
+    """Test that the window is bounded while statistics cover the whole stream."""
+    spill_path = str(tmp_path / "history.bin")
+    history = FeedbackHistory(capacity=4, spill_path=spill_path, spill_chunk=2)
+    scores = np.linspace(0.0, 1.0, 11)
+    for i, score in enumerate(scores):
+        history.record(score, "human" if i % 2 else "automated", timestamp=float(i))
+
+    assert len(history) == 4
+    assert history.total == 11
+    np.testing.assert_allclose(history.window()["score"], scores[-4:])
+    np.testing.assert_allclose(history.window()["timestamp"], [7.0, 8.0, 9.0, 10.0])
+
+    stats = history.get_statistics()
+    assert np.isclose(stats["mean_score"], scores.mean())
+    assert np.isclose(stats["std_score"], scores.std())
+    assert stats["source_counts"] == {"automated": 6, "human": 5}
+    assert np.isclose(stats["human_feedback_ratio"], 5 / 11)
+
+    # Evicted entries end up in the spill file, oldest first
+    spilled = history.load_spilled()
+    np.testing.assert_allclose(spilled["score"], scores[:7])
+    assert spilled["source"][:2].tolist() == [b"automated", b"human"]
+
+    # Another history appending to the same file numbers its sources
+    # differently, but the names in the file stay unambiguous
+    other = FeedbackHistory(capacity=1, spill_path=spill_path, spill_chunk=1)
+    for source in ("human", "automated", "human"):
+        other.record(0.5, source)
+    spilled = other.load_spilled()
+    assert len(spilled) == 9
+    assert spilled["source"][-2:].tolist() == [b"human", b"automated"]
+
+def test_expert_feedback_history_is_bounded():
+    """Test that ExpertFeedback keeps a bounded window of its feedback."""
+    expert = ExpertFeedback(feedback_strategy="passive", history_size=8, cache_size=1)
+    for i in range(20):
+        expert.evaluate(f"thought {i}")
+
+    stats = expert.get_feedback_statistics()
+    assert stats["num_feedback"] == 20
+    assert stats["window_size"] == 8
+    assert stats["human_feedback_ratio"] == 0.0
+
+def test_close_flushes_spilled_history(tmp_path):
+    """Test that closing ExpertFeedback writes every evicted entry to disk."""
+    spill_path = str(tmp_path / "history.bin")
+    with ExpertFeedback(
+        feedback_strategy="passive", history_size=4, history_spill_path=spill_path
+    ) as expert:
+        for i in range(7):
+            expert.evaluate(f"thought {i}")
+    assert len(np.fromfile(spill_path, dtype=SPILL_DTYPE)) == 3
+
+def test_history_with_concurrent_reviews():
+    """Test that reviews merged on a reviewer thread and evaluations do not lose feedback."""
+    queue = ReviewQueue(maxsize=1000)
+    # Thoughts scoring below the threshold are escalated to the reviewer thread
+    expert = ExpertFeedback(
+        feedback_strategy="hybrid",
+        custom_evaluator=lambda thought: 0.0 if thought.startswith("review") else 0.9,
+        review_queue=queue,
+        calibrator=OnlineCalibrator(min_samples=10 ** 6),
+        history_size=64,
+        cache_size=1
+    )
+
+    reviewer = LocalReviewer(queue, lambda thought: 1.0)
+    reviewer.start(poll_interval=0.001)
+    try:
+        for i in range(300):
+            expert.evaluate(f"review {i}")
+            expert.evaluate(f"thought {i}")
+        assert expert.wait_for_reviews(timeout=10.0)
+    finally:
+        reviewer.stop()
+
+    stats = expert.get_feedback_statistics()
+    assert stats["num_feedback"] == 600
+    assert stats["source_counts"]["human"] == 300
+    assert len(expert.feedback_history) == 64
+
+def test_feedback_log_warm_start(tmp_path):
+    """Test that feedback is logged to disk and reloaded by a new instance."""
+    path = str(tmp_path / "feedback.log")
+    expert = ExpertFeedback(feedback_strategy="active", feedback_log=path)
+    for i in range(5):
+        expert.evaluate(f"thought {i}")
+    expert.close()
+    assert expert.feedback_log._records.closed
+
+    log = FeedbackLog(path)
+    records = log.records()
+    assert isinstance(records, np.memmap)
+    assert len(records) == 5
+    assert (records["source"] == b"human").all()
+    np.testing.assert_allclose(records["human_score"], 0.8)
+    assert log.text(3) == ("Placeholder human feedback", ["Consider alternative approach"])
+
+    restarted = ExpertFeedback(feedback_strategy="passive", feedback_log=log)
+    stats = restarted.get_feedback_statistics()
+    assert stats["num_feedback"] == 5
+    assert stats["human_feedback_ratio"] == 1.0
+    assert np.isclose(stats["mean_score"], records["score"].mean())
+    restarted.evaluate("thought 5")
+    assert len(log) == 6
+
+    # A log passed in by the caller stays open
+    restarted.close()
+    assert not log._records.closed
+    log.close()
@@ -0,0 +1,45 @@
+"""
+Tests for the import cost of the package.
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+def _run(code):
+    return subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+def test_import_is_lazy():
+    """Test that importing the package does not load heavy dependencies."""
+    loaded = _run(
+        "import sys, superllm; "
+        "print(sorted(m for m in ('numpy', 'torch', 'transformers', 'networkx') if m in sys.modules))"
+    )
+    assert loaded == "[]"
+
+    loaded = _run(
+        "import sys; from superllm import AdaptiveBeamSearch, ExpertFeedback, MetricsTracker; "
+        "print(sorted(m for m in ('torch', 'transformers') if m in sys.modules))"
+    )
+    assert loaded == "[]"
+
+def test_import_time():
+    """Test that importing the package stays fast."""
+    elapsed = float(_run(
+        "import time; start = time.perf_counter(); import superllm; "
+        "print(time.perf_counter() - start)"
+    ))
+    assert elapsed < 0.5
+
+def test_lazy_attributes():
+    """Test that lazily imported names resolve and unknown names still fail."""
+    import superllm
+    from superllm.core.thought_tree import ThoughtTree
+
+    assert superllm.ThoughtTree is ThoughtTree
+    assert "MetricsTracker" in dir(superllm)
+    with pytest.raises(AttributeError):
+        superllm.DoesNotExist
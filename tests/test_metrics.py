@@ -0,0 +1,68 @@
+"""
+Tests for the metrics tracker and its instrumentation hooks.
+"""
+
+import json
+
+from superllm import ThoughtTree, ExpertFeedback, AdaptiveBeamSearch, MetricsTracker
+
+def test_counters_and_histograms():
+    """Test recording, labels and both export formats."""
+    metrics = MetricsTracker(histogram_buckets={"batch_size": (1, 4, 16)})
+    metrics.increment("model_calls", labels={"kind": "generate"})
+    metrics.increment("model_calls", 2, labels={"kind": "generate"})
+    for size in (1, 3, 3, 20):
+        metrics.observe("batch_size", size)
+    with metrics.timer("solve_seconds"):
+        pass
+
+    assert metrics.counter("model_calls", {"kind": "generate"}) == 3
+    histogram = metrics.histogram("batch_size")
+    assert histogram.count == 4 and histogram.sum == 27 and histogram.max == 20
+    assert histogram.bucket_counts == [1, 2, 0, 1]
+
+    exported = json.loads(metrics.to_json())
+    assert exported["counters"]['model_calls{kind="generate"}'] == 3
+    assert exported["histograms"]["solve_seconds"]["count"] == 1
+
+    text = metrics.to_prometheus()
+    assert "# TYPE superllm_model_calls_total counter" in text
+    assert 'superllm_model_calls_total{kind="generate"} 3' in text
+    assert 'superllm_batch_size_bucket{le="4.0"} 3' in text
+    assert 'superllm_batch_size_bucket{le="+Inf"} 4' in text
+    assert "superllm_batch_size_count 4" in text
+
+def test_disabled_tracker_records_nothing():
+    """Test that a disabled tracker ignores all calls."""
+    metrics = MetricsTracker(enabled=False)
+    metrics.increment("solves")
+    metrics.observe("solve_seconds", 1.0)
+    with metrics.timer("solve_seconds"):
+        pass
+    assert metrics.get_metrics() == {"counters": {}, "histograms": {}}
+
+def test_component_hooks(model, tokenizer):
+    """Test that the tree, the expert system and the search report metrics."""
+    metrics = MetricsTracker()
+    tree = ThoughtTree(
+        model=model, tokenizer=tokenizer, max_branches=2, max_depth=2, max_new_tokens=4,
+        beam_width=2, metrics=metrics
+    )
+    expert = ExpertFeedback(feedback_strategy="passive", metrics=metrics)
+    tree.solve(prompt="Prove it", expert_system=expert)
+
+    assert metrics.counter("solves") == 1
+    assert metrics.counter("nodes_expanded") == 1 + 2
+    assert metrics.counter("nodes_pruned") == 2
+    assert metrics.counter("model_calls", {"kind": "generate"}) == 2
+    assert 0 < metrics.counter("tokens_generated") <= (2 + 4) * 4
+    assert metrics.histogram("level_seconds", {"depth": 2}).count == 1
+    assert metrics.counter("evaluations") == 2 + 4
+    assert metrics.histogram("solve_seconds").count == 1
+
+    search = AdaptiveBeamSearch(max_steps=3, metrics=metrics)
+    search.search(0, score_fn=lambda s: s / 10, expand_fn=lambda s: [s + 1, s + 2])
+    assert metrics.counter("searches") == 1
+    assert metrics.histogram("beam_step_seconds").count == 3
+    assert metrics.counter("cache_hits", {"cache": "beam_score"}) > 0
+    assert metrics.histogram("score_seconds").count == 4
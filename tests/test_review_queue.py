@@ -0,0 +1,64 @@
+"""
+Tests for asynchronous human review of thoughts.
+"""
+
+import asyncio
+
+from superllm import ExpertFeedback
+from superllm.core.review_queue import LocalReviewer, ReviewQueue
+from superllm.core.thought_store import Thought
+from superllm.search import AdaptiveBeamSearch
+
+def test_review_queue_dedup_and_bound():
+    """Test that the queue deduplicates thoughts and drops overflow."""
+    queue = ReviewQueue(maxsize=2)
+    first = queue.submit(Thought(content="a", score=0.5, metadata={}), 0.5)
+    assert queue.submit("a", 0.4) is first
+    assert queue.submit("b", 0.4) is not None
+    assert queue.submit("c", 0.4) is None
+
+    reviewer = LocalReviewer(queue, lambda thought: 1.0)
+    assert reviewer.review_pending() == 2
+    assert first.result().score == 1.0
+
+    # Reviewed thoughts are answered from memory
+    again = queue.submit("a", 0.5)
+    assert again.done() and again.result().score == 1.0
+
+    stats = queue.get_statistics()
+    assert stats["dropped"] == 1
+    assert stats["deduplicated"] == 2
+    assert stats["resolved"] == 2
+    assert stats["pending"] == 0
+
+def test_async_expert_feedback():
+    """Test that evaluate does not wait for the reviewer and merges late reviews."""
+    queue = ReviewQueue()
+    expert = ExpertFeedback(
+        feedback_strategy="active",
+        custom_evaluator=lambda thought: 0.5,
+        review_queue=queue
+    )
+    search = AdaptiveBeamSearch()
+    expert.add_review_listener(lambda thought, feedback: search.update_score(thought, feedback.score))
+
+    feedback = expert.evaluate("step")
+    assert feedback.score == 0.5
+    assert feedback.metadata["review"] == "pending"
+    assert len(queue) == 1
+
+    LocalReviewer(queue, lambda thought: 1.0).review_pending()
+    assert expert.wait_for_reviews(timeout=1.0)
+    assert feedback.score == 0.3 * 0.5 + 0.7 * 1.0
+    assert feedback.metadata["source"] == "human"
+    assert search.score_cache.get(search._state_key("step")) == feedback.score
+
+    # A background reviewer resolves reviews that can be awaited
+    reviewer = LocalReviewer(queue, lambda thought: 0.0)
+    reviewer.start(poll_interval=0.01)
+    try:
+        other = expert.evaluate("other step")
+        assert asyncio.run(expert.await_reviews(timeout=5.0))
+    finally:
+        reviewer.stop()
+    assert other.score == 0.3 * 0.5
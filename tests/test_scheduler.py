@@ -0,0 +1,81 @@
+"""
+Tests for the shared generation scheduler.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from superllm import ThoughtTree, MetricsTracker
+from superllm.core import GenerationScheduler
+from superllm.search import AdaptiveBeamSearch
+
+def test_round_robin_batches(model, tokenizer):
+    """Test that batches take requests from all sessions in turn and respect the budget."""
+    # Budget for two contexts of 4 characters plus 4 new tokens
+    scheduler = GenerationScheduler(model, tokenizer, token_budget=16)
+    greedy = [scheduler.submit("aaaa", session="a", max_new_tokens=4) for _ in range(3)]
+    other = scheduler.submit("bbbb", session="b", max_new_tokens=4)
+    sampled = scheduler.submit("cccc", session="c", temperature=0.0, max_new_tokens=4)
+    assert scheduler.pending() == 5
+
+    # One request of "a" and one of "b"; "c" cannot share the call
+    assert scheduler.step() == 2
+    assert greedy[0].done() and other.done()
+    assert not greedy[1].done() and not sampled.done()
+
+    # "c" is first in line now
+    assert scheduler.step() == 1
+    assert sampled.done()
+    assert scheduler.step() == 2
+    assert scheduler.step() == 0
+
+    samples = greedy[2].result()
+    assert len(samples) == 1 and isinstance(samples[0][0], str)
+    stats = scheduler.get_statistics()
+    assert stats["num_batches"] == 3
+    assert stats["num_requests"] == 5
+    assert stats["active_sessions"] == 0
+
+def test_concurrent_sessions_share_batches(model, tokenizer):
+    """Test that concurrent trees are served by fewer, larger model calls."""
+    metrics = MetricsTracker()
+    scheduler = GenerationScheduler(model, tokenizer, metrics=metrics)
+
+    def solve(prompt):
+        tree = ThoughtTree(
+            tokenizer=tokenizer, max_branches=2, max_depth=2, max_new_tokens=4,
+            scheduler=scheduler
+        )
+        result = tree.solve(prompt=prompt)
+        return len(tree.tree), result
+
+    prompts = ["Prove %d" % i for i in range(6)]
+    with scheduler, ThreadPoolExecutor(max_workers=6) as executor:
+        results = list(executor.map(solve, prompts))
+
+    assert all(size == 1 + 2 + 4 for size, _ in results)
+    assert all(result["reasoning_path"][0] == prompt for prompt, (_, result) in zip(prompts, results))
+    # 6 trees x (1 + 2) contexts
+    assert scheduler.num_requests == 18
+    assert metrics.counter("model_calls", {"kind": "generate"}) == scheduler.num_batches
+    assert scheduler.num_batches < 12
+
+    # Without a running thread the waiting caller drives the scheduler
+    tree = ThoughtTree(tokenizer=tokenizer, max_branches=2, max_depth=1, max_new_tokens=4, scheduler=scheduler)
+    tree.solve(prompt="Prove it")
+    assert len(tree.tree) == 3
+
+def test_scheduler_expand_fn(model, tokenizer):
+    """Test the beam search expand function backed by the scheduler."""
+    scheduler = GenerationScheduler(model, tokenizer)
+    search = AdaptiveBeamSearch(
+        initial_beam_width=2, min_beam_width=2, max_steps=2, executor=ThreadPoolExecutor(2)
+    )
+    with scheduler:
+        path, score = search.search(
+            "Prove it",
+            score_fn=lambda state: len(state) % 7 / 7,
+            expand_fn=scheduler.expand_fn(num_branches=2, max_new_tokens=4)
+        )
+    assert path[0] == "Prove it"
+    assert path[-1].startswith("Prove it\n")
+    assert scheduler.num_requests >= 3
@@ -0,0 +1,54 @@
+"""
+Tests for self-consistency sampling.
+"""
+
+import math
+
+import pytest
+
+from superllm.core import SelfConsistency
+from superllm.core.self_consistency import binomial_tail, normalize_answer
+
+def test_normalize_answer():
+    """Test answer extraction and canonicalization."""
+    assert normalize_answer("2 + 2 = 4.\nThe answer is 1,000.") == "1000"
+    assert normalize_answer("Answer: Paris!") == "paris"
+    assert normalize_answer("Let me think\n  The  Eiffel Tower \n") == "the eiffel tower"
+    assert normalize_answer("final answer = 2.50") == "2.5"
+    assert normalize_answer("   ") == ""
+
+def test_binomial_tail():
+    """Test the exact one-sided binomial p-value."""
+    assert binomial_tail(0, 0) == 1.0
+    assert binomial_tail(5, 5) == 1 / 32
+    assert math.isclose(binomial_tail(8, 10), 56 / 1024)
+
+def test_early_stopping(model, tokenizer):
+    """Test that a unanimous vote stops after the first batch."""
+    sc = SelfConsistency(
+        model=model, tokenizer=tokenizer, max_samples=40, batch_size=8,
+        max_new_tokens=4, normalizer=lambda text: "42"
+    )
+    result = sc.solve("What is 6 * 7?")
+    assert result["solution"] == "42"
+    assert result["samples_used"] == 8
+    assert result["stop_reason"] == "significant"
+    assert result["answer_distribution"] == {"42": 1.0}
+    assert result["confidence"] == 1.0
+    assert result["reasoning_path"][0] == "What is 6 * 7?"
+
+def test_no_early_stop_on_split_vote(model, tokenizer):
+    """Test that an evenly split vote uses the full budget."""
+    votes = iter(["a", "b"] * 20)
+    sc = SelfConsistency(
+        model=model, tokenizer=tokenizer, max_samples=12, batch_size=4,
+        max_new_tokens=4, normalizer=lambda text: next(votes)
+    )
+    result = sc.solve("Pick one")
+    assert result["samples_used"] == 12
+    assert result["stop_reason"] == "max_samples"
+    assert result["answer_distribution"] == {"a": 0.5, "b": 0.5}
+    assert len(result["samples"]) == 12
+
+    with pytest.raises(ValueError):
+        SelfConsistency().solve("Pick one")
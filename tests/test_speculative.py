@@ -0,0 +1,104 @@
+"""
+Tests for draft-and-verify thought generation.
+"""
+
+import json
+import pytest
+import torch
+
+from superllm import ThoughtTree, MetricsTracker
+from superllm.core import NGramDrafter, ModelDrafter
+from superllm.core.generation import token_logprobs
+from superllm.core.speculative import SpeculativeGenerator
+
+def test_ngram_drafter(tokenizer):
+    """Test that n-gram drafts continue patterns seen in the context."""
+    drafter = NGramDrafter(tokenizer, n=3, seed=0)
+    drafts = drafter.propose(["abcabcabcab"], num_drafts=3, max_new_tokens=4)
+    assert drafts == [["cabc"] * 3]
+
+    # Unseen histories back off to token frequencies
+    drafts = drafter.propose(["xyz"], num_drafts=2, max_new_tokens=3)
+    assert all(len(draft) == 3 for draft in drafts[0])
+    
+    # Statistics stay bounded however many contexts are seen
+    bounded = NGramDrafter(tokenizer, n=3, seed=0, max_histories=50, max_contexts=5)
+    for i in range(100):
+        bounded.propose([f"context number {i}"], num_drafts=1, max_new_tokens=2)
+    assert all(len(table) <= 50 for table in bounded.tables)
+    assert len(bounded._seen) == 5
+
+def test_token_logprobs(model, tokenizer):
+    """Test that batched scoring matches scoring each sequence on its own."""
+    sequences = [tokenizer.encode("Prove it now"), tokenizer.encode("Hi there")]
+    batched = token_logprobs(model, sequences, [6, 3])
+
+    for ids, start, scores in zip(sequences, [6, 3], batched):
+        with torch.no_grad():
+            logits = model(input_ids=torch.tensor([ids])).logits[0]
+        expected = torch.log_softmax(logits, dim=-1)[range(start - 1, len(ids) - 1), ids[start:]]
+        assert len(scores) == len(ids) - start
+        assert torch.allclose(torch.tensor(scores), expected, atol=1e-5)
+
+    with pytest.raises(ValueError):
+        token_logprobs(model, sequences, [0, 3])
+
+def test_draft_and_verify_tree(model, tokenizer):
+    """Test that accepted drafts skip generation and rejected ones are completed."""
+    metrics = MetricsTracker()
+    tree = ThoughtTree(
+        model=model, tokenizer=tokenizer, max_branches=2, max_depth=2, max_new_tokens=4,
+        drafter=NGramDrafter(tokenizer, seed=0), num_drafts=8, draft_accept_prob=0.0,
+        metrics=metrics
+    )
+    result = tree.solve(prompt="Prove that it is odd or even.")
+    assert len(tree.tree) == 1 + 2 + 4
+    assert len(result["reasoning_path"]) == 3
+
+    # Every draft is accepted, so the model only verifies
+    stats = tree.speculative.get_statistics()
+    assert stats["acceptance_rate"] == 1.0
+    assert stats["survivors_completed"] == 0
+    assert stats["speedup"] is None
+    json.dumps(stats)
+    assert metrics.counter("model_calls", {"kind": "generate"}) == 0
+    assert metrics.counter("model_calls", {"kind": "score"}) == 2
+    assert 0 < result["confidence"] <= 1
+
+    # Nothing is accepted: survivors are generated by the model from scratch
+    tree = ThoughtTree(
+        model=model, tokenizer=tokenizer, max_branches=2, max_depth=1, max_new_tokens=4,
+        drafter=NGramDrafter(tokenizer, seed=0), num_drafts=3, draft_accept_prob=1.0
+    )
+    tree.solve(prompt="Prove it")
+    stats = tree.speculative.get_statistics()
+    assert stats["drafts_proposed"] <= 3
+    assert stats["acceptance_rate"] == 0.0
+    assert stats["survivors_completed"] == 2
+    assert stats["speedup"] == 1.0
+    assert len(tree.tree) == 3
+
+    # Verification passes are capped by verify_batch_size; empty contexts work
+    metrics = MetricsTracker()
+    generator = SpeculativeGenerator(
+        NGramDrafter(tokenizer, seed=0), num_drafts=4, metrics=metrics, verify_batch_size=2
+    )
+    results = generator.generate(model, tokenizer, ["", "abcabcabc"], num_branches=2, max_new_tokens=3)
+    assert [len(samples) for samples in results] == [2, 2]
+    assert metrics.counter("model_calls", {"kind": "score"}) >= 2
+
+def test_model_drafter(model, tokenizer):
+    """Test drafting with a separate draft model."""
+    drafter = ModelDrafter(model, tokenizer)
+    drafts = drafter.propose(["Prove it", "Hi"], num_drafts=2, max_new_tokens=3)
+    assert [len(samples) for samples in drafts] == [2, 2]
+
+    tree = ThoughtTree(
+        model=model, tokenizer=tokenizer, max_branches=2, max_depth=1, max_new_tokens=3,
+        drafter=drafter
+    )
+    tree.solve(prompt="Prove it")
+    stats = tree.speculative.get_statistics()
+    assert stats["drafts_proposed"] > 0
+    assert 0.0 <= stats["acceptance_rate"] <= 1.0
+    assert len(tree.tree) == 3
@@ -2,10 +2,16 @@
 Tests for the ThoughtTree implementation.
 """
 
+import asyncio
 import pytest
 import numpy as np
-from superllm import ThoughtTree, ExpertFeedback
+import torch
+from transformers import StaticCache
+from superllm import ThoughtTree, ExpertFeedback, MetricsTracker
 from superllm.search import AdaptiveBeamSearch
+from superllm.core.generation import _batch_caches, prefill
+from superllm.core.review_queue import LocalReviewer, ReviewQueue
+from superllm.core.thought_store import ArrayThoughtStore, Thought
 
 def test_thought_tree_initialization():
     """Test basic initialization of ThoughtTree."""
@@ -14,9 +20,11 @@ def test_thought_tree_initialization():
     assert tree.max_depth == 3
     assert tree.temperature == 0.7
 
-def test_thought_tree_solve():
+def test_thought_tree_solve(model, tokenizer):
     """Test solving a simple problem with ThoughtTree."""
-    tree = ThoughtTree()
+    tree = ThoughtTree(
+        model=model, tokenizer=tokenizer, max_new_tokens=4, prune_with_search_algorithm=True
+    )
     expert = ExpertFeedback()
     search = AdaptiveBeamSearch()
     
@@ -32,6 +40,308 @@ def test_thought_tree_solve():
     assert "confidence" in result
     assert 0 <= result["confidence"] <= 1
 
+def test_array_thought_store():
+    """Test the array-backed thought store and its networkx export."""
+    store = ArrayThoughtStore(capacity=2)
+    root = store.add_root(Thought(content="root", score=1.0, metadata={"depth": 0}))
+    children = store.add_children(root, [
+        Thought(content=f"child {i}", score=0.5 + 0.1 * i, metadata={})
+        for i in range(3)
+    ])
+    grandchildren = store.add_children(children[1], [
+        Thought(content="child 0", score=0.2, metadata={"note": "x"})
+    ])
+    
+    assert len(store) == 5
+    assert list(store.children(root)) == list(children)
+    assert store.path(grandchildren[0]) == [root, children[1], grandchildren[0]]
+    assert store.metadata(grandchildren[0]) == {"depth": 2, "note": "x"}
+    assert store.node(grandchildren[0]).content == "child 0"
+    assert sorted(store.leaves().tolist()) == [1, 3, 4]
+    
+    with pytest.raises(ValueError):
+        store.add_children(root, [Thought(content="late", score=0.0, metadata={})])
+    
+    graph = store.to_networkx()
+    assert graph.number_of_nodes() == 5
+    assert graph.number_of_edges() == 4
+    assert graph.nodes[4]["thought"].content == "child 0"
+
+def test_tree_backends_agree(model, tokenizer):
+    """Test that both tree backends produce the same solution."""
+    results = []
+    for backend in ("array", "networkx"):
+        torch.manual_seed(0)
+        tree = ThoughtTree(
+            model=model, tokenizer=tokenizer, max_branches=3, max_depth=2,
+            max_new_tokens=4, tree_backend=backend
+        )
+        results.append(tree.solve(prompt="What is 2 + 2?"))
+    
+    assert results[0] == results[1]
+
+def test_solve_reuse_tree(model, tokenizer):
+    """Test that repeated solves rebuild the tree unless reuse is requested."""
+    tree = ThoughtTree(
+        model=model, tokenizer=tokenizer, max_branches=2, max_depth=2, max_new_tokens=4
+    )
+    tree.solve(prompt="First question")
+    assert len(tree.tree) == 7
+    
+    tree.solve(prompt="First question")
+    assert len(tree.tree) == 7
+    
+    tree.max_depth = 3
+    result = tree.solve(prompt="First question", reuse_tree=True)
+    assert len(tree.tree) == 15
+    assert len(result["reasoning_path"]) == 4
+    
+    tree.solve(prompt="Second question", reuse_tree=True)
+    assert len(tree.tree) == 15
+    assert tree.tree.content(0) == "Second question"
+
+def test_batched_generation(model, tokenizer):
+    """Test that each level is generated with one capped batch of generate calls."""
+    calls = []
+    generate = model.generate
+    
+    def counting_generate(**kwargs):
+        calls.append(kwargs["input_ids"].shape[0])
+        return generate(**kwargs)
+    
+    model.generate = counting_generate
+    tree = ThoughtTree(
+        model=model, tokenizer=tokenizer, max_branches=3, max_depth=2,
+        max_new_tokens=4, generation_batch_size=2
+    )
+    result = tree.solve(prompt="Plan a trip")
+    
+    # One call for the root, then the 3 children split into batches of 2 and 1
+    assert calls == [1, 2, 1]
+    assert len(tree.tree) == 13
+    assert 0 <= result["confidence"] <= 1
+
+def test_prefix_cache_reuse(model, tokenizer):
+    """Test that prefix caching reproduces uncached greedy generation."""
+    results = []
+    for prefix_cache_bytes in (None, 10 ** 8, 20000):
+        metrics = MetricsTracker()
+        tree = ThoughtTree(
+            model=model, tokenizer=tokenizer, max_branches=2, max_depth=3,
+            max_new_tokens=4, temperature=0, prefix_cache_bytes=prefix_cache_bytes,
+            metrics=metrics
+        )
+        results.append(tree.solve(prompt="Hello world"))
+        if tree.prefix_cache is not None:
+            stats = tree.prefix_cache.get_statistics()
+            assert stats["hits"] == 6
+            assert stats["nbytes"] <= prefix_cache_bytes
+            # Nodes whose contexts have equal length share a generate call
+            assert metrics.counter("nodes_expanded") == 7
+            assert metrics.counter("model_calls", {"kind": "generate"}) < 7
+    
+    assert results[0] == results[1] == results[2]
+    assert stats["evictions"] > 0
+
+def test_greedy_children_are_distinct(model, tokenizer):
+    """Test that decoding without sampling does not repeat the same child."""
+    for prefix_cache_bytes in (None, 10 ** 8):
+        tree = ThoughtTree(
+            model=model, tokenizer=tokenizer, max_branches=3, max_depth=2,
+            max_new_tokens=4, temperature=0, prefix_cache_bytes=prefix_cache_bytes
+        )
+        tree.solve(prompt="Hello world")
+        assert len(tree.tree) == 1 + 3 + 9
+        for node_id in range(4):
+            children = [tree.tree.content(child) for child in tree.tree.children(node_id)]
+            assert len(set(children)) == 3
+
+def test_prefill_leaves_parent_cache_intact(model):
+    """Test that extending a copied cache never writes into the cache it came from."""
+    parent = prefill(model, [5, 6, 7])
+    child = prefill(model, [8, 9], parent)
+    assert parent.get_seq_length() == 3 and child.get_seq_length() == 5
+    
+    # Static caches write in place, so they are copied rather than shared
+    static = StaticCache(config=model.config, max_cache_len=16)
+    with torch.no_grad():
+        model(input_ids=torch.tensor([[5, 6, 7]]), past_key_values=static, use_cache=True)
+    keys = static.layers[0].keys.clone()
+    prefill(model, [8, 9], static)
+    assert torch.equal(static.layers[0].keys, keys)
+    with pytest.raises(TypeError):
+        _batch_caches([static, static], repeats=1)
+
+def test_mcts_solver(model, tokenizer):
+    """Test that MCTS spends its whole budget on distinct expansions, in batches."""
+    calls = []
+    generate = model.generate
+    
+    def counting_generate(**kwargs):
+        calls.append(kwargs["input_ids"].shape[0])
+        return generate(**kwargs)
+    
+    model.generate = counting_generate
+    tree = ThoughtTree(
+        model=model, tokenizer=tokenizer, max_branches=3, max_depth=3, max_new_tokens=4,
+        solver="mcts", num_simulations=8, parallel_simulations=4
+    )
+    result = tree.solve(prompt="Prove it")
+    
+    assert isinstance(result["solution"], str)
+    assert 2 <= len(result["reasoning_path"]) <= 4
+    # One distinct expansion per simulation, versus 1 + 3 + 9 for breadth-first
+    assert len(tree.tree) == 1 + 3 * 8
+    # The root, then groups of 4 and 3 leaves
+    assert len(calls) == 3
+    
+    with pytest.raises(ValueError):
+        tree.solve(prompt="Prove it", solver="dfs")
+    
+    # A breadth-first solve completes the tree MCTS left behind
+    tree = ThoughtTree(
+        model=model, tokenizer=tokenizer, max_branches=2, max_depth=2, max_new_tokens=4,
+        num_simulations=2, parallel_simulations=1
+    )
+    tree.solve(prompt="Prove it", solver="mcts")
+    assert len(tree.tree) == 1 + 2 + 2
+    result = tree.solve(prompt="Prove it", solver="bfs", reuse_tree=True)
+    assert len(tree.tree) == 1 + 2 + 4
+    assert len(result["reasoning_path"]) == 3
+
+def test_frontier_pruning(model, tokenizer):
+    """Test that pruning keeps tree growth linear in depth."""
+    tree = ThoughtTree(
+        model=model, tokenizer=tokenizer, max_branches=3, max_depth=3, max_new_tokens=4,
+        beam_width=2
+    )
+    result = tree.solve(prompt="Prove it")
+    
+    # 1 + 3 + 2 * 3 + 2 * 3 nodes instead of 1 + 3 + 9 + 27
+    assert len(tree.tree) == 16
+    assert tree.num_pruned == 2 * (6 - 2) + 1
+    assert len(result["reasoning_path"]) == 4
+    
+    # Thresholds always keep the best node of a level
+    tree = ThoughtTree(
+        model=model, tokenizer=tokenizer, max_branches=3, max_depth=3, max_new_tokens=4,
+        min_score=2.0
+    )
+    tree.solve(prompt="Prove it")
+    assert len(tree.tree) == 1 + 3 * 3
+    
+    # If enabled, a search algorithm with select_indices chooses the frontier
+    search = AdaptiveBeamSearch(initial_beam_width=1, min_beam_width=1, max_beam_width=1)
+    tree = ThoughtTree(
+        model=model, tokenizer=tokenizer, max_branches=3, max_depth=3, max_new_tokens=4,
+        prune_with_search_algorithm=True
+    )
+    tree.solve(prompt="Prove it", search_algorithm=search)
+    assert len(tree.tree) == 1 + 3 * 3
+    assert search.get_search_statistics()["num_steps"] == 3
+    
+    # Without opting in, a search algorithm does not prune the tree
+    tree = ThoughtTree(model=model, tokenizer=tokenizer, max_branches=3, max_depth=2, max_new_tokens=4)
+    tree.solve(prompt="Prove it", search_algorithm=AdaptiveBeamSearch(initial_beam_width=1))
+    assert len(tree.tree) == 1 + 3 + 9
+
+def test_batched_expert_feedback(model, tokenizer):
+    """Test that the tree evaluates each level with one batch evaluator call."""
+    calls = []
+    
+    def batch_evaluator(thoughts):
+        calls.append(len(thoughts))
+        return np.linspace(0.0, 1.0, len(thoughts))
+    
+    expert = ExpertFeedback(feedback_strategy="passive", batch_evaluator=batch_evaluator)
+    tree = ThoughtTree(model=model, tokenizer=tokenizer, max_branches=2, max_depth=2, max_new_tokens=4)
+    tree.solve(prompt="Prove it", expert_system=expert)
+    
+    assert len(calls) == 2
+    assert expert.get_cache_statistics()["num_batches"] == 2
+    assert all("feedback" in tree.tree.metadata(n) for n in range(1, len(tree.tree)))
+    
+    # The solution is the leaf with the best feedback, not the best generation score
+    leaves = range(3, len(tree.tree))
+    best = max(leaves, key=lambda n: tree.tree.metadata(n)["feedback"].score)
+    result = tree._extract_solution()
+    assert result["solution"] == tree.tree.content(best)
+    assert result["confidence"] == tree.tree.metadata(best)["feedback"].score
+
+def test_solve_stream(model, tokenizer):
+    """Test that streamed events describe the tree level by level."""
+    expert = ExpertFeedback(feedback_strategy="passive", custom_evaluator=lambda thought: 0.5)
+    tree = ThoughtTree(model=model, tokenizer=tokenizer, max_branches=2, max_depth=2, max_new_tokens=4)
+    events = list(tree.solve_stream(prompt="Prove it", expert_system=expert))
+    
+    types = [event.type for event in events]
+    assert types.count("node_added") == len(tree.tree) - 1 == 6
+    assert types.count("score_updated") == 6
+    assert types.count("best_so_far") == 2
+    assert types[-1] == "done"
+    assert types[:5] == ["node_added"] * 2 + ["score_updated"] * 2 + ["best_so_far"]
+    assert all(event.parent_id == 0 for event in events[:2])
+    assert events[-1].result == tree._extract_solution()
+    
+    with pytest.raises(ValueError):
+        list(tree.solve_stream(prompt="Prove it", solver="mcts"))
+
+def test_solve_stream_merged_reviews(model, tokenizer):
+    """Test that reviews merged while streaming are reported as score updates."""
+    queue = ReviewQueue()
+    expert = ExpertFeedback(
+        feedback_strategy="active", custom_evaluator=lambda thought: 0.5, review_queue=queue
+    )
+    tree = ThoughtTree(model=model, tokenizer=tokenizer, max_branches=2, max_depth=2, max_new_tokens=4)
+    events = []
+    for event in tree.solve_stream(prompt="Prove it", expert_system=expert):
+        events.append(event)
+        if event.type == "best_so_far" and len(events) < 6:
+            # Review the first level before the second one is streamed
+            LocalReviewer(queue, lambda thought: 1.0).review_pending()
+    
+    updates = [event for event in events[5:] if event.type == "score_updated" and event.depth == 1]
+    assert sorted(event.node_id for event in updates) == [1, 2]
+    assert all(event.score == pytest.approx(0.3 * 0.5 + 0.7 * 1.0) for event in updates)
+    assert events[-1].type == "done"
+    assert expert._review_listeners == []
+
+def test_solve_stream_cancellation(model, tokenizer):
+    """Test that closing a stream stops expanding and leaves a resumable tree."""
+    tree = ThoughtTree(model=model, tokenizer=tokenizer, max_branches=2, max_depth=3, max_new_tokens=4)
+    stream = tree.solve_stream(prompt="Prove it")
+    for event in stream:
+        if event.type == "best_so_far":
+            break
+    stream.close()
+    assert len(tree.tree) == 3
+    
+    result = tree.solve(prompt="Prove it", reuse_tree=True)
+    assert len(tree.tree) == 1 + 2 + 4 + 8
+    assert len(result["reasoning_path"]) == 4
+
+def test_solve_stream_async(model, tokenizer):
+    """Test the asynchronous event stream, including early exit."""
+    tree = ThoughtTree(model=model, tokenizer=tokenizer, max_branches=2, max_depth=2, max_new_tokens=4)
+    
+    async def collect(stop_after=None):
+        events = []
+        stream = tree.solve_stream_async(prompt="Prove it")
+        async for event in stream:
+            events.append(event)
+            if event.type == stop_after:
+                break
+        await stream.aclose()
+        return events
+    
+    events = asyncio.run(collect())
+    assert [event.type for event in events].count("node_added") == 6
+    assert events[-1].type == "done"
+    
+    events = asyncio.run(collect(stop_after="best_so_far"))
+    assert events[-1].type == "best_so_far"
+    assert len(tree.tree) == 3
+
 def test_expert_feedback():
     """Test expert feedback system."""
     expert = ExpertFeedback(feedback_strategy="hybrid")
@@ -47,6 +357,30 @@ def test_expert_feedback():
     assert "mean_score" in stats
     assert "num_feedback" in stats
 
+def test_evaluate_batch():
+    """Test that batch evaluation scores each distinct thought once per call."""
+    calls = []
+    
+    def batch_evaluator(thoughts):
+        calls.append(len(thoughts))
+        return [len(thought) / 10 for thought in thoughts]
+    
+    expert = ExpertFeedback(feedback_strategy="passive", batch_evaluator=batch_evaluator)
+    feedbacks = expert.evaluate_batch(["a", "bb", "a", "ccc"])
+    assert [f.score for f in feedbacks] == [0.1, 0.2, 0.1, 0.3]
+    assert calls == [3]
+    
+    # Cached content is not scored again, by evaluate_batch or evaluate
+    expert.evaluate_batch(["bb", "dddd"])
+    assert expert.evaluate("ccc").score == 0.3
+    assert calls == [3, 1]
+    
+    stats = expert.get_cache_statistics()
+    assert stats["evaluator_calls"] == 2
+    assert stats["num_batches"] == 2
+    assert stats["batch_size"]["max"] == 3
+    assert stats["hits"] == 2
+
 def test_adaptive_beam_search():
     """Test adaptive beam search."""
     search = AdaptiveBeamSearch(
@@ -72,9 +406,11 @@ def test_adaptive_beam_search():
     assert len(path) > 0
     assert score > 0
 
-def test_integration():
+def test_integration(model, tokenizer):
     """Test integration of all components."""
-    tree = ThoughtTree()
+    tree = ThoughtTree(
+        model=model, tokenizer=tokenizer, max_new_tokens=4, prune_with_search_algorithm=True
+    )
     expert = ExpertFeedback()
     search = AdaptiveBeamSearch()
     